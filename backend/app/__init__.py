@@ -6,10 +6,13 @@ from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from app.utils.redis_pool import RedisPool
+
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 limiter = Limiter(key_func=get_remote_address)
+redis_store = RedisPool()
 
 
 def create_app(config_name="default"):
@@ -19,17 +22,40 @@ def create_app(config_name="default"):
     from app.config import config
     app.config.from_object(config[config_name])
 
+    # ── JSON encoding ───────────────────────────────────────────────────────
+    from app.utils.json_provider import configure_json
+    configure_json(app)
+
     # ── Extensions ─────────────────────────────────────────────────────────
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    redis_store.init_app(app)
+    if redis_store.pool is not None:
+        # Rate-limit counters share the app's pool instead of opening their own
+        app.config["RATELIMIT_STORAGE_OPTIONS"] = {
+            **app.config.get("RATELIMIT_STORAGE_OPTIONS", {}),
+            "connection_pool": redis_store.pool,
+        }
     limiter.init_app(app)
     CORS(app, origins=app.config["CORS_ORIGINS"], supports_credentials=True)
 
+    # ── Risk model (loaded once per worker) ─────────────────────────────────
+    from app.services import risk_model
+    risk_model.init_app(app)
+
+    # ── Search (pg_trgm functions for SQLite connections) ───────────────────
+    from app.services import search
+    search.init_app(app)
+
     # ── JWT Callbacks ───────────────────────────────────────────────────────
     from app.utils.jwt_callbacks import register_jwt_callbacks
     register_jwt_callbacks(jwt)
 
+    # ── Error Handlers ──────────────────────────────────────────────────────
+    from app.utils.errors import register_error_handlers
+    register_error_handlers(app)
+
     # ── Blueprints ──────────────────────────────────────────────────────────
     from app.api.auth        import auth_bp
     from app.api.dashboard   import dashboard_bp
@@ -40,6 +66,10 @@ def create_app(config_name="default"):
     from app.api.expenses    import expenses_bp
     from app.api.analytics   import analytics_bp
     from app.api.ai          import ai_bp
+    from app.api.stream      import stream_bp
+    from app.api.routes      import routes_bp
+    from app.api.search      import search_bp
+    from app.api.autocomplete import autocomplete_bp
 
     prefix = "/api/v1"
     app.register_blueprint(auth_bp,        url_prefix=f"{prefix}/auth")
@@ -51,6 +81,10 @@ def create_app(config_name="default"):
     app.register_blueprint(expenses_bp,    url_prefix=f"{prefix}/expenses")
     app.register_blueprint(analytics_bp,   url_prefix=f"{prefix}/analytics")
     app.register_blueprint(ai_bp,          url_prefix=f"{prefix}/ai")
+    app.register_blueprint(stream_bp,      url_prefix=f"{prefix}/stream")
+    app.register_blueprint(routes_bp,      url_prefix=f"{prefix}/routes")
+    app.register_blueprint(search_bp,      url_prefix=f"{prefix}/search")
+    app.register_blueprint(autocomplete_bp, url_prefix=f"{prefix}/autocomplete")
 
     # ── Health Check ────────────────────────────────────────────────────────
     @app.get("/health")
@@ -1,11 +1,8 @@
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func, extract
-from datetime import date, timedelta
-
-from app import db
-from app.models import Trip, Vehicle, Expense, Driver
-from app.utils.helpers import success
+from app.models import Vehicle, Driver
+from app.services import reports
+from app.utils.helpers import success, error, paginate
 
 analytics_bp = Blueprint("analytics", __name__)
 
@@ -14,86 +11,28 @@ analytics_bp = Blueprint("analytics", __name__)
 @jwt_required()
 def financial_summary():
     months = request.args.get("months", 6, type=int)
-    months = min(months, 24)
-
-    results = []
-    today = date.today()
-
-    for i in range(months - 1, -1, -1):
-        # Calculate month boundaries
-        target = date(today.year, today.month, 1) - timedelta(days=i * 28)
-        month_start = date(target.year, target.month, 1)
-        if target.month == 12:
-            month_end = date(target.year + 1, 1, 1)
-        else:
-            month_end = date(target.year, target.month + 1, 1)
-
-        total_cost = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.expense_date >= month_start,
-            Expense.expense_date < month_end,
-        ).scalar() or 0
-
-        fuel_cost = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.expense_date >= month_start,
-            Expense.expense_date < month_end,
-            Expense.expense_type == "fuel",
-        ).scalar() or 0
-
-        repair_cost = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.expense_date >= month_start,
-            Expense.expense_date < month_end,
-            Expense.expense_type == "repair",
-        ).scalar() or 0
-
-        trips_count = Trip.query.filter(
-            Trip.status == "completed",
-            Trip.actual_arrival >= month_start,
-            Trip.actual_arrival < month_end,
-        ).count()
-
-        results.append({
-            "month": month_start.strftime("%b %Y"),
-            "month_short": month_start.strftime("%b"),
-            "total_cost": float(total_cost),
-            "fuel_cost": float(fuel_cost),
-            "repair_cost": float(repair_cost),
-            "trips_completed": trips_count,
-        })
-
-    return success(results)
+    months = min(months, reports.MAX_SUMMARY_MONTHS)
+    return success(reports.monthly_summary(months))
 
 
 @analytics_bp.get("/vehicle-roi")
 @jwt_required()
 def vehicle_roi():
-    vehicles = Vehicle.query.filter(Vehicle.status != "retired").all()
-    result = []
-
-    for v in vehicles:
-        total_cost = db.session.query(func.sum(Expense.amount)).filter_by(vehicle_id=v.id).scalar() or 0
-        trips_done = Trip.query.filter_by(vehicle_id=v.id, status="completed").count()
-        total_dist = db.session.query(func.sum(Trip.distance_km)).filter_by(
-            vehicle_id=v.id, status="completed"
-        ).scalar() or 0
-
-        # Rough revenue estimate: ₹45/km (can be made dynamic)
-        estimated_revenue = float(total_dist or 0) * 45
-
-        result.append({
-            "vehicle_id":         v.id,
-            "registration":       v.registration_number,
-            "make_model":         f"{v.make} {v.model}",
-            "type":               v.type,
-            "total_cost":         float(total_cost),
-            "estimated_revenue":  estimated_revenue,
-            "net_roi":            estimated_revenue - float(total_cost),
-            "trips_completed":    trips_done,
-            "total_distance_km":  float(total_dist or 0),
-            "cost_per_km": round(float(total_cost) / float(total_dist), 2) if total_dist else None,
-        })
-
-    result.sort(key=lambda x: x["net_roi"], reverse=True)
-    return success(result)
+    sort  = request.args.get("sort", "net_roi")
+    order = request.args.get("order", "desc")
+    if sort not in reports.ROI_SORT_FIELDS:
+        return error(f"sort must be one of: {', '.join(reports.ROI_SORT_FIELDS)}.", 422)
+    if order not in ("asc", "desc"):
+        return error("order must be asc or desc.", 422)
+
+    q = reports.vehicle_roi_query(sort, order)
+    if "page" not in request.args:
+        return success([reports.roi_row(r) for r in q])
+
+    page     = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 20, type=int)
+    rows, meta = paginate(q, page, per_page)
+    return success([reports.roi_row(r) for r in rows], meta=meta)
 
 
 @analytics_bp.get("/fuel-efficiency")
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
     jwt_required, get_jwt_identity, get_jwt
@@ -9,22 +9,12 @@ from datetime import datetime, timezone
 
 from app import db, limiter
 from app.models import User
+from app.utils.helpers import success, error
 
 auth_bp = Blueprint("auth", __name__)
 ph = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=4)
 
 
-def success(data, code=200):
-    return jsonify({"status": "success", "data": data}), code
-
-
-def error(message, code=400, error_code=None):
-    r = {"status": "error", "message": message}
-    if error_code:
-        r["code"] = error_code
-    return jsonify(r), code
-
-
 # ── POST /auth/login ──────────────────────────────────────────────────────────
 
 @auth_bp.post("/login")
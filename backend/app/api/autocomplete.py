@@ -0,0 +1,27 @@
+"""
+Autocomplete API for the vehicle and trip forms, answered from the
+worker's in-memory prefix index (app.services.autocomplete).
+"""
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+
+from app.services import autocomplete
+from app.utils.helpers import success, error
+
+autocomplete_bp = Blueprint("autocomplete", __name__)
+
+
+@autocomplete_bp.get("/")
+@jwt_required()
+def complete():
+    """?q=GJ05&types=vehicles,drivers&limit=10 → {type: [row]} in key order."""
+    prefix = (request.args.get("q") or "").strip()
+    limit  = min(max(request.args.get("limit", 10, type=int), 1), autocomplete.MAX_RESULTS)
+    types  = [t.strip() for t in request.args.get("types", "").split(",") if t.strip()] or list(autocomplete.TYPES)
+
+    unknown = [t for t in types if t not in autocomplete.TYPES]
+    if unknown:
+        return error(f"Unknown types: {', '.join(unknown)}", 422, details={"allowed": list(autocomplete.TYPES)})
+    if not prefix:
+        return success({t: [] for t in types})
+    return success(autocomplete.index.lookup(prefix, types, limit))
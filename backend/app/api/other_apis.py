@@ -3,8 +3,10 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import date
 
 from app import db
-from app.models import Driver, MaintenanceLog, Vehicle, Expense
-from app.utils.helpers import success, error, require_role, paginate
+from app.models import Driver, MaintenanceLog, Vehicle, Expense, Trip
+from app.services import counters, events, fuel, reports, risk, rollup
+from app.utils.helpers import success, error, require_role, list_page
+from app.utils import fields
 
 drivers_bp    = Blueprint("drivers",     __name__)
 maintenance_bp = Blueprint("maintenance", __name__)
@@ -20,6 +22,7 @@ def list_drivers():
     page   = request.args.get("page", 1, type=int)
     status = request.args.get("status")
     search = request.args.get("search", "").strip()
+    fieldset = fields.requested(Driver, Driver.created_at)
 
     q = Driver.query
     if status and status != "all":
@@ -29,9 +32,10 @@ def list_drivers():
             db.or_(Driver.full_name.ilike(f"%{search}%"),
                    Driver.license_number.ilike(f"%{search}%"))
         )
-    q = q.order_by(Driver.created_at.desc())
-    items, meta = paginate(q, page)
-    return success([d.to_dict() for d in items], meta=meta)
+    if fieldset:
+        q = fieldset.select(q)
+    items, meta = list_page(q, (Driver.created_at, Driver.id), page)
+    return success(fieldset.dump(items) if fieldset else [d.to_dict() for d in items], meta=meta)
 
 
 @drivers_bp.post("/")
@@ -54,6 +58,7 @@ def create_driver():
     )
     db.session.add(d)
     db.session.commit()
+    events.publish("driver", {"id": d.id, "duty_status": d.duty_status})
     return success(d.to_dict(), 201)
 
 
@@ -62,7 +67,7 @@ def create_driver():
 def get_driver(driver_id):
     d    = Driver.query.get_or_404(driver_id)
     data = d.to_dict()
-    recent = d.trips.order_by(db.desc("created_at")).limit(10).all()
+    recent = d.trips.options(db.joinedload(Trip.vehicle)).order_by(db.desc("created_at")).limit(10).all()
     data["recent_trips"] = [t.to_dict() for t in recent]
     return success(data)
 
@@ -82,6 +87,7 @@ def update_driver(driver_id):
     score = max(0, 100 - (d.incidents_count * 15))
     d.safety_score = score
     db.session.commit()
+    events.publish("driver", {"id": d.id, "duty_status": d.duty_status})
     return success(d.to_dict())
 
 
@@ -95,15 +101,17 @@ def list_maintenance():
     page       = request.args.get("page", 1, type=int)
     vehicle_id = request.args.get("vehicle_id")
     status     = request.args.get("status")
+    fieldset   = fields.requested(MaintenanceLog, MaintenanceLog.service_date)
 
-    q = MaintenanceLog.query
+    q = MaintenanceLog.query if fieldset else MaintenanceLog.query.options(*MaintenanceLog.eager_refs())
     if vehicle_id:
         q = q.filter_by(vehicle_id=vehicle_id)
     if status and status != "all":
         q = q.filter_by(status=status)
-    q = q.order_by(MaintenanceLog.service_date.desc())
-    items, meta = paginate(q, page)
-    return success([m.to_dict() for m in items], meta=meta)
+    if fieldset:
+        q = fieldset.select(q)
+    items, meta = list_page(q, (MaintenanceLog.service_date, MaintenanceLog.id), page)
+    return success(fieldset.dump(items) if fieldset else [m.to_dict() for m in items], meta=meta)
 
 
 @maintenance_bp.post("/")
@@ -131,12 +139,19 @@ def create_maintenance():
         logged_by           = get_jwt_identity(),
     )
     # Auto-lock vehicle
+    old_status = vehicle.status
+    was_due    = counters.is_service_due(vehicle.odometer_km, vehicle.next_service_km)
     vehicle.status = "in_shop"
     if log.next_service_km:
         vehicle.next_service_km = log.next_service_km
+    is_due = counters.is_service_due(vehicle.odometer_km, vehicle.next_service_km)
 
     db.session.add(log)
+    risk.refresh([vehicle.id])
     db.session.commit()
+    counters.vehicle_changed(old_status, "in_shop", was_due, is_due)
+    events.publish("maintenance", {"id": log.id, "vehicle_id": log.vehicle_id, "status": log.status})
+    events.publish_kpis("fleet", "alerts")
     return success({**log.to_dict(), "vehicle_locked": True}, 201)
 
 
@@ -146,10 +161,16 @@ def complete_maintenance(log_id):
     log = MaintenanceLog.query.get_or_404(log_id)
     log.status = "completed"
     vehicle = Vehicle.query.get(log.vehicle_id)
-    if vehicle and vehicle.status == "in_shop":
+    unlocked = bool(vehicle and vehicle.status == "in_shop")
+    if unlocked:
         vehicle.status = "available"
         vehicle.last_service_date = log.service_date
+    risk.refresh([log.vehicle_id])
     db.session.commit()
+    if unlocked:
+        counters.vehicle_changed("in_shop", "available")
+    events.publish("maintenance", {"id": log.id, "vehicle_id": log.vehicle_id, "status": log.status})
+    events.publish_kpis("fleet", "alerts")
     return success({**log.to_dict(), "vehicle_unlocked": True})
 
 
@@ -165,8 +186,9 @@ def list_expenses():
     etype      = request.args.get("type")
     start      = request.args.get("start_date")
     end        = request.args.get("end_date")
+    fieldset   = fields.requested(Expense, Expense.expense_date)
 
-    q = Expense.query
+    q = Expense.query if fieldset else Expense.query.options(*Expense.eager_refs())
     if vehicle_id:
         q = q.filter_by(vehicle_id=vehicle_id)
     if etype:
@@ -175,9 +197,10 @@ def list_expenses():
         q = q.filter(Expense.expense_date >= date.fromisoformat(start))
     if end:
         q = q.filter(Expense.expense_date <= date.fromisoformat(end))
-    q = q.order_by(Expense.expense_date.desc())
-    items, meta = paginate(q, page)
-    return success([e.to_dict() for e in items], meta=meta)
+    if fieldset:
+        q = fieldset.select(q)
+    items, meta = list_page(q, (Expense.expense_date, Expense.id), page)
+    return success(fieldset.dump(items) if fieldset else [e.to_dict() for e in items], meta=meta)
 
 
 @expenses_bp.post("/")
@@ -205,5 +228,15 @@ def create_expense():
         logged_by            = get_jwt_identity(),
     )
     db.session.add(e)
+    rollup.record_expense(e)
+    if e.expense_type == "fuel" and e.fuel_liters:
+        fuel.refresh([e.vehicle_id])
     db.session.commit()
+    counters.expense_logged(e.expense_date, e.expense_type, e.amount)
+    events.publish("expense", {
+        "id": e.id, "vehicle_id": e.vehicle_id, "expense_type": e.expense_type,
+        "amount": float(e.amount), "expense_date": e.expense_date.isoformat(),
+    })
+    events.publish_kpis("financials")
+    reports.invalidate_summaries()
     return success(e.to_dict(), 201)
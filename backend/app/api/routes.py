@@ -0,0 +1,124 @@
+"""
+Route planning API: stored locations and multi-stop route optimization
+(app.services.routing). Distances come from the database only.
+"""
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+
+from app import db
+from app.models import Location, LocationDistance, Vehicle
+from app.services import routing
+from app.utils.helpers import success, error, require_role, paginate
+
+routes_bp = Blueprint("routes", __name__)
+
+
+def _coordinate(body, field, limit):
+    try:
+        value = float(body[field])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return value if -limit <= value <= limit else None
+
+
+@routes_bp.get("/locations")
+@jwt_required()
+def list_locations():
+    page     = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 50, type=int)
+    search   = routing.location_key(request.args.get("search"))
+
+    q = Location.query
+    if search:
+        q = q.filter(Location.key.like(f"{search}%"))
+    items, meta = paginate(q.order_by(Location.key), page, per_page)
+    return success([loc.to_dict() for loc in items], meta=meta)
+
+
+@routes_bp.post("/locations")
+@require_role("admin", "dispatcher")
+def upsert_location():
+    body = request.get_json(silent=True) or {}
+    name = body.get("name")
+    if not isinstance(name, str) or not routing.location_key(name):
+        return error("name is required.", 422)
+    key = routing.location_key(name)
+    latitude, longitude = _coordinate(body, "latitude", 90), _coordinate(body, "longitude", 180)
+    if latitude is None or longitude is None:
+        return error("latitude and longitude must be valid coordinates.", 422)
+
+    loc = Location.query.filter_by(key=key).first()
+    created = loc is None
+    if created:
+        loc = Location(key=key)
+        db.session.add(loc)
+    loc.name, loc.latitude, loc.longitude = name.strip(), latitude, longitude
+    db.session.commit()
+    return success(loc.to_dict(), 201 if created else 200)
+
+
+@routes_bp.put("/distances")
+@require_role("admin", "dispatcher")
+def set_distance():
+    """Store a known road distance between two locations: {from, to, distance_km}."""
+    body = request.get_json(silent=True) or {}
+    try:
+        distance_km = float(body.get("distance_km"))
+    except (TypeError, ValueError):
+        return error("distance_km must be a number.", 422)
+    if distance_km < 0:
+        return error("distance_km must not be negative.", 422)
+    if not isinstance(body.get("from"), str) or not isinstance(body.get("to"), str):
+        return error("from and to must be location names.", 422)
+    try:
+        known = routing.resolve([body.get("from"), body.get("to")])
+    except routing.UnknownLocations as e:
+        return error(str(e), 422, "UNKNOWN_LOCATION", details={"unknown": e.names})
+    a, b = known[routing.location_key(body["from"])], known[routing.location_key(body["to"])]
+    if a.id == b.id:
+        return error("from and to must be different locations.", 422)
+
+    from_id, to_id = sorted((a.id, b.id))
+    row = LocationDistance.query.get((from_id, to_id))
+    if row is None:
+        row = LocationDistance(from_id=from_id, to_id=to_id)
+        db.session.add(row)
+    row.distance_km = distance_km
+    db.session.commit()
+    return success({"from": a.name, "to": b.name, "distance_km": distance_km})
+
+
+@routes_bp.post("/optimize")
+@jwt_required()
+def optimize_route():
+    """
+    Order stops for a multi-stop run:
+    {origin, stops: [names], destination?, return_to_origin?, vehicle_id?}
+    """
+    body  = request.get_json(silent=True) or {}
+    stops = body.get("stops")
+    if not body.get("origin"):
+        return error("origin is required.", 422)
+    if not isinstance(body["origin"], str) or not isinstance(body.get("destination") or "", str):
+        return error("origin and destination must be location names.", 422)
+    if not isinstance(stops, list) or not all(isinstance(s, str) for s in stops):
+        return error("stops must be a list of location names.", 422)
+    if len(stops) > routing.MAX_STOPS:
+        return error(f"At most {routing.MAX_STOPS} stops per route.", 422)
+    if body.get("destination") and body.get("return_to_origin"):
+        return error("Give a destination or return_to_origin, not both.", 422)
+
+    vehicle = None
+    if body.get("vehicle_id"):
+        if not isinstance(body["vehicle_id"], str):
+            return error("Vehicle not found.", 404)
+        vehicle = Vehicle.query.options(db.joinedload(Vehicle.fuel_stats)).get(body["vehicle_id"])
+        if vehicle is None:
+            return error("Vehicle not found.", 404)
+
+    try:
+        result = routing.optimize(body["origin"], stops, body.get("destination"),
+                                  bool(body.get("return_to_origin")), vehicle)
+    except routing.UnknownLocations as e:
+        return error(str(e), 422, "UNKNOWN_LOCATION", details={"unknown": e.names})
+    return success(result)
@@ -0,0 +1,28 @@
+"""
+Unified search API: ranked fuzzy matches across trips, vehicles and
+drivers (app.services.search).
+"""
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+
+from app.services import search
+from app.utils.helpers import success, error
+
+search_bp = Blueprint("search", __name__)
+
+
+@search_bp.get("/")
+@jwt_required()
+def search_entities():
+    """?q=term&types=trips,vehicles,drivers&limit=10 → {type: [row + score]}, best match first."""
+    term  = (request.args.get("q") or "").strip()
+    limit = min(max(request.args.get("limit", 10, type=int), 1), search.MAX_LIMIT)
+    types = [t.strip() for t in request.args.get("types", "").split(",") if t.strip()] or list(search.ENTITIES)
+
+    if not search.searchable(term):
+        return error(f"q must contain at least {search.MIN_TERM} letters or digits.", 422)
+    unknown = [t for t in types if t not in search.ENTITIES]
+    if unknown:
+        return error(f"Unknown types: {', '.join(unknown)}", 422, details={"allowed": list(search.ENTITIES)})
+
+    return success(search.search_all(term, types, limit), meta={"q": term, "limit": limit})
@@ -0,0 +1,87 @@
+"""
+Server-Sent Events stream of live trip and KPI changes.
+EventSource cannot set headers, so the access token may also be passed
+as ?token=<jwt>.
+
+Every open stream holds one of the worker's threads for as long as the
+client stays connected. Past SSE_MAX_STREAMS per worker the stream is
+refused with 503 and Retry-After, and the dashboard polls until a
+reconnect succeeds, so streams cannot take every thread from the API.
+"""
+import json
+import queue
+import threading
+from flask import Blueprint, Response, stream_with_context, current_app
+from flask_jwt_extended import jwt_required
+
+from app.services import events, counters
+from app.utils.helpers import success, error, require_role
+
+stream_bp = Blueprint("stream", __name__)
+
+RETRY_AFTER_SECONDS = 30
+
+_open = {"streams": 0}
+_open_lock = threading.Lock()
+
+
+def _claim_stream(limit):
+    """Take one of this worker's stream slots; False when all are in use."""
+    with _open_lock:
+        if _open["streams"] >= limit:
+            return False
+        _open["streams"] += 1
+        return True
+
+
+def _release_stream():
+    with _open_lock:
+        _open["streams"] -= 1
+
+
+def _sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@stream_bp.get("/events")
+@jwt_required(locations=["headers", "query_string"])
+def event_stream():
+    heartbeat = current_app.config.get("SSE_HEARTBEAT_SECONDS", 15)
+    snapshot  = counters.read_kpis()
+    if not _claim_stream(current_app.config.get("SSE_MAX_STREAMS", 24)):
+        response, code = error("Too many live streams on this server; poll and retry later.",
+                               503, "STREAM_LIMIT")
+        response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+        return response, code
+    q = events.subscribe()
+
+    @stream_with_context
+    def generate():
+        yield f"retry: {heartbeat * 1000}\n\n"
+        if snapshot is not None:
+            yield _sse("kpis", snapshot)
+        while True:
+            try:
+                envelope = q.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            yield _sse(envelope["type"], envelope["data"])
+
+    def close():
+        events.unsubscribe(q)
+        _release_stream()
+
+    response = Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    # Runs when the server closes the response, even if the body was never iterated
+    response.call_on_close(close)
+    return response
+
+
+@stream_bp.get("/stats")
+@require_role("admin")
+def stream_stats():
+    return success(events.hub.stats())
@@ -1,13 +1,25 @@
-from datetime import datetime, timezone
-from flask import Blueprint, request
+from datetime import date, datetime, timezone
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from app import db
-from app.models import Trip, Vehicle, Driver
-from app.utils.helpers import success, error, require_role, paginate
+from app.models import Trip, TripStop, Vehicle, Driver
+from app.services import counters, dispatch, events, fuel, loadplan, reports, risk, rollup, routing
+from app.utils import fields, sql
+from app.utils.helpers import success, error, require_role, list_page
 
 trips_bp = Blueprint("trips", __name__)
 
+MAX_FUEL_ESTIMATES = 1000
+MAX_BATCH          = 500
+
+TRANSITIONS = {
+    "pending":    ("dispatched", "cancelled"),
+    "dispatched": ("in_transit", "completed", "cancelled"),
+    "in_transit": ("completed", "cancelled"),
+}
+ENDING_STATUSES = ("completed", "cancelled")
+
 
 def _validate_dispatch(vehicle: Vehicle, driver: Driver, cargo_kg: float):
     """Core dispatch validation. Returns list of validation errors."""
@@ -62,6 +74,207 @@ def _validate_dispatch(vehicle: Vehicle, driver: Driver, cargo_kg: float):
     return errors
 
 
+def _new_trip(vehicle, driver, cargo_kg, origin, destination, departure,
+              distance_km=None, fuel_cost=None, notes=None):
+    """A dispatched Trip; locks its vehicle and driver. The caller adds and commits."""
+    trip = Trip(
+        vehicle_id           = vehicle.id,
+        driver_id            = driver.id,
+        cargo_weight_kg      = cargo_kg,
+        origin               = origin,
+        destination          = destination,
+        scheduled_departure  = departure,
+        estimated_fuel_cost  = fuel_cost,
+        distance_km          = distance_km,
+        notes                = notes,
+        status               = "dispatched",
+        actual_departure     = datetime.now(timezone.utc),
+        created_by           = get_jwt_identity(),
+    )
+    vehicle.status      = "on_trip"
+    driver.duty_status  = "on_trip"
+    return trip
+
+
+def _lock_for_dispatch(vehicle_id, driver_id):
+    """
+    The vehicle and driver, re-read with row locks (SELECT ... FOR UPDATE)
+    for the rest of the transaction. Either is None when not found.
+    """
+    sql.set_lock_timeout(db.session, current_app.config["DISPATCH_LOCK_TIMEOUT_MS"])
+    # One SELECT with the fuel stats joined in; FOR UPDATE OF vehicles, as PostgreSQL
+    # will not lock the nullable side of the outer join
+    vehicle = Vehicle.query.options(db.joinedload(Vehicle.fuel_stats)).filter(
+        Vehicle.id == vehicle_id,
+    ).with_for_update(of=Vehicle).populate_existing().one_or_none()
+    driver  = db.session.get(Driver, driver_id, with_for_update=True, populate_existing=True)
+    return vehicle, driver
+
+
+def _announce_dispatch(trip, vehicle_status):
+    """Counters and live events for a committed dispatch."""
+    counters.trip_changed(None, "dispatched")
+    counters.vehicle_changed(vehicle_status, "on_trip")
+    events.publish_trip(trip)
+
+
+def _lock_many(items):
+    """
+    Vehicles and drivers named by `items` ({vehicle_id, driver_id}), keyed by
+    id and locked: vehicles, then drivers, each in id order, so overlapping
+    batches queue behind each other instead of deadlocking.
+    """
+    sql.set_lock_timeout(db.session, current_app.config["DISPATCH_LOCK_TIMEOUT_MS"])
+    # Fuel stats joined into the locked SELECT (FOR UPDATE OF vehicles, see _lock_for_dispatch)
+    vehicles = {v.id: v for v in Vehicle.query.options(db.joinedload(Vehicle.fuel_stats)).filter(
+        Vehicle.id.in_(_ids(items, "vehicle_id")),
+    ).order_by(Vehicle.id).with_for_update(of=Vehicle).populate_existing()}
+    drivers  = {d.id: d for d in Driver.query.filter(
+        Driver.id.in_(_ids(items, "driver_id")),
+    ).order_by(Driver.id).with_for_update().populate_existing()}
+    return vehicles, drivers
+
+
+def _ids(items, field):
+    return {item[field] for item in items if isinstance(item.get(field), str)}
+
+
+def _dispatch_many(items, vehicles, drivers):
+    """
+    Validate each item against the locked rows and build its trip. Returns
+    (created [(index, trip, vehicle_status)], problems [{index, code, message}]).
+    An item that fails leaves its vehicle and driver untouched; earlier items
+    have already marked theirs on_trip, so a vehicle or driver used twice
+    fails as VEHICLE_ON_TRIP / DRIVER_ON_TRIP.
+    """
+    created, problems = [], []
+    for index, item in enumerate(items):
+        missing = [f for f in ("vehicle_id", "driver_id", "cargo_weight_kg", "origin", "destination",
+                               "scheduled_departure") if not item.get(f)]
+        if missing:
+            problems.append({"index": index, "code": "MISSING_FIELDS",
+                             "message": f"Missing required fields: {', '.join(missing)}"})
+            continue
+        if not isinstance(item["origin"], str) or not isinstance(item["destination"], str):
+            problems.append({"index": index, "code": "INVALID_FIELDS",
+                             "message": "origin and destination must be strings."})
+            continue
+        if item.get("stops"):
+            problems.append({"index": index, "code": "STOPS_UNSUPPORTED",
+                             "message": "Create multi-stop trips with POST /trips/."})
+            continue
+        vehicle = vehicles.get(item["vehicle_id"]) if isinstance(item["vehicle_id"], str) else None
+        driver  = drivers.get(item["driver_id"]) if isinstance(item["driver_id"], str) else None
+        if vehicle is None or driver is None:
+            problems.append({"index": index, "code": "NOT_FOUND",
+                             "message": "Vehicle not found." if vehicle is None else "Driver not found."})
+            continue
+        try:
+            cargo_kg    = float(item["cargo_weight_kg"])
+            distance_km = float(item["distance_km"]) if item.get("distance_km") else None
+            client_cost = float(item["estimated_fuel_cost"]) if item.get("estimated_fuel_cost") else None
+            departure   = item["scheduled_departure"]
+            if not isinstance(departure, datetime):
+                departure = datetime.fromisoformat(departure)
+        except (TypeError, ValueError):
+            problems.append({"index": index, "code": "INVALID_FIELDS",
+                             "message": "cargo_weight_kg, distance_km and estimated_fuel_cost must be numbers "
+                                        "and scheduled_departure an ISO datetime."})
+            continue
+        failures = _validate_dispatch(vehicle, driver, cargo_kg)
+        if failures:
+            problems += [{"index": index, **f} for f in failures]
+            continue
+        vehicle_status = vehicle.status
+        trip = _new_trip(
+            vehicle, driver, cargo_kg, item["origin"], item["destination"], departure,
+            distance_km=distance_km,
+            fuel_cost=fuel.estimate(vehicle, distance_km)["estimated_fuel_cost"] if distance_km else client_cost,
+            notes=item.get("notes"),
+        )
+        created.append((index, trip, vehicle_status))
+    return created, problems
+
+
+def _commit_dispatches(created):
+    """Insert and commit the trips from _dispatch_many, then announce them."""
+    db.session.add_all([trip for _, trip, _ in created])
+    db.session.flush()
+    ids = [trip.id for _, trip, _ in created]
+    db.session.commit()
+    # Reload the expired trips with their vehicle/driver in one query instead of one refresh per trip
+    Trip.query.options(*Trip.eager_refs()).filter(Trip.id.in_(ids)).all()
+
+    for _, trip, vehicle_status in created:
+        _announce_dispatch(trip, vehicle_status)
+    reports.invalidate_summaries()
+    events.publish_kpis("fleet", "trips")
+
+
+def _transition(trip, item, vehicle, driver):
+    """
+    Move a locked trip to item["status"]. Completing or cancelling it frees
+    its (locked) vehicle and driver and adds to the driver's totals. Returns
+    a change record for _commit_transitions, or {code, message} when the
+    transition is not allowed. Nothing is changed on failure.
+    """
+    new_status = item.get("status")
+    if new_status not in TRANSITIONS.get(trip.status, ()):
+        return {"code": "INVALID_TRANSITION", "message": f"Cannot transition from '{trip.status}' to '{new_status}'."}
+    try:
+        final_odometer = float(item["final_odometer"]) if item.get("final_odometer") else None
+        actual_cost    = float(item["actual_fuel_cost"]) if item.get("actual_fuel_cost") else None
+    except (TypeError, ValueError):
+        return {"code": "INVALID_FIELDS", "message": "final_odometer and actual_fuel_cost must be numbers."}
+
+    change = {"trip": trip, "old_status": trip.status, "status": new_status, "vehicle": None,
+              "odometer_changed": False}
+    trip.status = new_status
+    if new_status in ENDING_STATUSES:
+        trip.actual_arrival = datetime.now(timezone.utc)
+        if vehicle:
+            was_due = counters.is_service_due(vehicle.odometer_km, vehicle.next_service_km)
+            change["vehicle"] = (vehicle, vehicle.status, was_due)
+            vehicle.status = "available"
+            if final_odometer:
+                vehicle.odometer_km = final_odometer
+                change["odometer_changed"] = True
+        if driver:
+            driver.duty_status  = "available"
+            driver.total_trips += 1
+            if trip.distance_km:
+                driver.total_km_driven = float(driver.total_km_driven) + float(trip.distance_km)
+        if actual_cost:
+            trip.actual_fuel_cost = actual_cost
+    return change
+
+
+def _commit_transitions(changes):
+    """Derived tables for the applied transitions, one commit, then counters and events."""
+    completed = [c["trip"] for c in changes if c["status"] == "completed"]
+    rollup.record_trips(completed)
+    risk_ids = list({c["trip"].vehicle_id for c in changes if c["odometer_changed"]})
+    fuel_ids = list({t.vehicle_id for t in completed if t.distance_km})
+    if risk_ids:
+        risk.refresh(risk_ids)
+    if fuel_ids:
+        fuel.refresh(fuel_ids)
+    arrivals = [c["trip"].actual_arrival for c in changes]
+    # Service-due is judged on each vehicle's final odometer
+    dues = [counters.is_service_due(c["vehicle"][0].odometer_km, c["vehicle"][0].next_service_km)
+            if c["vehicle"] else None for c in changes]
+    db.session.commit()
+
+    for c, arrived_at, is_due in zip(changes, arrivals, dues):
+        counters.trip_changed(c["old_status"], c["status"], arrived_at)
+        if c["vehicle"]:
+            _, vehicle_status, was_due = c["vehicle"]
+            counters.vehicle_changed(vehicle_status, "available", was_due, is_due)
+        events.publish_trip(c["trip"], c["old_status"])
+    reports.invalidate_summaries()
+    events.publish_kpis("fleet", "alerts", "trips")
+
+
 @trips_bp.get("/")
 @jwt_required()
 def list_trips():
@@ -69,8 +282,9 @@ def list_trips():
     per_page = request.args.get("per_page", 20, type=int)
     status   = request.args.get("status")
     search   = request.args.get("search", "").strip()
+    fieldset = fields.requested(Trip, Trip.created_at)
 
-    q = Trip.query
+    q = Trip.query if fieldset else Trip.query.options(*Trip.eager_refs())
     if status and status != "all":
         q = q.filter_by(status=status)
     if search:
@@ -80,9 +294,10 @@ def list_trips():
                 Trip.destination.ilike(f"%{search}%"),
             )
         )
-    q = q.order_by(Trip.created_at.desc())
-    items, meta = paginate(q, page, per_page)
-    return success([t.to_dict() for t in items], meta=meta)
+    if fieldset:
+        q = fieldset.select(q)
+    items, meta = list_page(q, (Trip.created_at, Trip.id), page, per_page)
+    return success(fieldset.dump(items) if fieldset else [t.to_dict() for t in items], meta=meta)
 
 
 @trips_bp.post("/")
@@ -94,9 +309,25 @@ def create_trip():
     missing  = [f for f in required if not body.get(f)]
     if missing:
         return error(f"Missing required fields: {', '.join(missing)}", 422)
+    if not isinstance(body["origin"], str) or not isinstance(body["destination"], str):
+        return error("origin and destination must be location names.", 422)
 
-    vehicle = Vehicle.query.get(body["vehicle_id"])
-    driver  = Driver.query.get(body["driver_id"])
+    # Multi-stop trips: the server orders the stops and measures the route,
+    # before any row is locked
+    route, stops = None, body.get("stops")
+    if stops:
+        if not isinstance(stops, list) or not all(isinstance(s, str) for s in stops):
+            return error("stops must be a list of location names.", 422)
+        if len(stops) > routing.MAX_STOPS:
+            return error(f"At most {routing.MAX_STOPS} stops per trip.", 422)
+        try:
+            route = routing.optimize(body["origin"], stops, body["destination"])
+        except routing.UnknownLocations as e:
+            return error(str(e), 422, "UNKNOWN_LOCATION", details={"unknown": e.names})
+
+    # Lock the vehicle, then the driver (the order every dispatch path uses), so a
+    # concurrent dispatch of either waits here and then sees the committed status
+    vehicle, driver = _lock_for_dispatch(body["vehicle_id"], body["driver_id"])
     if not vehicle:
         return error("Vehicle not found.", 404)
     if not driver:
@@ -113,75 +344,292 @@ def create_trip():
             error("Multiple validation errors.", 422)
         )[1]
 
-    trip = Trip(
-        vehicle_id           = vehicle.id,
-        driver_id            = driver.id,
-        cargo_weight_kg      = cargo_kg,
-        origin               = body["origin"],
-        destination          = body["destination"],
-        scheduled_departure  = datetime.fromisoformat(body["scheduled_departure"]),
-        estimated_fuel_cost  = float(body["estimated_fuel_cost"]) if body.get("estimated_fuel_cost") else None,
-        distance_km          = float(body["distance_km"]) if body.get("distance_km") else None,
-        notes                = body.get("notes"),
-        status               = "dispatched",
-        actual_departure     = datetime.now(timezone.utc),
-        created_by           = get_jwt_identity(),
-    )
-
-    # Lock vehicle and driver
-    vehicle.status      = "on_trip"
-    driver.duty_status  = "on_trip"
+    # Server-side estimate whenever the distance is known; the client's figure is only a fallback
+    distance_km = route["distance_km"] if route else (float(body["distance_km"]) if body.get("distance_km") else None)
+    estimate    = fuel.estimate(vehicle, distance_km) if distance_km else None
+    if estimate:
+        fuel_cost = estimate["estimated_fuel_cost"]
+    else:
+        fuel_cost = float(body["estimated_fuel_cost"]) if body.get("estimated_fuel_cost") else None
 
+    vehicle_status = vehicle.status
+    trip = _new_trip(
+        vehicle, driver, cargo_kg, body["origin"], body["destination"],
+        datetime.fromisoformat(body["scheduled_departure"]),
+        distance_km=distance_km, fuel_cost=fuel_cost, notes=body.get("notes"),
+    )
+    if route:
+        trip.stops = [TripStop(sequence=r["sequence"], location_id=r["location_id"], name=r["name"],
+                               leg_km=r["leg_km"]) for r in route["route"]]
     db.session.add(trip)
     db.session.commit()
 
+    _announce_dispatch(trip, vehicle_status)
+    reports.invalidate_summaries()
+    events.publish_kpis("fleet", "trips")
+
     return success({
-        "trip": trip.to_dict(),
+        "trip": {**trip.to_dict(), "stops": route["route"] if route else []},
+        "route": {k: route[k] for k in ("stops", "distance_km", "input_order_km")} if route else None,
         "validation": {"weight_ok": True, "license_ok": True, "vehicle_ok": True},
+        "fuel_estimate": estimate,
     }, 201)
 
 
-@trips_bp.patch("/<trip_id>/status")
+@trips_bp.get("/recommendations")
 @require_role("admin", "dispatcher")
-def update_status(trip_id):
-    trip    = Trip.query.get_or_404(trip_id)
+def recommend_dispatch():
+    """
+    Ranked vehicle/driver pairs for a load:
+    ?cargo_weight_kg=&origin=&departure=<ISO date or datetime>&limit=
+    """
+    cargo_kg = request.args.get("cargo_weight_kg", type=float)
+    if cargo_kg is None or cargo_kg <= 0:
+        return error("cargo_weight_kg must be a positive number.", 422)
+    limit = request.args.get("limit", 5, type=int)
+    if not 1 <= limit <= dispatch.MAX_RESULTS:
+        return error(f"limit must be between 1 and {dispatch.MAX_RESULTS}.", 422)
+    departure = request.args.get("departure")
+    try:
+        departure = datetime.fromisoformat(departure).date() if departure else date.today()
+    except ValueError:
+        return error("departure must be an ISO date or datetime.", 422)
+
+    result = dispatch.recommend(cargo_kg, request.args.get("origin"), departure, limit)
+    return success({"cargo_weight_kg": cargo_kg, "departure": departure.isoformat(), **result})
+
+
+@trips_bp.post("/fuel-estimates")
+@jwt_required()
+def estimate_fuel_costs():
+    """
+    Fuel-cost estimates for candidate trips:
+    {"trips": [{"vehicle_id": ..., "distance_km": ...}, ...]}.
+    One query loads every vehicle with its fuel stats; items that cannot be
+    estimated carry an error instead of failing the batch.
+    """
+    body  = request.get_json(silent=True) or {}
+    items = body.get("trips")
+    if not isinstance(items, list) or not items:
+        return error("trips must be a non-empty list.", 422)
+    if len(items) > MAX_FUEL_ESTIMATES:
+        return error(f"At most {MAX_FUEL_ESTIMATES} trips per request.", 422)
+
+    ids = _ids([item for item in items if isinstance(item, dict)], "vehicle_id")
+    vehicles = {v.id: v for v in Vehicle.query.options(db.joinedload(Vehicle.fuel_stats))
+                                              .filter(Vehicle.id.in_(ids))} if ids else {}
+
+    results, total = [], 0.0
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "error": "Each trip must be an object."})
+            continue
+        vehicle_id = item.get("vehicle_id")
+        try:
+            distance_km = float(item.get("distance_km"))
+        except (TypeError, ValueError):
+            distance_km = None
+        if vehicle_id is not None and not isinstance(vehicle_id, str):
+            results.append({"index": index, "error": "vehicle_id must be a string."})
+        elif vehicle_id not in vehicles:
+            results.append({"index": index, "vehicle_id": vehicle_id, "error": "Vehicle not found."})
+        elif distance_km is None or distance_km <= 0:
+            results.append({"index": index, "vehicle_id": vehicle_id,
+                            "error": "distance_km must be a positive number."})
+        else:
+            estimate = fuel.estimate(vehicles[vehicle_id], distance_km)
+            total += estimate["estimated_fuel_cost"]
+            results.append({"index": index, "vehicle_id": vehicle_id, "distance_km": distance_km, **estimate})
+
+    return success({"estimates": results, "total_estimated_fuel_cost": round(total, 2)})
+
+
+@trips_bp.post("/load-plan")
+@require_role("admin", "dispatcher")
+def plan_loads():
+    """
+    Pack consignments onto the available fleet:
+    {"consignments": [{"ref", "weight_kg", "origin", "destination"}, ...],
+     "scheduled_departure": <ISO>}. Nothing is written; commit the returned
+    trips with POST /trips/load-plan/commit.
+    """
+    body  = request.get_json(silent=True) or {}
+    items = body.get("consignments")
+    if not isinstance(items, list) or not items:
+        return error("consignments must be a non-empty list.", 422)
+    if len(items) > loadplan.MAX_CONSIGNMENTS:
+        return error(f"At most {loadplan.MAX_CONSIGNMENTS} consignments per plan.", 422)
+
+    consignments, problems = [], []
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        try:
+            weight = float(item.get("weight_kg"))
+        except (TypeError, ValueError):
+            weight = 0.0
+        origin, destination = item.get("origin"), item.get("destination")
+        if (weight <= 0 or not isinstance(origin, str) or not origin.strip()
+                or not isinstance(destination, str) or not destination.strip()):
+            problems.append({"index": index,
+                             "message": "weight_kg (> 0), origin and destination (strings) are required."})
+            continue
+        consignments.append({
+            "ref": item.get("ref", index), "weight_kg": weight,
+            "origin": origin.strip(), "destination": destination.strip(),
+        })
+    if problems:
+        return error("Invalid consignments.", 422, details=problems)
+
+    try:
+        departure = datetime.fromisoformat(body["scheduled_departure"]) if body.get("scheduled_departure") else None
+    except (TypeError, ValueError):
+        return error("scheduled_departure must be an ISO datetime.", 422)
+    return success(loadplan.plan(consignments, departure.date() if departure else None))
+
+
+@trips_bp.post("/load-plan/commit")
+@require_role("admin", "dispatcher")
+def commit_load_plan():
+    """
+    Create the trips of a load plan in one transaction:
+    {"trips": [{"vehicle_id", "driver_id", "cargo_weight_kg", "origin",
+    "destination", "consignments"?, "distance_km"?}, ...], "scheduled_departure"}.
+    Vehicles and drivers are locked and every trip is re-validated; if any
+    trip fails, nothing is created and the response lists the failures.
+    """
     body    = request.get_json(silent=True) or {}
-    new_status = body.get("status")
+    planned = body.get("trips")
+    if not isinstance(planned, list) or not planned:
+        return error("trips must be a non-empty list.", 422)
+    if not body.get("scheduled_departure"):
+        return error("Missing required fields: scheduled_departure", 422)
+    try:
+        departure = datetime.fromisoformat(body["scheduled_departure"])
+    except (TypeError, ValueError):
+        return error("scheduled_departure must be an ISO datetime.", 422)
 
-    valid_transitions = {
-        "pending":    ["dispatched", "cancelled"],
-        "dispatched": ["in_transit", "completed", "cancelled"],
-        "in_transit": ["completed", "cancelled"],
-    }
-    if trip.status not in valid_transitions or new_status not in valid_transitions.get(trip.status, []):
-        return error(f"Cannot transition from '{trip.status}' to '{new_status}'.", 422)
+    items = []
+    for p in planned:
+        p = p if isinstance(p, dict) else {}
+        refs = p.get("consignments") if isinstance(p.get("consignments"), list) else []
+        items.append({**p, "scheduled_departure": departure,
+                      "notes": f"Load plan consignments: {', '.join(map(str, refs))}" if refs else None})
+    vehicles, drivers = _lock_many(items)
+    created, problems = _dispatch_many(items, vehicles, drivers)
+    if problems:
+        db.session.rollback()
+        return error("Load plan can no longer be dispatched as proposed.", 409, "PLAN_CONFLICT", details=problems)
 
-    trip.status = new_status
+    _commit_dispatches(created)
+    return success({"trips": [trip.to_dict() for _, trip, _ in created], "count": len(created)}, 201)
 
-    if new_status in ("completed", "cancelled"):
-        trip.actual_arrival = datetime.now(timezone.utc)
-        # Unlock vehicle and driver
-        vehicle = Vehicle.query.get(trip.vehicle_id)
-        driver  = Driver.query.get(trip.driver_id)
-        if vehicle:
-            vehicle.status = "available"
-            if body.get("final_odometer"):
-                vehicle.odometer_km = float(body["final_odometer"])
-        if driver:
-            driver.duty_status  = "available"
-            driver.total_trips += 1
-            if trip.distance_km:
-                driver.total_km_driven = float(driver.total_km_driven) + float(trip.distance_km)
 
-        if body.get("actual_fuel_cost"):
-            trip.actual_fuel_cost = float(body["actual_fuel_cost"])
+@trips_bp.post("/batch")
+@require_role("admin", "dispatcher")
+def create_trips_batch():
+    """
+    Dispatch many trips in one transaction:
+    {"trips": [{"vehicle_id", "driver_id", "cargo_weight_kg", "origin",
+    "destination", "scheduled_departure", "distance_km"?,
+    "estimated_fuel_cost"?, "notes"?}, ...]}. Valid trips are created and
+    invalid ones are reported by index. Multi-stop trips go through POST /trips/.
+    """
+    body  = request.get_json(silent=True) or {}
+    items = body.get("trips")
+    if not isinstance(items, list) or not items:
+        return error("trips must be a non-empty list.", 422)
+    if len(items) > MAX_BATCH:
+        return error(f"At most {MAX_BATCH} trips per batch.", 422)
 
-    db.session.commit()
+    items = [item if isinstance(item, dict) else {} for item in items]
+    vehicles, drivers = _lock_many(items)
+    created, problems = _dispatch_many(items, vehicles, drivers)
+    if not created:
+        db.session.rollback()
+        return error("No trips could be dispatched.", 422, details=problems)
+
+    _commit_dispatches(created)
+    return success({
+        "trips": [{"index": index, **trip.to_dict()} for index, trip, _ in created],
+        "created": len(created),
+        "failed": problems,
+    }, 201)
+
+
+@trips_bp.patch("/batch/status")
+@require_role("admin", "dispatcher")
+def update_status_batch():
+    """
+    Apply many status transitions in one transaction:
+    {"transitions": [{"trip_id", "status", "final_odometer"?,
+    "actual_fuel_cost"?}, ...]}. Transitions run in order, so one trip may
+    appear more than once (dispatched -> in_transit -> completed). Invalid
+    transitions are reported by index and the rest are applied.
+    """
+    body  = request.get_json(silent=True) or {}
+    items = body.get("transitions")
+    if not isinstance(items, list) or not items:
+        return error("transitions must be a non-empty list.", 422)
+    if len(items) > MAX_BATCH:
+        return error(f"At most {MAX_BATCH} transitions per batch.", 422)
+    items = [item if isinstance(item, dict) else {} for item in items]
+
+    # Lock trips, then their vehicles and drivers, each in id order
+    sql.set_lock_timeout(db.session, current_app.config["DISPATCH_LOCK_TIMEOUT_MS"])
+    trips = {t.id: t for t in Trip.query.filter(
+        Trip.id.in_(_ids(items, "trip_id")),
+    ).order_by(Trip.id).with_for_update().populate_existing()}
+    ending = [t for t in trips.values() if t.status in TRANSITIONS]
+    vehicles, drivers = _lock_many([{"vehicle_id": t.vehicle_id, "driver_id": t.driver_id} for t in ending])
+
+    changes, problems = [], []
+    for index, item in enumerate(items):
+        trip = trips.get(item.get("trip_id")) if isinstance(item.get("trip_id"), str) else None
+        if trip is None:
+            problems.append({"index": index, "trip_id": item.get("trip_id"), "code": "NOT_FOUND",
+                             "message": "Trip not found."})
+            continue
+        change = _transition(trip, item, vehicles.get(trip.vehicle_id), drivers.get(trip.driver_id))
+        if "code" in change:
+            problems.append({"index": index, "trip_id": trip.id, **change})
+        else:
+            changes.append((index, change))
+    if not changes:
+        db.session.rollback()
+        return error("No transitions could be applied.", 422, details=problems)
+
+    _commit_transitions([change for _, change in changes])
+    Trip.query.options(*Trip.eager_refs()).filter(Trip.id.in_({c["trip"].id for _, c in changes})).all()
+    return success({
+        "trips": [{"index": index, **change["trip"].to_dict()} for index, change in changes],
+        "updated": len(changes),
+        "failed": problems,
+    })
+
+
+@trips_bp.patch("/<trip_id>/status")
+@require_role("admin", "dispatcher")
+def update_status(trip_id):
+    # The trip row lock serializes concurrent transitions of one trip
+    sql.set_lock_timeout(db.session, current_app.config["DISPATCH_LOCK_TIMEOUT_MS"])
+    trip    = db.session.get(Trip, trip_id, with_for_update=True, populate_existing=True)
+    if trip is None:
+        return error("Trip not found.", 404)
+    body    = request.get_json(silent=True) or {}
+
+    vehicle = driver = None
+    if body.get("status") in ENDING_STATUSES:
+        vehicle, driver = _lock_for_dispatch(trip.vehicle_id, trip.driver_id)
+    change = _transition(trip, body, vehicle, driver)
+    if "code" in change:
+        return error(change["message"], 422)
+
+    _commit_transitions([change])
     return success(trip.to_dict())
 
 
 @trips_bp.get("/<trip_id>")
 @jwt_required()
 def get_trip(trip_id):
-    trip = Trip.query.get_or_404(trip_id)
-    return success(trip.to_dict())
+    trip = Trip.query.options(*Trip.eager_refs(), db.selectinload(Trip.stops)).get_or_404(trip_id)
+    return success({**trip.to_dict(), "stops": [s.to_dict() for s in trip.stops]})
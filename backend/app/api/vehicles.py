@@ -1,9 +1,12 @@
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timezone
 
 from app import db
-from app.models import Vehicle
-from app.utils.helpers import success, error, require_role, paginate
+from app.models import Vehicle, Trip
+from app.services import counters, events, risk
+from app.utils.helpers import success, error, require_role, list_page
+from app.utils import fields
 
 vehicles_bp = Blueprint("vehicles", __name__)
 
@@ -16,6 +19,7 @@ def list_vehicles():
     status   = request.args.get("status")
     search   = request.args.get("search", "").strip()
     vtype    = request.args.get("type")
+    fieldset = fields.requested(Vehicle, Vehicle.created_at)
 
     q = Vehicle.query
     if status and status != "all":
@@ -30,9 +34,10 @@ def list_vehicles():
                 Vehicle.model.ilike(f"%{search}%"),
             )
         )
-    q = q.order_by(Vehicle.created_at.desc())
-    items, meta = paginate(q, page, per_page)
-    return success([v.to_dict() for v in items], meta=meta)
+    if fieldset:
+        q = fieldset.select(q)
+    items, meta = list_page(q, (Vehicle.created_at, Vehicle.id), page, per_page)
+    return success(fieldset.dump(items) if fieldset else [v.to_dict() for v in items], meta=meta)
 
 
 @vehicles_bp.post("/")
@@ -64,6 +69,8 @@ def create_vehicle():
     )
     db.session.add(v)
     db.session.commit()
+    counters.vehicle_changed(None, "available", is_due=counters.is_service_due(v.odometer_km, v.next_service_km))
+    events.publish("vehicle", {"id": v.id, "status": v.status})
     return success(v.to_dict(), 201)
 
 
@@ -73,7 +80,9 @@ def get_vehicle(vehicle_id):
     v = Vehicle.query.get_or_404(vehicle_id)
     data = v.to_dict()
     data["maintenance_history"] = [m.to_dict() for m in v.maintenance.order_by(db.desc("service_date")).limit(10)]
-    data["recent_trips"] = [t.to_dict() for t in v.trips.order_by(db.desc("created_at")).limit(5)]
+    # Trip.vehicle / MaintenanceLog.vehicle resolve from the identity map; only drivers need loading
+    data["recent_trips"] = [t.to_dict() for t in v.trips.options(db.joinedload(Trip.driver))
+                            .order_by(db.desc("created_at")).limit(5)]
     return success(data)
 
 
@@ -83,13 +92,23 @@ def update_vehicle(vehicle_id):
     v    = Vehicle.query.get_or_404(vehicle_id)
     body = request.get_json(silent=True) or {}
 
+    old_status = v.status
+    was_due    = counters.is_service_due(v.odometer_km, v.next_service_km)
+
     allowed = ["make", "model", "type", "capacity_kg", "odometer_km",
                "fuel_efficiency_kmpl", "last_service_date", "next_service_km", "status"]
     for field in allowed:
         if field in body:
             setattr(v, field, body[field])
 
+    new_status = v.status
+    if new_status != old_status:
+        v.retired_at = datetime.now(timezone.utc) if new_status == "retired" else None
+    is_due     = counters.is_service_due(v.odometer_km, v.next_service_km)
+    risk.refresh([v.id])
     db.session.commit()
+    counters.vehicle_changed(old_status, new_status, was_due, is_due)
+    events.publish("vehicle", {"id": v.id, "status": new_status, "old_status": old_status})
     return success(v.to_dict())
 
 
@@ -99,6 +118,11 @@ def delete_vehicle(vehicle_id):
     v = Vehicle.query.get_or_404(vehicle_id)
     if v.trips.filter(Vehicle.status.in_(["dispatched", "in_transit"])).count():
         return error("Cannot retire vehicle with active trips.", 409)
+    old_status = v.status
     v.status = "retired"
+    if old_status != "retired":
+        v.retired_at = datetime.now(timezone.utc)
     db.session.commit()
+    counters.vehicle_changed(old_status, "retired")
+    events.publish("vehicle", {"id": v.id, "status": "retired", "old_status": old_status})
     return success({"message": "Vehicle retired successfully."})
@@ -20,14 +20,52 @@ class Config:
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_HEADER_NAME = "Authorization"
     JWT_HEADER_TYPE = "Bearer"
+    JWT_QUERY_STRING_NAME = "token"  # only accepted by the SSE stream
 
     REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+    REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_SOCKET_TIMEOUT  = 0.5
     CELERY_BROKER_URL = REDIS_URL
     CELERY_RESULT_BACKEND = REDIS_URL
 
     CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:3000").split(",")
     RATELIMIT_STORAGE_URI = REDIS_URL
 
+    JSON_BACKEND = os.environ.get("JSON_BACKEND", "orjson")  # "orjson" (falls back if not installed) or "stdlib"
+
+    EVENTS_BROKER = os.environ.get("EVENTS_BROKER", "redis")  # "redis" or "local" (single process)
+    SSE_HEARTBEAT_SECONDS = 15
+    # Open streams per worker process. Each holds a gthread thread, so keep this below
+    # gunicorn's --threads; further clients get 503 and poll until they reconnect.
+    SSE_MAX_STREAMS = int(os.environ.get("SSE_MAX_STREAMS", 24))
+
+    # Estimated revenue per completed km, used by the ROI analytics.
+    REVENUE_PER_KM_DEFAULT = float(os.environ.get("REVENUE_PER_KM_DEFAULT", 45))
+    REVENUE_PER_KM = {"truck": 45, "mini": 45, "van": 45, "tanker": 45}
+
+    # Trip fuel-cost estimate fallbacks, used until a vehicle has observed
+    # efficiency (and no rated fuel_efficiency_kmpl) or the fleet has logged prices
+    FUEL_KM_PER_LITER = {"truck": 4.5, "mini": 12.0, "van": 9.0, "tanker": 3.5}
+    FUEL_KM_PER_LITER_DEFAULT = 6.0
+    FUEL_PRICE_PER_LITER_DEFAULT = float(os.environ.get("FUEL_PRICE_PER_LITER_DEFAULT", 95))
+
+    # How long a dispatch waits for a locked vehicle/driver row before
+    # answering 409 WRITE_CONFLICT (PostgreSQL only)
+    DISPATCH_LOCK_TIMEOUT_MS = int(os.environ.get("DISPATCH_LOCK_TIMEOUT_MS", 3000))
+
+    # Available vehicles with no trip for this many days are flagged as dead assets
+    DEAD_ASSET_IDLE_DAYS = int(os.environ.get("DEAD_ASSET_IDLE_DAYS", 14))
+
+    # Maintenance-risk model registry (see train_risk_model.py)
+    MODEL_REGISTRY_DIR = os.environ.get(
+        "MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "model_registry")
+    )
+    RISK_MODEL_VERSION = os.environ.get("RISK_MODEL_VERSION")  # default: the registry's LATEST
+    RISK_MODEL_ENABLED = os.environ.get("RISK_MODEL_ENABLED", "1") == "1"
+
+    # Build each web worker's autocomplete index at startup (run.py) rather than on the first lookup
+    AUTOCOMPLETE_WARM = os.environ.get("AUTOCOMPLETE_WARM", "1") == "1"
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -45,6 +83,10 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    EVENTS_BROKER = "local"
+    RISK_MODEL_ENABLED = False
+    AUTOCOMPLETE_WARM = False   # tables do not exist until the caller runs create_all()
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
 
 
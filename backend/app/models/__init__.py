@@ -1,5 +1,9 @@
 import uuid
+from collections import namedtuple
 from datetime import date
+
+from sqlalchemy import DDL, event
+
 from app import db
 
 
@@ -7,6 +11,62 @@ def gen_uuid():
     return str(uuid.uuid4())
 
 
+# ─── SERIALIZATION ────────────────────────────────────────────────────────────
+
+Field = namedtuple("Field", "path convert", defaults=(None, None))
+
+
+def iso(value):
+    return value.isoformat() if value else None
+
+
+def float_or_none(value):
+    return float(value) if value else None
+
+
+def days_until(day):
+    return (day - date.today()).days
+
+
+def compile_to_dict(fields):
+    """
+    to_dict() for a {name: Field(path, convert)} spec, generated once as a
+    single dict literal so it runs like a hand-written one. A path through
+    a relationship ("vehicle.registration_number") gives None when the
+    related row is missing.
+    """
+    env, items = {}, []
+    for n, (name, f) in enumerate(fields.items()):
+        head, _, attr = (f.path or name).rpartition(".")
+        value = f"(self.{head}.{attr} if self.{head} is not None else None)" if head else f"self.{attr}"
+        if f.convert is not None:
+            env[f"convert{n}"] = f.convert
+            value = f"convert{n}({value})"
+        items.append(f"{name!r}: {value}")
+    exec("def to_dict(self):\n    return {" + ", ".join(items) + "}", env)
+    return env["to_dict"]
+
+
+class Serialized:
+    """Mixin: builds to_dict() from the class's FIELDS spec (also used by app.utils.fields)."""
+
+    FIELDS = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.to_dict = compile_to_dict(cls.FIELDS)
+
+
+def trigram_index(name, column):
+    """GIN pg_trgm index serving ILIKE and fuzzy search (app.services.search); PostgreSQL only."""
+    return db.Index(name, column, postgresql_using="gin",
+                    postgresql_ops={column: "gin_trgm_ops"}).ddl_if(dialect="postgresql")
+
+
+event.listen(db.metadata, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+
 # ─── USER ─────────────────────────────────────────────────────────────────────
 
 class User(db.Model):
@@ -33,7 +93,7 @@ class User(db.Model):
 
 # ─── VEHICLE ──────────────────────────────────────────────────────────────────
 
-class Vehicle(db.Model):
+class Vehicle(Serialized, db.Model):
     __tablename__ = "vehicles"
 
     id                   = db.Column(db.String(36),  primary_key=True, default=gen_uuid)
@@ -47,32 +107,46 @@ class Vehicle(db.Model):
     fuel_efficiency_kmpl = db.Column(db.Numeric(5,2))
     last_service_date    = db.Column(db.Date)
     next_service_km      = db.Column(db.Numeric(12,2))
+    retired_at           = db.Column(db.DateTime(timezone=True))   # set when status becomes retired
+    version              = db.Column(db.Integer, nullable=False, default=1)
     created_by           = db.Column(db.String(36), db.ForeignKey("users.id", ondelete="SET NULL"))
     created_at           = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     updated_at           = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
 
+    # Every ORM UPDATE checks and bumps version; a write based on a stale read raises StaleDataError
+    __mapper_args__ = {"version_id_col": version}
+    # Keyset pagination of the vehicle list (created_at DESC, id DESC)
+    __table_args__  = (
+        db.Index("idx_vehicles_created_id", "created_at", "id"),
+        trigram_index("idx_vehicles_reg_trgm",   "registration_number"),
+        trigram_index("idx_vehicles_make_trgm",  "make"),
+        trigram_index("idx_vehicles_model_trgm", "model"),
+    )
+
     trips        = db.relationship("Trip",           backref="vehicle", lazy="dynamic")
     maintenance  = db.relationship("MaintenanceLog", backref="vehicle", lazy="dynamic")
     expenses     = db.relationship("Expense",        backref="vehicle", lazy="dynamic")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "registration_number": self.registration_number,
-            "make": self.make, "model": self.model, "type": self.type,
-            "capacity_kg": float(self.capacity_kg),
-            "odometer_km": float(self.odometer_km),
-            "status": self.status,
-            "fuel_efficiency_kmpl": float(self.fuel_efficiency_kmpl) if self.fuel_efficiency_kmpl else None,
-            "last_service_date": self.last_service_date.isoformat() if self.last_service_date else None,
-            "next_service_km": float(self.next_service_km) if self.next_service_km else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+    FIELDS = {
+        "id":                   Field(),
+        "registration_number":  Field(),
+        "make":                 Field(),
+        "model":                Field(),
+        "type":                 Field(),
+        "capacity_kg":          Field(convert=float),
+        "odometer_km":          Field(convert=float),
+        "status":               Field(),
+        "fuel_efficiency_kmpl": Field(convert=float_or_none),
+        "last_service_date":    Field(convert=iso),
+        "next_service_km":      Field(convert=float_or_none),
+        "version":              Field(),
+        "created_at":           Field(convert=iso),
+    }
 
 
 # ─── DRIVER ───────────────────────────────────────────────────────────────────
 
-class Driver(db.Model):
+class Driver(Serialized, db.Model):
     __tablename__ = "drivers"
 
     id              = db.Column(db.String(36), primary_key=True, default=gen_uuid)
@@ -86,35 +160,44 @@ class Driver(db.Model):
     total_trips     = db.Column(db.Integer,      nullable=False, default=0)
     total_km_driven = db.Column(db.Numeric(12,2), nullable=False, default=0)
     incidents_count = db.Column(db.Integer,      nullable=False, default=0)
+    version         = db.Column(db.Integer,      nullable=False, default=1)
     created_by      = db.Column(db.String(36), db.ForeignKey("users.id", ondelete="SET NULL"))
     created_at      = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     updated_at      = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
 
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__  = (
+        db.Index("idx_drivers_created_id", "created_at", "id"),
+        trigram_index("idx_drivers_name_trgm",    "full_name"),
+        trigram_index("idx_drivers_license_trgm", "license_number"),
+    )
+
     trips = db.relationship("Trip", backref="driver", lazy="dynamic", foreign_keys="Trip.driver_id")
 
     @property
     def license_days_remaining(self):
         return (self.license_expiry - date.today()).days
 
-    def to_dict(self):
-        return {
-            "id": self.id, "full_name": self.full_name,
-            "license_number": self.license_number,
-            "license_expiry": self.license_expiry.isoformat(),
-            "license_days_remaining": self.license_days_remaining,
-            "phone": self.phone,
-            "safety_score": float(self.safety_score),
-            "duty_status": self.duty_status,
-            "total_trips": self.total_trips,
-            "total_km_driven": float(self.total_km_driven),
-            "incidents_count": self.incidents_count,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+    FIELDS = {
+        "id":                     Field(),
+        "full_name":              Field(),
+        "license_number":         Field(),
+        "license_expiry":         Field(convert=iso),
+        "license_days_remaining": Field("license_expiry", days_until),
+        "phone":                  Field(),
+        "safety_score":           Field(convert=float),
+        "duty_status":            Field(),
+        "total_trips":            Field(),
+        "total_km_driven":        Field(convert=float),
+        "incidents_count":        Field(),
+        "version":                Field(),
+        "created_at":             Field(convert=iso),
+    }
 
 
 # ─── TRIP ─────────────────────────────────────────────────────────────────────
 
-class Trip(db.Model):
+class Trip(Serialized, db.Model):
     __tablename__ = "trips"
 
     id                   = db.Column(db.String(36), primary_key=True, default=gen_uuid)
@@ -135,30 +218,102 @@ class Trip(db.Model):
     created_at           = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     updated_at           = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
 
+    __table_args__ = (
+        db.Index("idx_trips_vehicle_created", "vehicle_id", "created_at"),
+        db.Index("idx_trips_created_id", "created_at", "id"),
+        trigram_index("idx_trips_origin_trgm",      "origin"),
+        trigram_index("idx_trips_destination_trgm", "destination"),
+    )
+
+    stops = db.relationship("TripStop", order_by="TripStop.sequence", cascade="all, delete-orphan",
+                            passive_deletes=True, back_populates="trip")
+
+    @classmethod
+    def eager_refs(cls):
+        """Loader options for the vehicle/driver rows to_dict() reads."""
+        return (db.joinedload(cls.vehicle), db.joinedload(cls.driver))
+
+    FIELDS = {
+        "id":                  Field(),
+        "vehicle_id":          Field(),
+        "driver_id":           Field(),
+        "vehicle_reg":         Field("vehicle.registration_number"),
+        "driver_name":         Field("driver.full_name"),
+        "cargo_weight_kg":     Field(convert=float),
+        "origin":              Field(),
+        "destination":         Field(),
+        "distance_km":         Field(convert=float_or_none),
+        "status":              Field(),
+        "scheduled_departure": Field(convert=iso),
+        "actual_departure":    Field(convert=iso),
+        "actual_arrival":      Field(convert=iso),
+        "estimated_fuel_cost": Field(convert=float_or_none),
+        "actual_fuel_cost":    Field(convert=float_or_none),
+        "notes":               Field(),
+        "created_at":          Field(convert=iso),
+    }
+
+
+class TripStop(db.Model):
+    """
+    One point of a multi-stop trip's route, in driving order: sequence 0 is
+    the origin and the last stop the destination. leg_km is the distance
+    from the previous stop.
+    """
+    __tablename__ = "trip_stops"
+
+    id          = db.Column(db.String(36), primary_key=True, default=gen_uuid)
+    trip_id     = db.Column(db.String(36), db.ForeignKey("trips.id", ondelete="CASCADE"), nullable=False)
+    sequence    = db.Column(db.Integer, nullable=False)
+    location_id = db.Column(db.String(36), db.ForeignKey("locations.id", ondelete="SET NULL"))
+    name        = db.Column(db.String(255), nullable=False)
+    leg_km      = db.Column(db.Numeric(10,2), nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint("trip_id", "sequence", name="uq_trip_stops_trip_sequence"),)
+
+    trip = db.relationship("Trip", back_populates="stops")
+
     def to_dict(self):
-        return {
-            "id": self.id,
-            "vehicle_id": self.vehicle_id,
-            "driver_id":  self.driver_id,
-            "vehicle_reg": self.vehicle.registration_number if self.vehicle else None,
-            "driver_name": self.driver.full_name if self.driver else None,
-            "cargo_weight_kg": float(self.cargo_weight_kg),
-            "origin": self.origin, "destination": self.destination,
-            "distance_km": float(self.distance_km) if self.distance_km else None,
-            "status": self.status,
-            "scheduled_departure": self.scheduled_departure.isoformat() if self.scheduled_departure else None,
-            "actual_departure": self.actual_departure.isoformat() if self.actual_departure else None,
-            "actual_arrival": self.actual_arrival.isoformat() if self.actual_arrival else None,
-            "estimated_fuel_cost": float(self.estimated_fuel_cost) if self.estimated_fuel_cost else None,
-            "actual_fuel_cost": float(self.actual_fuel_cost) if self.actual_fuel_cost else None,
-            "notes": self.notes,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+        return {"sequence": self.sequence, "name": self.name, "location_id": self.location_id,
+                "leg_km": float(self.leg_km)}
+
+
+# ─── LOCATIONS ────────────────────────────────────────────────────────────────
+
+class Location(db.Model):
+    """
+    A named place with coordinates: the route optimizer's local distance
+    source. `key` is the normalized name that stops are matched on.
+    """
+    __tablename__ = "locations"
+
+    id         = db.Column(db.String(36), primary_key=True, default=gen_uuid)
+    name       = db.Column(db.String(255), nullable=False)
+    key        = db.Column(db.String(255), unique=True, nullable=False)
+    latitude   = db.Column(db.Numeric(9,6), nullable=False)
+    longitude  = db.Column(db.Numeric(9,6), nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name,
+                "latitude": float(self.latitude), "longitude": float(self.longitude)}
+
+
+class LocationDistance(db.Model):
+    """
+    A known road distance between two locations, stored once per pair with
+    from_id < to_id. Overrides the optimizer's great-circle estimate.
+    """
+    __tablename__ = "location_distances"
+
+    from_id     = db.Column(db.String(36), db.ForeignKey("locations.id", ondelete="CASCADE"), primary_key=True)
+    to_id       = db.Column(db.String(36), db.ForeignKey("locations.id", ondelete="CASCADE"), primary_key=True)
+    distance_km = db.Column(db.Numeric(10,2), nullable=False)
 
 
 # ─── MAINTENANCE LOG ──────────────────────────────────────────────────────────
 
-class MaintenanceLog(db.Model):
+class MaintenanceLog(Serialized, db.Model):
     __tablename__ = "maintenance_logs"
 
     id                  = db.Column(db.String(36), primary_key=True, default=gen_uuid)
@@ -174,23 +329,31 @@ class MaintenanceLog(db.Model):
     created_at          = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     updated_at          = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
 
-    def to_dict(self):
-        return {
-            "id": self.id, "vehicle_id": self.vehicle_id,
-            "vehicle_reg": self.vehicle.registration_number if self.vehicle else None,
-            "service_type": self.service_type, "description": self.description,
-            "cost": float(self.cost),
-            "service_date": self.service_date.isoformat(),
-            "odometer_at_service": float(self.odometer_at_service),
-            "next_service_km": float(self.next_service_km) if self.next_service_km else None,
-            "status": self.status,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+    __table_args__ = (db.Index("idx_maintenance_date_id", "service_date", "id"),)
+
+    @classmethod
+    def eager_refs(cls):
+        """Loader options for the vehicle row to_dict() reads."""
+        return (db.joinedload(cls.vehicle),)
+
+    FIELDS = {
+        "id":                  Field(),
+        "vehicle_id":          Field(),
+        "vehicle_reg":         Field("vehicle.registration_number"),
+        "service_type":        Field(),
+        "description":         Field(),
+        "cost":                Field(convert=float),
+        "service_date":        Field(convert=iso),
+        "odometer_at_service": Field(convert=float),
+        "next_service_km":     Field(convert=float_or_none),
+        "status":              Field(),
+        "created_at":          Field(convert=iso),
+    }
 
 
 # ─── EXPENSE ──────────────────────────────────────────────────────────────────
 
-class Expense(db.Model):
+class Expense(Serialized, db.Model):
     __tablename__ = "expenses"
 
     id                   = db.Column(db.String(36), primary_key=True, default=gen_uuid)
@@ -207,20 +370,90 @@ class Expense(db.Model):
     logged_by            = db.Column(db.String(36), db.ForeignKey("users.id", ondelete="SET NULL"))
     created_at           = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
 
+    __table_args__ = (db.Index("idx_expenses_date_id", "expense_date", "id"),)
+
     driver  = db.relationship("Driver",  foreign_keys=[driver_id])
 
-    def to_dict(self):
-        return {
-            "id": self.id, "trip_id": self.trip_id,
-            "vehicle_id": self.vehicle_id,
-            "vehicle_reg": self.vehicle.registration_number if self.vehicle else None,
-            "driver_id": self.driver_id,
-            "driver_name": self.driver.full_name if self.driver else None,
-            "expense_type": self.expense_type,
-            "amount": float(self.amount),
-            "fuel_liters": float(self.fuel_liters) if self.fuel_liters else None,
-            "fuel_price_per_liter": float(self.fuel_price_per_liter) if self.fuel_price_per_liter else None,
-            "expense_date": self.expense_date.isoformat(),
-            "notes": self.notes,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+    @classmethod
+    def eager_refs(cls):
+        """Loader options for the vehicle/driver rows to_dict() reads."""
+        return (db.joinedload(cls.vehicle), db.joinedload(cls.driver))
+
+    FIELDS = {
+        "id":                   Field(),
+        "trip_id":              Field(),
+        "vehicle_id":           Field(),
+        "vehicle_reg":          Field("vehicle.registration_number"),
+        "driver_id":            Field(),
+        "driver_name":          Field("driver.full_name"),
+        "expense_type":         Field(),
+        "amount":               Field(convert=float),
+        "fuel_liters":          Field(convert=float_or_none),
+        "fuel_price_per_liter": Field(convert=float_or_none),
+        "expense_date":         Field(convert=iso),
+        "notes":                Field(),
+        "created_at":           Field(convert=iso),
+    }
+
+
+# ─── VEHICLE MONTH ROLLUP ─────────────────────────────────────────────────────
+
+class VehicleMonthRollup(db.Model):
+    """
+    Per-vehicle, per-calendar-month totals maintained by app.services.rollup.
+    One row per expense type; completed trips land in the "trip" row.
+    """
+    __tablename__ = "vehicle_month_rollup"
+
+    TRIP = "trip"
+
+    vehicle_id    = db.Column(db.String(36), db.ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    month         = db.Column(db.Date,       primary_key=True)  # first day of the month
+    expense_type  = db.Column(db.String(20), primary_key=True)
+    amount        = db.Column(db.Numeric(14,2), nullable=False, default=0)
+    fuel_liters   = db.Column(db.Numeric(12,2), nullable=False, default=0)
+    expense_count = db.Column(db.Integer,       nullable=False, default=0)
+    trip_count    = db.Column(db.Integer,       nullable=False, default=0)
+    distance_km   = db.Column(db.Numeric(14,2), nullable=False, default=0)
+
+    __table_args__ = (db.Index("idx_rollup_month_type", "month", "expense_type"),)
+
+
+# ─── VEHICLE RISK SCORE ───────────────────────────────────────────────────────
+
+class VehicleRiskScore(db.Model):
+    """Latest maintenance-risk prediction per vehicle, kept by app.services.risk."""
+    __tablename__ = "vehicle_risk_scores"
+
+    vehicle_id         = db.Column(db.String(36), db.ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    probability        = db.Column(db.Numeric(4,3), nullable=False)
+    risk_level         = db.Column(db.String(10),   nullable=False)
+    recommended_action = db.Column(db.String(100),  nullable=False)
+    estimated_days     = db.Column(db.Integer)
+    reasons            = db.Column(db.JSON,         nullable=False, default=list)
+    model_version      = db.Column(db.String(50),   nullable=False, default="heuristic")
+    computed_at        = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    vehicle = db.relationship("Vehicle")
+
+    __table_args__ = (db.Index("idx_risk_scores_level_probability", "risk_level", "probability"),)
+
+
+# ─── VEHICLE FUEL STATS ───────────────────────────────────────────────────────
+
+class VehicleFuelStats(db.Model):
+    """
+    Observed fuel efficiency and recent fuel price per vehicle, kept by
+    app.services.fuel for the trip fuel-cost estimate.
+    """
+    __tablename__ = "vehicle_fuel_stats"
+
+    vehicle_id      = db.Column(db.String(36), db.ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    km_per_liter    = db.Column(db.Numeric(6,2))     # None until enough fuel and distance is logged
+    price_per_liter = db.Column(db.Numeric(6,2))
+    price_source    = db.Column(db.String(10))       # "vehicle" or "fleet"
+    fuel_liters     = db.Column(db.Numeric(12,2), nullable=False, default=0)
+    distance_km     = db.Column(db.Numeric(14,2), nullable=False, default=0)
+    computed_at     = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    vehicle = db.relationship("Vehicle", backref=db.backref("fuel_stats", uselist=False))
@@ -0,0 +1,177 @@
+"""
+Prefix autocomplete for the vehicle and trip forms: registration numbers,
+driver names and licence numbers.
+
+Each worker keeps an AutocompleteIndex with one sorted list of
+(key, id) per field. A lookup is a bisect to the first key at or after
+the prefix, followed by a walk while keys still start with it. Nothing
+touches the database on the request path.
+
+    registration   upper-case letters and digits only, so "gj-05 ab" and
+                   "GJ05AB" both find GJ05AB1234
+    name           lower-cased, one key per word start, so "pat" finds
+                   Rajan Patel
+    license        like registration
+
+Retired vehicles are left out. Web workers build the index at startup
+(warm(), called from run.py); anything else that creates the app builds
+it on the first lookup, if ever. Like the dispatch index it is an
+EventSyncedIndex: vehicle and driver events published by the write
+paths reach every worker through the Redis relay, mark those rows dirty,
+and the next lookup reloads just them. A full rebuild runs every MAX_AGE
+seconds and whenever the event queue overflowed.
+"""
+import re
+from bisect import bisect_left, insort
+from itertools import chain
+
+from app import db
+from app.models import Driver, Vehicle
+from app.services.synced_index import EventSyncedIndex
+
+MAX_AGE     = 600      # seconds between full rebuilds
+MAX_RESULTS = 25
+TYPES       = ("vehicles", "drivers")
+
+
+def code_key(value):
+    return re.sub(r"[^0-9A-Z]", "", (value or "").upper())
+
+
+def name_keys(value):
+    """Every suffix of the name that starts a word: "Rajan Patel" -> ["rajan patel", "patel"]."""
+    words = (value or "").lower().split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def _walk(keys, prefix):
+    """Ids whose key starts with prefix, in key order."""
+    i = bisect_left(keys, (prefix,))
+    while i < len(keys) and keys[i][0].startswith(prefix):
+        yield keys[i][1]
+        i += 1
+
+
+def _discard(keys, entry):
+    i = bisect_left(keys, entry)
+    if i < len(keys) and keys[i] == entry:
+        del keys[i]
+
+
+class AutocompleteIndex(EventSyncedIndex):
+    """Per-process sorted prefix index over plates, driver names and licence numbers."""
+
+    MAX_AGE = MAX_AGE
+
+    def _clear(self):
+        self._plates   = []   # sorted (registration key, vehicle_id)
+        self._names    = []   # sorted (name key, driver_id)
+        self._licenses = []   # sorted (licence key, driver_id)
+        self._vehicles = {}   # vehicle_id -> dict
+        self._drivers  = {}   # driver_id -> dict
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def _vehicle_rows(self, ids=None):
+        q = db.session.query(Vehicle.id, Vehicle.registration_number, Vehicle.make, Vehicle.model,
+                             Vehicle.type).filter(Vehicle.status != "retired")
+        if ids is not None:
+            q = q.filter(Vehicle.id.in_(ids))
+        return q.all()
+
+    def _driver_rows(self, ids=None):
+        q = db.session.query(Driver.id, Driver.full_name, Driver.license_number)
+        if ids is not None:
+            q = q.filter(Driver.id.in_(ids))
+        return q.all()
+
+    def _add_vehicle(self, row, add=insort):
+        vid, reg, make, model, vtype = row
+        self._vehicles[vid] = {"id": vid, "registration_number": reg, "make": make, "model": model, "type": vtype}
+        add(self._plates, (code_key(reg), vid))
+
+    def _remove_vehicle(self, vid):
+        v = self._vehicles.pop(vid, None)
+        if v is not None:
+            _discard(self._plates, (code_key(v["registration_number"]), vid))
+
+    def _add_driver(self, row, add=insort):
+        did, name, license_number = row
+        self._drivers[did] = {"id": did, "full_name": name, "license_number": license_number}
+        for key in name_keys(name):
+            add(self._names, (key, did))
+        add(self._licenses, (code_key(license_number), did))
+
+    def _remove_driver(self, did):
+        d = self._drivers.pop(did, None)
+        if d is not None:
+            for key in name_keys(d["full_name"]):
+                _discard(self._names, (key, did))
+            _discard(self._licenses, (code_key(d["license_number"]), did))
+
+    def _build(self):
+        """Load everything (two queries)."""
+        vehicles, drivers = self._vehicle_rows(), self._driver_rows()
+        self._clear()
+        # Append then sort once: insort per row is quadratic on a large fleet
+        for row in vehicles:
+            self._add_vehicle(row, list.append)
+        for row in drivers:
+            self._add_driver(row, list.append)
+        for keys in (self._plates, self._names, self._licenses):
+            keys.sort()
+
+    def _reload(self, vehicle_ids, driver_ids):
+        if vehicle_ids:
+            rows = self._vehicle_rows(vehicle_ids)
+            for vid in vehicle_ids:
+                self._remove_vehicle(vid)
+            for row in rows:
+                self._add_vehicle(row)
+        if driver_ids:
+            rows = self._driver_rows(driver_ids)
+            for did in driver_ids:
+                self._remove_driver(did)
+            for row in rows:
+                self._add_driver(row)
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def lookup(self, prefix, types=TYPES, limit=10):
+        """{type: [row dict]} for the rows whose plate, name or licence starts with prefix."""
+        code, name = code_key(prefix), " ".join((prefix or "").lower().split())
+        result = {}
+        with self._lock:
+            self._sync()
+            if "vehicles" in types:
+                ids = _walk(self._plates, code) if code else ()
+                result["vehicles"] = [self._vehicles[vid] for vid in _take(ids, limit)]
+            if "drivers" in types:
+                by_name = _walk(self._names, name) if name else ()
+                by_license = _walk(self._licenses, code) if code else ()
+                result["drivers"] = [self._drivers[did] for did in _take(chain(by_name, by_license), limit)]
+        return result
+
+
+def _take(ids, limit):
+    """First `limit` distinct ids, in order; stops walking once it has them."""
+    seen = {}
+    for i in ids:
+        seen[i] = None
+        if len(seen) == limit:
+            break
+    return list(seen)
+
+
+index = AutocompleteIndex()
+
+
+def warm(app):
+    """Build this web worker's index at startup; a failure leaves it to the first lookup."""
+    if not app.config.get("AUTOCOMPLETE_WARM", True):
+        return
+    try:
+        with app.app_context():
+            index.warm()
+    except Exception:
+        app.logger.exception("Could not build the autocomplete index; it will be built on first use")
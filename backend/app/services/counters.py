@@ -0,0 +1,177 @@
+"""
+Write-through KPI counters.
+
+The figures behind /dashboard/kpis live in Redis hashes and are adjusted
+by the write paths as changes are committed, so reading the KPIs is a
+single pipelined round trip regardless of table sizes:
+
+    kpi:fleet     vehicle status -> count, "service_due" -> count
+    kpi:trips     "pending" / "in_transit" -> count, "completed:<YYYY-MM-DD>" -> count
+    kpi:expenses  "<YYYY-MM>:total" / "<YYYY-MM>:fuel" -> amount
+    kpi:drivers   license_expiring / license_expired, as of "as_of"
+    kpi:meta      reconciled_at
+
+reconcile() rebuilds every hash from the database; the Celery beat job
+runs it periodically to correct drift from failed or racing increments.
+Increments swallow Redis errors and leave the correction to reconcile().
+"""
+from datetime import date, datetime, timezone
+
+from app import redis_store
+from app.services import kpis as kpi_queries
+
+FLEET_KEY    = "kpi:fleet"
+TRIPS_KEY    = "kpi:trips"
+EXPENSES_KEY = "kpi:expenses"
+DRIVERS_KEY  = "kpi:drivers"
+META_KEY     = "kpi:meta"
+
+# Trip statuses that feed a KPI, and the counter field each one lands in.
+TRIP_BUCKETS = {"pending": "pending", "dispatched": "in_transit", "in_transit": "in_transit"}
+
+
+def is_service_due(odometer_km, next_service_km):
+    """Same rule as the service-due KPI: within 5000 km of the next service."""
+    if next_service_km is None:
+        return False
+    return float(odometer_km or 0) >= float(next_service_km) - 5000
+
+
+# ── Write-through updates ─────────────────────────────────────────────────────
+
+def _apply(ops):
+    """Run (command, key, field, amount) increments in one pipeline."""
+    ops = [op for op in ops if op[3]]
+    if not ops:
+        return
+    try:
+        pipe = redis_store.pipeline()
+        for cmd, key, field, amount in ops:
+            getattr(pipe, cmd)(key, field, amount)
+        pipe.execute()
+    except Exception:
+        pass  # Redis unavailable — reconcile() will correct the counters
+
+
+def _move(key, old, new):
+    if old == new:
+        return []
+    ops = []
+    if old:
+        ops.append(("hincrby", key, old, -1))
+    if new:
+        ops.append(("hincrby", key, new, 1))
+    return ops
+
+
+def vehicle_changed(old_status=None, new_status=None, was_due=False, is_due=False):
+    """A vehicle was created, changed status, or crossed the service-due line."""
+    ops = _move(FLEET_KEY, old_status, new_status)
+    ops.append(("hincrby", FLEET_KEY, "service_due", int(is_due) - int(was_due)))
+    _apply(ops)
+
+
+def trip_changed(old_status=None, new_status=None, arrived_at=None):
+    """A trip was created or moved between statuses."""
+    ops = _move(TRIPS_KEY, TRIP_BUCKETS.get(old_status), TRIP_BUCKETS.get(new_status))
+    if new_status == "completed" and arrived_at:
+        ops.append(("hincrby", TRIPS_KEY, f"completed:{arrived_at.date().isoformat()}", 1))
+    _apply(ops)
+
+
+def expense_logged(expense_date, expense_type, amount):
+    """An expense was recorded; bump its month's totals."""
+    month = expense_date.strftime("%Y-%m")
+    ops = [("hincrbyfloat", EXPENSES_KEY, f"{month}:total", float(amount))]
+    if expense_type == "fuel":
+        ops.append(("hincrbyfloat", EXPENSES_KEY, f"{month}:fuel", float(amount)))
+    _apply(ops)
+
+
+# ── Hashes → KPI payload ──────────────────────────────────────────────────────
+
+def _to_kpis(fleet, trips, expenses, drivers, today):
+    month = today.strftime("%Y-%m")
+
+    def n(h, field):
+        return int(h.get(field, 0))
+
+    return kpi_queries.build_kpis(
+        {
+            "total": n(fleet, "available") + n(fleet, "on_trip") + n(fleet, "in_shop"),
+            "active": n(fleet, "on_trip"),
+            "in_shop": n(fleet, "in_shop"),
+            "available": n(fleet, "available"),
+            "service_due": n(fleet, "service_due"),
+        },
+        {
+            "license_expiring": n(drivers, "license_expiring"),
+            "license_expired": n(drivers, "license_expired"),
+        },
+        {
+            "pending": n(trips, "pending"),
+            "in_transit": n(trips, "in_transit"),
+            "completed_today": n(trips, f"completed:{today.isoformat()}"),
+        },
+        {
+            "monthly_expenses": round(float(expenses.get(f"{month}:total", 0)), 2),
+            "monthly_fuel": round(float(expenses.get(f"{month}:fuel", 0)), 2),
+        },
+    )
+
+
+def read_kpis():
+    """
+    KPI payload from the counter hashes — one pipelined round trip.
+    Returns None when the counters were never reconciled, were last
+    reconciled on a previous day, or Redis is unreachable.
+    """
+    today = date.today()
+    try:
+        fleet, trips, expenses, drivers, meta = redis_store.hgetall_many(
+            (FLEET_KEY, TRIPS_KEY, EXPENSES_KEY, DRIVERS_KEY, META_KEY)
+        )
+    except Exception:
+        return None
+
+    if not meta or drivers.get("as_of") != today.isoformat():
+        return None
+    return _to_kpis(fleet, trips, expenses, drivers, today)
+
+
+# ── Reconciliation ────────────────────────────────────────────────────────────
+
+def reconcile():
+    """
+    Rebuild every counter hash from the database (four queries) and return
+    the KPI payload they describe. The payload is still returned when the
+    hashes cannot be written.
+    """
+    today = date.today()
+    month = today.strftime("%Y-%m")
+
+    fleet    = kpi_queries.vehicle_status_counts()
+    active   = kpi_queries.trip_counts(today)
+    licenses = kpi_queries.license_counts(today)
+    money    = kpi_queries.monthly_expense_totals(today)
+
+    trips = {
+        "pending": active["pending"],
+        "in_transit": active["in_transit"],
+        f"completed:{today.isoformat()}": active["completed_today"],
+    }
+    expenses = {f"{month}:total": money["monthly_expenses"], f"{month}:fuel": money["monthly_fuel"]}
+    drivers  = {**licenses, "as_of": today.isoformat()}
+
+    try:
+        pipe = redis_store.pipeline(transaction=True)
+        for key, mapping in ((FLEET_KEY, fleet), (TRIPS_KEY, trips),
+                             (EXPENSES_KEY, expenses), (DRIVERS_KEY, drivers)):
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+        pipe.hset(META_KEY, "reconciled_at", datetime.now(timezone.utc).isoformat())
+        pipe.execute()
+    except Exception:
+        pass  # Redis unavailable — serve the freshly computed figures
+
+    return _to_kpis(fleet, trips, expenses, drivers, today)
@@ -0,0 +1,228 @@
+"""
+Dispatch recommendations: ranked vehicle/driver pairs for a new trip.
+
+Each worker keeps a DispatchIndex of the vehicles and drivers that can be
+dispatched. Vehicles are kept in a list sorted by capacity_kg, so the
+vehicles that can carry a load are found with one bisect. Drivers are
+kept sorted by safety score. The rules match _validate_dispatch in
+app/api/trips.py:
+
+    vehicle  status not in_shop / on_trip / retired, capacity_kg >= cargo
+    driver   duty_status not on_trip / suspended, licence valid on departure
+
+Each feasible vehicle gets a score from its capacity fit (cargo /
+capacity), fuel efficiency (km/l from app.services.fuel relative to the
+best in the index), maintenance risk (1 - the stored probability) and
+whether its last completed trip ended at the requested origin. Drivers
+are scored on safety_score. The best vehicle is paired with the best
+driver, the second with the second, and so on, so no vehicle or driver
+appears twice.
+
+The index is an EventSyncedIndex (app.services.synced_index). Trip,
+vehicle, driver and maintenance events mark the rows they name as dirty,
+and the next recommendation reloads just those rows. A full rebuild runs
+every MAX_AGE seconds, and whenever the event queue overflowed, to pick
+up changes no event describes (the nightly risk sweep, licence expiry).
+"""
+import heapq
+from bisect import bisect_left, insort
+from datetime import date
+
+from sqlalchemy import and_, func
+
+from app import db
+from app.models import Driver, Trip, Vehicle, VehicleFuelStats, VehicleRiskScore
+from app.services import fuel
+from app.services.synced_index import EventSyncedIndex
+
+BLOCKED_VEHICLE_STATUSES = ("in_shop", "on_trip", "retired")
+BLOCKED_DUTY_STATUSES    = ("on_trip", "suspended")
+
+WEIGHTS = {"capacity_fit": 0.35, "fuel_efficiency": 0.15, "risk": 0.20, "location": 0.10, "safety": 0.20}
+NEUTRAL_RISK = 0.5      # vehicles not scored yet
+MAX_AGE      = 300      # seconds between full rebuilds
+MAX_RESULTS  = 50
+
+
+def _place(name):
+    return (name or "").strip().lower()
+
+
+class DispatchIndex(EventSyncedIndex):
+    """Per-process index of dispatchable vehicles (by capacity) and drivers (by safety)."""
+
+    MAX_AGE = MAX_AGE
+    EVENTS  = {
+        "trip":        ("vehicle_id", "driver_id"),
+        "vehicle":     ("id", None),
+        "maintenance": ("vehicle_id", None),
+        "driver":      (None, "id"),
+    }
+
+    def _clear(self):
+        self._by_capacity = []   # sorted (capacity_kg, vehicle_id)
+        self._vehicles    = {}   # vehicle_id -> dict
+        self._by_safety   = []   # sorted (-safety_score, driver_id)
+        self._drivers     = {}   # driver_id -> dict
+        self._by_kmpl     = []   # sorted (km_per_liter, vehicle_id); the last is the best in the index
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def _vehicle_rows(self, ids=None):
+        q = db.session.query(
+            Vehicle.id, Vehicle.registration_number, Vehicle.type, Vehicle.capacity_kg,
+            Vehicle.fuel_efficiency_kmpl, VehicleFuelStats.km_per_liter, VehicleRiskScore.probability,
+        ).outerjoin(VehicleFuelStats, VehicleFuelStats.vehicle_id == Vehicle.id
+        ).outerjoin(VehicleRiskScore, VehicleRiskScore.vehicle_id == Vehicle.id
+        ).filter(Vehicle.status.notin_(BLOCKED_VEHICLE_STATUSES))
+        if ids is not None:
+            q = q.filter(Vehicle.id.in_(ids))
+        return q.all()
+
+    def _locations(self, ids=None):
+        """Destination of each vehicle's latest completed trip."""
+        latest = db.session.query(
+            Trip.vehicle_id, func.max(Trip.actual_arrival).label("arrived"),
+        ).filter(Trip.status == "completed")
+        if ids is not None:
+            latest = latest.filter(Trip.vehicle_id.in_(ids))
+        latest = latest.group_by(Trip.vehicle_id).subquery()
+        return dict(db.session.query(Trip.vehicle_id, Trip.destination).join(latest, and_(
+            Trip.vehicle_id == latest.c.vehicle_id, Trip.actual_arrival == latest.c.arrived,
+        )).filter(Trip.status == "completed").all())
+
+    def _driver_rows(self, ids=None):
+        q = db.session.query(
+            Driver.id, Driver.full_name, Driver.safety_score, Driver.license_expiry,
+        ).filter(Driver.duty_status.notin_(BLOCKED_DUTY_STATUSES))
+        if ids is not None:
+            q = q.filter(Driver.id.in_(ids))
+        return q.all()
+
+    def _add_vehicle(self, row, location):
+        vid, reg, vtype, capacity, rated, observed, probability = row
+        kmpl, _ = fuel.km_per_liter(observed, rated, vtype)
+        capacity = float(capacity)
+        self._vehicles[vid] = {
+            "id": vid, "registration": reg, "type": vtype, "capacity_kg": capacity,
+            "km_per_liter": kmpl, "location": location,
+            "risk_probability": float(probability) if probability is not None else None,
+        }
+        insort(self._by_capacity, (capacity, vid))
+        insort(self._by_kmpl, (kmpl, vid))
+
+    def _remove_vehicle(self, vid):
+        v = self._vehicles.pop(vid, None)
+        if v is not None:
+            i = bisect_left(self._by_capacity, (v["capacity_kg"], vid))
+            del self._by_capacity[i]
+            i = bisect_left(self._by_kmpl, (v["km_per_liter"], vid))
+            del self._by_kmpl[i]
+
+    def _add_driver(self, row):
+        did, name, safety, expiry = row
+        safety = float(safety)
+        self._drivers[did] = {"id": did, "full_name": name, "safety_score": safety, "license_expiry": expiry}
+        insort(self._by_safety, (-safety, did))
+
+    def _remove_driver(self, did):
+        d = self._drivers.pop(did, None)
+        if d is not None:
+            i = bisect_left(self._by_safety, (-d["safety_score"], did))
+            del self._by_safety[i]
+
+    def _build(self):
+        """Load everything (three queries)."""
+        vehicles, locations, drivers = self._vehicle_rows(), self._locations(), self._driver_rows()
+        self._clear()
+        for row in vehicles:
+            self._add_vehicle(row, locations.get(row[0]))
+        for row in drivers:
+            self._add_driver(row)
+
+    def _reload(self, vehicle_ids, driver_ids):
+        if vehicle_ids:
+            rows, locations = self._vehicle_rows(vehicle_ids), self._locations(vehicle_ids)
+            for vid in vehicle_ids:
+                self._remove_vehicle(vid)
+            for row in rows:
+                self._add_vehicle(row, locations.get(row[0]))
+        if driver_ids:
+            rows = self._driver_rows(driver_ids)
+            for did in driver_ids:
+                self._remove_driver(did)
+            for row in rows:
+                self._add_driver(row)
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def recommend(self, cargo_kg, origin=None, departure=None, limit=5):
+        """
+        Up to `limit` ranked vehicle/driver pairs that pass the dispatch rules,
+        plus how many vehicles and drivers were feasible.
+        """
+        departure = departure or date.today()
+        valid_on  = max(departure, date.today())
+        origin    = _place(origin)
+        w = WEIGHTS
+
+        with self._lock:
+            self._sync()
+            best_kmpl = (self._by_kmpl[-1][0] if self._by_kmpl else 0.0) or 1.0
+
+            def vehicle_score(key):
+                v = self._vehicles[key[1]]
+                p = v["risk_probability"]
+                parts = {
+                    "capacity_fit": cargo_kg / v["capacity_kg"] if v["capacity_kg"] else 0.0,
+                    "fuel_efficiency": v["km_per_liter"] / best_kmpl,
+                    "risk": 1 - (NEUTRAL_RISK if p is None else p),
+                    "location": 1.0 if origin and _place(v["location"]) == origin else 0.0,
+                }
+                return sum(w[k] * parts[k] for k in parts), v, parts
+
+            fits = self._by_capacity[bisect_left(self._by_capacity, (cargo_kg,)):]
+            vehicles = heapq.nlargest(limit, map(vehicle_score, fits), key=lambda s: s[0])
+
+            drivers, feasible_drivers = [], 0
+            for _, did in self._by_safety:
+                d = self._drivers[did]
+                if d["license_expiry"] >= valid_on:
+                    feasible_drivers += 1
+                    if len(drivers) < limit:
+                        drivers.append(d)
+
+        pairs = []
+        for rank, ((score, v, parts), d) in enumerate(zip(vehicles, drivers), start=1):
+            safety = d["safety_score"] / 100
+            pairs.append({
+                "rank": rank,
+                "score": round(score + w["safety"] * safety, 4),
+                "vehicle": {k: v[k] for k in ("id", "registration", "type", "capacity_kg",
+                                              "km_per_liter", "risk_probability", "location")},
+                "driver": {"id": d["id"], "full_name": d["full_name"], "safety_score": d["safety_score"],
+                           "license_expiry": d["license_expiry"].isoformat()},
+                "components": {**{k: round(x, 4) for k, x in parts.items()}, "safety": round(safety, 4)},
+            })
+        return {"recommendations": pairs, "feasible_vehicles": len(fits), "feasible_drivers": feasible_drivers}
+
+    def snapshot(self, departure=None):
+        """
+        (vehicles, drivers) that pass the dispatch rules on `departure`:
+        vehicle dicts sorted by capacity_kg ascending and driver dicts by
+        safety score descending. Used by the load planner.
+        """
+        valid_on = max(departure or date.today(), date.today())
+        with self._lock:
+            self._sync()
+            vehicles = [self._vehicles[vid] for _, vid in self._by_capacity]
+            drivers  = [d for d in (self._drivers[did] for _, did in self._by_safety)
+                        if d["license_expiry"] >= valid_on]
+        return vehicles, drivers
+
+
+index = DispatchIndex()
+
+
+def recommend(cargo_kg, origin=None, departure=None, limit=5):
+    return index.recommend(cargo_kg, origin, departure, limit)
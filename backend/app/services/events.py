@@ -0,0 +1,181 @@
+"""
+Live event fan-out for the SSE stream.
+
+Write paths publish small JSON envelopes ({"type", "data", "ts"}) on a
+Redis pub/sub channel. Each worker process runs one listener thread that
+relays the channel to the in-process EventHub, which copies every event
+onto the queue of each connected SSE client — so a worker holds a single
+Redis subscription however many dashboards it is serving.
+
+In-process consumers (the dispatch index) subscribe with internal=True.
+They get every event too but are kept in their own registry, so the
+/stream/stats connection and drop counts describe SSE clients only.
+
+With EVENTS_BROKER = "local" (the testing config) publish() hands events
+straight to the hub, so no Redis server is needed.
+"""
+import json
+import queue
+import threading
+import time
+from flask import current_app
+
+from app import redis_store
+
+CHANNEL = "fleetflow:events"
+
+
+class EventHub:
+    """Per-process subscriber registry with fan-out metrics."""
+
+    def __init__(self, max_queue=256):
+        self.max_queue    = max_queue
+        self._subscribers = set()   # SSE clients
+        self._consumers   = set()   # in-process consumers, left out of the stats
+        self._lock        = threading.Lock()
+        self._listener    = None
+        self._stats = {
+            "published": 0, "delivered": 0, "dropped": 0,
+            "latency_ms_total": 0.0, "latency_ms_max": 0.0, "latency_samples": 0,
+        }
+
+    # ── Subscribers ──────────────────────────────────────────────────────────
+
+    def subscribe(self, maxsize=None, internal=False):
+        q = queue.Queue(maxsize=maxsize or self.max_queue)
+        with self._lock:
+            (self._consumers if internal else self._subscribers).add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+            self._consumers.discard(q)
+
+    # ── Fan-out ──────────────────────────────────────────────────────────────
+
+    def dispatch(self, raw):
+        """Copy one encoded envelope onto every subscriber queue."""
+        try:
+            envelope = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        latency_ms = max(0.0, (time.time() - envelope.get("ts", time.time())) * 1000)
+
+        with self._lock:
+            subscribers, consumers = list(self._subscribers), list(self._consumers)
+        for q in consumers:
+            try:
+                q.put_nowait(envelope)
+            except queue.Full:
+                pass  # the consumer sees its full queue and resyncs itself
+        delivered = dropped = 0
+        for q in subscribers:
+            try:
+                q.put_nowait(envelope)
+                delivered += 1
+            except queue.Full:
+                dropped += 1  # slow client — it will resync from the REST endpoints
+
+        with self._lock:
+            s = self._stats
+            s["delivered"] += delivered
+            s["dropped"]   += dropped
+            s["latency_samples"]  += 1
+            s["latency_ms_total"] += latency_ms
+            s["latency_ms_max"]    = max(s["latency_ms_max"], latency_ms)
+
+    def record_publish(self):
+        with self._lock:
+            self._stats["published"] += 1
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            connections = len(self._subscribers)
+        samples = s.pop("latency_samples")
+        total   = s.pop("latency_ms_total")
+        return {
+            **s,
+            "connections": connections,
+            "latency_ms_avg": round(total / samples, 3) if samples else None,
+            "latency_ms_max": round(s["latency_ms_max"], 3),
+            "listener_alive": bool(self._listener and self._listener.is_alive()),
+        }
+
+    # ── Redis listener ───────────────────────────────────────────────────────
+
+    def ensure_listener(self):
+        """Start the Redis relay thread for this process if it is not running."""
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name="event-hub", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = redis_store.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self.dispatch(message["data"])
+            except Exception:
+                time.sleep(1)  # Redis went away — resubscribe
+
+
+hub = EventHub()
+
+
+def _local():
+    return current_app.config.get("EVENTS_BROKER", "redis") == "local"
+
+
+def publish(event_type, data):
+    """Publish an event to every connected stream. Never raises."""
+    raw = json.dumps({"type": event_type, "data": data, "ts": time.time()}, default=str)
+    hub.record_publish()
+    if _local():
+        hub.dispatch(raw)
+        return
+    try:
+        redis_store.client.publish(CHANNEL, raw)
+    except Exception:
+        pass  # Redis unavailable — clients fall back to polling
+
+
+def publish_trip(trip, old_status=None):
+    """Trip created or moved between statuses."""
+    publish("trip", {
+        "id": trip.id,
+        "vehicle_id": trip.vehicle_id,
+        "driver_id": trip.driver_id,
+        "origin": trip.origin,
+        "destination": trip.destination,
+        "status": trip.status,
+        "old_status": old_status,
+    })
+
+
+def publish_kpis(*sections):
+    """Push the KPI sections a write just changed (read from the counters)."""
+    from app.services import counters
+    data = counters.read_kpis()
+    if data is not None:
+        publish("kpis", {s: data[s] for s in sections} if sections else data)
+
+
+def subscribe(maxsize=None, internal=False):
+    """
+    Register an SSE client, or an in-process consumer with internal=True;
+    starts this process's Redis relay on first use.
+    """
+    if not _local():
+        hub.ensure_listener()
+    return hub.subscribe(maxsize, internal)
+
+
+def unsubscribe(q):
+    hub.unsubscribe(q)
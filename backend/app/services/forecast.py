@@ -0,0 +1,237 @@
+"""
+Fuel-cost forecasting.
+
+Monthly fuel spend per vehicle comes from vehicle_month_rollup in one
+query and is pivoted into a (series x month) matrix. Per-type and fleet
+totals are added as extra rows. Every series is then fitted at once:
+
+    Holt-Winters (additive, 12-month season) when 24+ months of history
+    exist, otherwise Holt's linear trend.
+
+Smoothing parameters are chosen per series by grid search on one-step-
+ahead squared error. The grid and the series are both array axes, so the
+whole fleet is fitted in a single pass over the months. Prediction
+intervals come from the in-sample residual spread, widened with the
+horizon.
+
+Fits are expensive relative to reads, so the result (history, forecasts
+and parameters for every series) is cached in a TwoTierCache. The nightly
+Celery task refits it; requests only slice the cached payload.
+"""
+from datetime import date, datetime, timedelta, timezone
+from itertools import product
+
+import numpy as np
+
+from app import db
+from app.models import Vehicle, VehicleMonthRollup
+from app.utils.cache import TwoTierCache
+from app.utils.helpers import month_starts, next_month
+
+HISTORY_MONTHS = 36
+SEASON         = 12
+HORIZON        = 3
+SHOWN_HISTORY  = 6
+INTERVAL_Z     = 1.96   # ~95% band
+CHUNK          = 2_000  # series fitted per pass, bounds the grid's memory
+
+ALPHAS = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+BETAS  = (0.0, 0.05, 0.1, 0.3)
+GAMMAS = (0.0, 0.1, 0.3)
+
+# Refit nightly; a day-old fit is still served (and refreshed in the background) for a week
+forecast_cache = TwoTierCache("forecast", fresh_ttl=26 * 3600, stale_ttl=7 * 86400,
+                              l1_ttl=300, lock_ttl=300)
+CACHE_KEY = "fuel"
+
+
+# ── History ───────────────────────────────────────────────────────────────────
+
+def load_history(months=HISTORY_MONTHS, today=None):
+    """
+    (starts, matrix, vehicles) — the last `months` complete months, a
+    (vehicles x months) array of fuel spend and the matching
+    [(id, registration, type, status)] rows. One query over the rollup.
+    The current month is left out: a partial month would drag every level down.
+    """
+    today  = today or date.today()
+    starts = month_starts(months, today.replace(day=1) - timedelta(days=1))
+    index  = {m: i for i, m in enumerate(starts)}
+    R = VehicleMonthRollup
+    rows = db.session.query(
+        R.vehicle_id, Vehicle.registration_number, Vehicle.type, Vehicle.status, R.month, R.amount,
+    ).join(Vehicle, Vehicle.id == R.vehicle_id).filter(
+        R.expense_type == "fuel",
+        R.month >= starts[0],
+        R.month <= starts[-1],
+    ).all()
+
+    vehicles, position = [], {}
+    for vehicle_id, reg, vtype, status, _, _ in rows:
+        if vehicle_id not in position:
+            position[vehicle_id] = len(vehicles)
+            vehicles.append((vehicle_id, reg, vtype, status))
+    matrix = np.zeros((len(vehicles), len(starts)))
+    for vehicle_id, _, _, _, month, amount in rows:
+        matrix[position[vehicle_id], index[month]] += float(amount)
+    return starts, matrix, vehicles
+
+
+# ── Vectorized smoothing ──────────────────────────────────────────────────────
+
+def _grid(seasonal):
+    gammas = GAMMAS if seasonal else (0.0,)
+    combos = np.array(list(product(ALPHAS, BETAS, gammas)))
+    return combos[:, 0:1], combos[:, 1:2], combos[:, 2:3]
+
+
+def fit(y, seasonal):
+    """
+    Fit every row of y (series x months) over the parameter grid and keep
+    the best combination per series. Returns a dict of per-series arrays:
+    alpha, beta, gamma, level, trend, season (series x SEASON), sigma.
+    """
+    n, T = y.shape
+    alpha, beta, gamma = _grid(seasonal)  # (P, 1) each
+    P = len(alpha)
+
+    if seasonal:
+        first, second = y[:, :SEASON], y[:, SEASON:2 * SEASON]
+        level  = np.broadcast_to(first.mean(axis=1), (P, n)).copy()
+        trend  = np.broadcast_to((second.mean(axis=1) - first.mean(axis=1)) / SEASON, (P, n)).copy()
+        season = np.broadcast_to(first - first.mean(axis=1, keepdims=True), (P, n, SEASON)).copy()
+        start  = SEASON
+    else:
+        level  = np.broadcast_to(y[:, 0], (P, n)).copy()
+        trend  = np.broadcast_to(y[:, 1] - y[:, 0] if T > 1 else np.zeros(n), (P, n)).copy()
+        season = np.zeros((P, n, SEASON))
+        start  = 1
+
+    sse = np.zeros((P, n))
+    for t in range(start, T):
+        s = season[:, :, t % SEASON]
+        actual = y[:, t]
+        err = actual - (level + trend + s)
+        sse += err * err
+        new_level = alpha * (actual - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, :, t % SEASON] = gamma * (actual - new_level) + (1 - gamma) * s
+        level = new_level
+
+    best = sse.argmin(axis=0)           # (n,)
+    cols = np.arange(n)
+    steps = max(T - start, 1)
+    return {
+        "alpha": alpha[best, 0], "beta": beta[best, 0], "gamma": gamma[best, 0],
+        "level": level[best, cols], "trend": trend[best, cols],
+        "season": season[best, cols, :],
+        "sigma": np.sqrt(sse[best, cols] / steps),
+        "months": T,
+    }
+
+
+def project(fitted, horizon=HORIZON):
+    """(predicted, lower, upper) arrays of shape (series x horizon), floored at zero."""
+    T = fitted["months"]
+    h = np.arange(1, horizon + 1)
+    season_idx = (T + h - 1) % SEASON
+    predicted = (fitted["level"][:, None] + fitted["trend"][:, None] * h
+                 + fitted["season"][:, season_idx])
+    spread = INTERVAL_Z * fitted["sigma"][:, None] * np.sqrt(h)
+    return (np.maximum(predicted, 0), np.maximum(predicted - spread, 0),
+            np.maximum(predicted + spread, 0))
+
+
+# ── Payload ───────────────────────────────────────────────────────────────────
+
+def compute_forecasts(today=None):
+    """Fit and project every vehicle, type and the fleet total."""
+    today = today or date.today()
+    starts, matrix, vehicles = load_history(HISTORY_MONTHS, today)
+
+    # Trim leading months with no data anywhere so a young fleet is not fitted on zeros
+    active = np.flatnonzero(matrix.sum(axis=0)) if len(matrix) else np.array([], dtype=int)
+    first = min(int(active[0]) if len(active) else len(starts), len(starts) - SHOWN_HISTORY)
+    starts, matrix = starts[first:], matrix[:, first:]
+
+    types = sorted({v[2] for v in vehicles})
+    type_rows = np.array([matrix[[i for i, v in enumerate(vehicles) if v[2] == t]].sum(axis=0)
+                          for t in types]).reshape(len(types), len(starts))
+    fleet_row = matrix.sum(axis=0, keepdims=True) if len(matrix) else np.zeros((1, len(starts)))
+    y = np.vstack([fleet_row, type_rows, matrix])
+
+    seasonal = len(starts) >= 2 * SEASON
+    parts = [fit(y[i:i + CHUNK], seasonal) for i in range(0, len(y), CHUNK)]
+    fitted = {k: (parts[0][k] if k == "months" else np.concatenate([p[k] for p in parts]))
+              for k in parts[0]}
+    predicted, lower, upper = project(fitted)
+
+    forecast_months = []
+    month = starts[-1]
+    for _ in range(HORIZON):
+        month = next_month(month)
+        forecast_months.append(month)
+
+    def series(i):
+        return {
+            "history": [round(float(v), 2) for v in y[i, -SHOWN_HISTORY:]],
+            "forecast": [[round(float(p), 2), round(float(lo), 2), round(float(hi), 2)]
+                         for p, lo, hi in zip(predicted[i], lower[i], upper[i])],
+            "params": {"alpha": float(fitted["alpha"][i]), "beta": float(fitted["beta"][i]),
+                       "gamma": float(fitted["gamma"][i])},
+            "sigma": round(float(fitted["sigma"][i]), 2),
+        }
+
+    offset = 1 + len(types)
+    return {
+        "fitted_at": datetime.now(timezone.utc).isoformat(),
+        "model": "holt_winters" if seasonal else "holt",
+        "history_months": [m.isoformat() for m in starts[-SHOWN_HISTORY:]],
+        "forecast_months": [m.isoformat() for m in forecast_months],
+        "fleet": series(0),
+        "types": {t: series(1 + k) for k, t in enumerate(types)},
+        "vehicles": {
+            v[0]: {**series(offset + k), "registration": v[1], "type": v[2]}
+            for k, v in enumerate(vehicles) if v[3] != "retired"
+        },
+    }
+
+
+def forecasts():
+    """Cached forecast payload; fitted on a miss."""
+    return forecast_cache.get_or_compute(CACHE_KEY, compute_forecasts)
+
+
+def refit():
+    """Drop the cached fit and compute a fresh one (nightly Celery job)."""
+    forecast_cache.invalidate(CACHE_KEY)
+    return forecasts()
+
+
+def render(payload, series):
+    """One series in the /ai/fuel-forecast response shape."""
+    history_months  = [date.fromisoformat(m) for m in payload["history_months"]]
+    forecast_months = [date.fromisoformat(m) for m in payload["forecast_months"]]
+    history = series["history"][-len(history_months):] if history_months else []
+    return {
+        "historical": [{"month": m.strftime("%b"), "actual": v}
+                       for m, v in zip(history_months, history)],
+        "forecast": [{
+            "month": m.strftime("%b %Y"),
+            "predicted": p, "lower_bound": lo, "upper_bound": hi,
+        } for m, (p, lo, hi) in zip(forecast_months, series["forecast"])],
+        "model": payload["model"],
+        "alpha": series["params"]["alpha"],
+        "params": series["params"],
+        "fitted_at": payload["fitted_at"],
+    }
+
+
+def breakdown_row(series):
+    """Next-month forecast and fit summary for one series."""
+    predicted, lower, upper = series["forecast"][0]
+    return {
+        "predicted": predicted, "lower_bound": lower, "upper_bound": upper,
+        "last_actual": series["history"][-1] if series["history"] else 0.0,
+        "params": series["params"], "sigma": series["sigma"],
+    }
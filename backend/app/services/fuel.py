@@ -0,0 +1,163 @@
+"""
+Trip fuel-cost estimates.
+
+    cost = distance_km / km_per_liter * price_per_liter
+
+vehicle_fuel_stats holds, per vehicle, the km/l observed over the last
+EFFICIENCY_MONTHS (fuel liters logged vs completed-trip distance, both
+read from vehicle_month_rollup) and the litre-weighted fuel price of the
+last PRICE_DAYS, falling back to the fleet-wide price when the vehicle
+has no recent fills. Dispatch loads the row together with the vehicle,
+so estimate() itself never queries.
+
+Where nothing has been observed yet the estimate falls back to the
+vehicle's rated fuel_efficiency_kmpl, then FUEL_KM_PER_LITER[type], and
+to FUEL_PRICE_PER_LITER_DEFAULT; each estimate reports which source it
+used. The write paths refresh the stats of the vehicle they touch and
+the Celery fuel-stats task recomputes every vehicle nightly.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import Expense, Vehicle, VehicleFuelStats, VehicleMonthRollup
+from app.utils.helpers import month_starts
+from app.utils.sql import sum_if
+
+EFFICIENCY_MONTHS = 6
+PRICE_DAYS        = 30
+MIN_LITERS        = 50      # below this, observed km/l is mostly noise
+MIN_DISTANCE_KM   = 200
+KMPL_RANGE        = (0.5, 40.0)
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _observed_kmpl(liters, distance):
+    if liters < MIN_LITERS or distance < MIN_DISTANCE_KM:
+        return None
+    kmpl = distance / liters
+    return round(kmpl, 2) if KMPL_RANGE[0] <= kmpl <= KMPL_RANGE[1] else None
+
+
+def refresh(vehicle_ids=None, today=None):
+    """
+    Recompute and store the fuel stats of the given vehicles (all vehicles
+    when None) — four reads and one upsert. Runs inside the caller's
+    transaction; the caller commits.
+    """
+    today = today or date.today()
+    if vehicle_ids is not None:
+        vehicle_ids = list(vehicle_ids)
+        if not vehicle_ids:
+            return 0
+
+    def scoped(query, column):
+        return query if vehicle_ids is None else query.filter(column.in_(vehicle_ids))
+
+    ids = [vid for (vid,) in scoped(db.session.query(Vehicle.id), Vehicle.id)]
+
+    R = VehicleMonthRollup
+    usage = {vid: (float(liters or 0), float(distance or 0)) for vid, liters, distance in scoped(
+        db.session.query(
+            R.vehicle_id,
+            sum_if(R.fuel_liters, R.expense_type == "fuel"),
+            sum_if(R.distance_km, R.expense_type == R.TRIP),
+        ).filter(R.month >= month_starts(EFFICIENCY_MONTHS, today)[0]),
+        R.vehicle_id,
+    ).group_by(R.vehicle_id)}
+
+    recent_fills = (
+        Expense.expense_type == "fuel",
+        Expense.expense_date >= today - timedelta(days=PRICE_DAYS),
+        Expense.fuel_liters > 0,
+        Expense.fuel_price_per_liter.isnot(None),
+    )
+    spent = func.sum(Expense.fuel_price_per_liter * Expense.fuel_liters)
+    weighted, liters = db.session.query(spent, func.sum(Expense.fuel_liters)).filter(*recent_fills).one()
+    fleet_price = round(float(weighted) / float(liters), 2) if liters else None
+    prices = {vid: round(float(w) / float(l), 2) for vid, w, l in scoped(
+        db.session.query(Expense.vehicle_id, spent, func.sum(Expense.fuel_liters)).filter(*recent_fills),
+        Expense.vehicle_id,
+    ).group_by(Expense.vehicle_id) if l}
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for vid in ids:
+        liters, distance = usage.get(vid, (0.0, 0.0))
+        price = prices.get(vid)
+        rows.append({
+            "vehicle_id": vid,
+            "km_per_liter": _observed_kmpl(liters, distance),
+            "price_per_liter": price if price is not None else fleet_price,
+            "price_source": "vehicle" if price is not None else ("fleet" if fleet_price is not None else None),
+            "fuel_liters": round(liters, 2),
+            "distance_km": round(distance, 2),
+            "computed_at": now,
+        })
+    if rows:
+        _upsert(rows)
+    return len(rows)
+
+
+def _upsert(rows):
+    """
+    Insert or overwrite stats rows keyed on vehicle_id, so concurrent
+    refreshes of the same vehicle do not collide. Rows of deleted vehicles
+    go with them (ON DELETE CASCADE).
+    """
+    table = VehicleFuelStats.__table__
+    make_insert = _INSERTS.get(db.session.get_bind().dialect.name)
+    if make_insert is None:
+        for row in rows:
+            db.session.merge(VehicleFuelStats(**row))
+        return
+    # Core insert: the ORM bulk path splits the batch wherever a column flips between NULL and a value
+    stmt = make_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["vehicle_id"],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "vehicle_id"},
+    )
+    db.session.execute(stmt, rows)
+
+
+def km_per_liter(observed, rated, vehicle_type):
+    """(km/l, source): observed, else the rated figure, else the type default."""
+    if observed:
+        return float(observed), "observed"
+    if rated:
+        return float(rated), "rated"
+    config = current_app.config
+    return config["FUEL_KM_PER_LITER"].get(vehicle_type, config["FUEL_KM_PER_LITER_DEFAULT"]), "type_default"
+
+
+def estimate(vehicle, distance_km):
+    """
+    Fuel-cost estimate for driving `vehicle` distance_km. Reads
+    vehicle.fuel_stats, so load vehicles with joinedload(Vehicle.fuel_stats)
+    to keep this query-free.
+    """
+    config = current_app.config
+    stats  = vehicle.fuel_stats
+
+    kmpl, efficiency_source = km_per_liter(
+        stats.km_per_liter if stats is not None else None, vehicle.fuel_efficiency_kmpl, vehicle.type,
+    )
+
+    if stats is not None and stats.price_per_liter:
+        price, price_source = float(stats.price_per_liter), stats.price_source
+    else:
+        price, price_source = config["FUEL_PRICE_PER_LITER_DEFAULT"], "default"
+
+    liters = float(distance_km) / kmpl
+    return {
+        "estimated_fuel_cost": round(liters * price, 2),
+        "fuel_liters": round(liters, 2),
+        "km_per_liter": kmpl,
+        "price_per_liter": price,
+        "efficiency_source": efficiency_source,
+        "price_source": price_source,
+    }
@@ -0,0 +1,126 @@
+"""
+Dashboard KPI aggregation.
+Builds the whole /dashboard/kpis payload with one conditional-aggregate
+query per table instead of a COUNT/SUM round trip per figure.
+"""
+from datetime import date, timedelta
+from sqlalchemy import func, or_, and_
+
+from app import db
+from app.models import Vehicle, Driver, Trip, VehicleMonthRollup
+from app.utils.sql import count_if, sum_if
+
+
+def fleet_counts():
+    """Vehicles by status plus the service-due count — one query."""
+    row = db.session.query(
+        count_if(Vehicle.status != "retired"),
+        count_if(Vehicle.status == "on_trip"),
+        count_if(Vehicle.status == "in_shop"),
+        count_if(Vehicle.status == "available"),
+        count_if(
+            Vehicle.next_service_km.isnot(None),
+            Vehicle.odometer_km >= Vehicle.next_service_km - 5000,
+        ),
+    ).one()
+    return {
+        "total": row[0], "active": row[1], "in_shop": row[2],
+        "available": row[3], "service_due": row[4],
+    }
+
+
+def license_counts(today=None):
+    """Drivers whose license expires within 30 days / has expired — one query."""
+    today = today or date.today()
+    expiry_threshold = today + timedelta(days=30)
+    row = db.session.query(
+        count_if(Driver.license_expiry <= expiry_threshold, Driver.license_expiry >= today),
+        count_if(Driver.license_expiry < today),
+    ).filter(Driver.license_expiry <= expiry_threshold).one()
+    return {"license_expiring": row[0], "license_expired": row[1]}
+
+
+def trip_counts(today=None):
+    """Pending, in-transit and completed-today trips — one query."""
+    today = today or date.today()
+    tomorrow = today + timedelta(days=1)
+    arrived_today = and_(Trip.actual_arrival >= today, Trip.actual_arrival < tomorrow)
+    row = db.session.query(
+        count_if(Trip.status == "pending"),
+        count_if(Trip.status.in_(["dispatched", "in_transit"])),
+        count_if(Trip.status == "completed", arrived_today),
+    ).filter(or_(
+        Trip.status.in_(["pending", "dispatched", "in_transit"]),
+        and_(Trip.status == "completed", arrived_today),
+    )).one()
+    return {"pending": row[0], "in_transit": row[1], "completed_today": row[2]}
+
+
+def monthly_expense_totals(today=None):
+    """Current-month expense and fuel sums — one query on the monthly rollup."""
+    today = today or date.today()
+    R = VehicleMonthRollup
+    row = db.session.query(
+        sum_if(R.amount, R.expense_type != R.TRIP),
+        sum_if(R.amount, R.expense_type == "fuel"),
+    ).filter(R.month == today.replace(day=1)).one()
+    return {"monthly_expenses": float(row[0]), "monthly_fuel": float(row[1])}
+
+
+def vehicle_status_counts():
+    """Vehicles per status (including retired) plus service-due — one query."""
+    rows = db.session.query(
+        Vehicle.status,
+        func.count(),
+        count_if(
+            Vehicle.next_service_km.isnot(None),
+            Vehicle.odometer_km >= Vehicle.next_service_km - 5000,
+        ),
+    ).group_by(Vehicle.status).all()
+    counts = {status: n for status, n, _ in rows}
+    counts["service_due"] = sum(due for _, _, due in rows)
+    return counts
+
+
+def build_kpis(fleet, licenses, trips, financials):
+    """Assemble the KPI payload from the per-table aggregates."""
+    total, active, in_shop = fleet["total"], fleet["active"], fleet["in_shop"]
+    utilization = round((active / total * 100), 1) if total else 0
+    maintenance_alerts = in_shop + licenses["license_expiring"] + licenses["license_expired"]
+
+    return {
+        "fleet": {
+            "total": total,
+            "active": active,
+            "available": fleet["available"],
+            "in_shop": in_shop,
+            "utilization_pct": utilization,
+        },
+        "alerts": {
+            "total": maintenance_alerts + fleet["service_due"],
+            "in_shop": in_shop,
+            "license_expiring": licenses["license_expiring"],
+            "license_expired": licenses["license_expired"],
+            "service_due": fleet["service_due"],
+        },
+        "trips": {
+            "pending": trips["pending"],
+            "in_transit": trips["in_transit"],
+            "completed_today": trips["completed_today"],
+        },
+        "financials": {
+            "monthly_expenses": financials["monthly_expenses"],
+            "monthly_fuel": financials["monthly_fuel"],
+        },
+    }
+
+
+def compute_kpis():
+    """Full KPI payload in four queries (vehicles, drivers, trips, expenses)."""
+    today = date.today()
+    return build_kpis(
+        fleet_counts(),
+        license_counts(today),
+        trip_counts(today),
+        monthly_expense_totals(today),
+    )
@@ -0,0 +1,214 @@
+"""
+Cargo load planning: pack a shipper's consignments onto the available fleet.
+
+A trip runs one origin -> destination lane, so consignments are grouped by
+lane (case-insensitive) and each lane is packed separately. All lanes draw
+on one pool of dispatchable vehicles. Lanes are packed largest total
+weight first, and consignments heaviest first within a lane:
+
+    first fit     put the consignment in the first open vehicle on its
+                  lane that has room
+    new vehicle   when none has room, take the smallest free vehicle that
+                  can hold the lane's whole remaining weight, or the
+                  largest free vehicle if no single vehicle can
+
+Local improvement then runs in two steps:
+
+    consolidate   empty a lane's least-loaded vehicle into the lane's
+                  other vehicles when everything fits, and free it
+    downsize      swap each loaded vehicle for the smallest free vehicle
+                  that still holds its load
+
+Consignments left over because the pool ran out get one more pass after
+the improvements free capacity. One driver is then assigned per trip,
+safest first, and the heaviest loads get drivers first.
+
+Vehicles and drivers come from the dispatch index (app.services.dispatch),
+so planning issues no queries. A plan is only a proposal.
+POST /trips/load-plan/commit re-validates every trip against locked rows
+and creates them in one transaction.
+"""
+from bisect import bisect_left, insort
+
+from app.services import dispatch
+
+MAX_CONSIGNMENTS = 5_000
+
+
+def _lane(c):
+    return (c["origin"].strip().lower(), c["destination"].strip().lower())
+
+
+class _Pool:
+    """Free vehicles sorted by capacity."""
+
+    def __init__(self, vehicles):
+        self._keys = [(v["capacity_kg"], v["id"]) for v in vehicles]  # already sorted
+        self._by_id = {v["id"]: v for v in vehicles}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def largest(self):
+        return self._keys[-1][0] if self._keys else 0.0
+
+    def take_at_least(self, weight):
+        """Smallest free vehicle with capacity >= weight, or None."""
+        i = bisect_left(self._keys, (weight,))
+        return self._by_id[self._keys.pop(i)[1]] if i < len(self._keys) else None
+
+    def take_largest(self):
+        return self._by_id[self._keys.pop()[1]] if self._keys else None
+
+    def put(self, vehicle):
+        insort(self._keys, (vehicle["capacity_kg"], vehicle["id"]))
+
+
+class _Bin:
+    __slots__ = ("vehicle", "lane", "origin", "destination", "load", "items")
+
+    def __init__(self, vehicle, first):
+        self.vehicle, self.lane = vehicle, _lane(first)
+        self.origin, self.destination = first["origin"], first["destination"]
+        self.load, self.items = 0.0, []
+
+    @property
+    def room(self):
+        return self.vehicle["capacity_kg"] - self.load
+
+    def add(self, item):
+        self.items.append(item)
+        self.load += item["weight_kg"]
+
+
+def _pack_lane(items, bins, pool, leftovers):
+    """First-fit-decreasing of one lane's items into its open bins, opening vehicles as needed."""
+    remaining = sum(c["weight_kg"] for c in items)
+    for c in items:
+        target = next((b for b in bins if b.room >= c["weight_kg"]), None)
+        if target is None:
+            vehicle = pool.take_at_least(remaining) or (
+                pool.take_largest() if pool.largest() >= c["weight_kg"] else None
+            )
+            if vehicle is None:
+                leftovers.append(c)
+                remaining -= c["weight_kg"]
+                continue
+            target = _Bin(vehicle, c)
+            bins.append(target)
+        target.add(c)
+        remaining -= c["weight_kg"]
+
+
+def _consolidate(bins, pool):
+    """Empty the least-loaded bin of each lane into its siblings while everything fits."""
+    by_lane = {}
+    for b in bins:
+        by_lane.setdefault(b.lane, []).append(b)
+    kept = []
+    for lane_bins in by_lane.values():
+        while len(lane_bins) > 1:
+            lane_bins.sort(key=lambda b: b.load)
+            victim, others = lane_bins[0], lane_bins[1:]
+            rooms = [b.room for b in others]
+            moves = []
+            for c in sorted(victim.items, key=lambda c: -c["weight_kg"]):
+                i = next((i for i, r in enumerate(rooms) if r >= c["weight_kg"]), None)
+                if i is None:
+                    break
+                rooms[i] -= c["weight_kg"]
+                moves.append((c, others[i]))
+            if len(moves) < len(victim.items):
+                break
+            for c, b in moves:
+                b.add(c)
+            pool.put(victim.vehicle)
+            lane_bins = others
+        kept.extend(lane_bins)
+    return kept
+
+
+def _downsize(bins, pool):
+    """Swap each bin's vehicle for the smallest free one that still holds its load."""
+    for b in sorted(bins, key=lambda b: -b.vehicle["capacity_kg"]):
+        smaller = pool.take_at_least(b.load)
+        if smaller is None:
+            continue
+        if smaller["capacity_kg"] < b.vehicle["capacity_kg"]:
+            pool.put(b.vehicle)
+            b.vehicle = smaller
+        else:
+            pool.put(smaller)
+
+
+def plan(consignments, departure=None):
+    """
+    Pack consignments ({"ref", "weight_kg", "origin", "destination"}) onto
+    the dispatchable fleet. Returns {"trips", "unassigned", "summary"}.
+    """
+    vehicles, drivers = dispatch.index.snapshot(departure)
+    pool = _Pool(vehicles)
+    max_capacity = pool.largest()
+
+    unassigned, lanes = [], {}
+    for c in consignments:
+        if c["weight_kg"] > max_capacity:
+            unassigned.append({**c, "reason": "Heavier than any available vehicle."})
+        else:
+            lanes.setdefault(_lane(c), []).append(c)
+    for items in lanes.values():
+        items.sort(key=lambda c: -c["weight_kg"])
+
+    bins, leftovers = [], []
+    for items in sorted(lanes.values(), key=lambda items: -sum(c["weight_kg"] for c in items)):
+        lane_bins = []
+        _pack_lane(items, lane_bins, pool, leftovers)
+        bins.extend(lane_bins)
+
+    bins = _consolidate(bins, pool)
+    _downsize(bins, pool)
+    if leftovers:
+        retry = {}
+        for c in leftovers:
+            retry.setdefault(_lane(c), []).append(c)
+        leftovers = []
+        for lane, items in retry.items():
+            lane_bins = [b for b in bins if b.lane == lane]
+            opened = len(lane_bins)
+            _pack_lane(items, lane_bins, pool, leftovers)
+            bins.extend(lane_bins[opened:])
+    unassigned += [{**c, "reason": "No free vehicle left with enough capacity."} for c in leftovers]
+
+    # Heaviest loads get the safest drivers; trips beyond the driver supply are dropped
+    bins.sort(key=lambda b: -b.load)
+    trips = []
+    for b, d in zip(bins, drivers):
+        trips.append({
+            "vehicle_id": b.vehicle["id"],
+            "registration": b.vehicle["registration"],
+            "capacity_kg": b.vehicle["capacity_kg"],
+            "driver_id": d["id"],
+            "driver_name": d["full_name"],
+            "origin": b.origin,
+            "destination": b.destination,
+            "cargo_weight_kg": round(b.load, 2),
+            "utilization": round(b.load / b.vehicle["capacity_kg"], 4),
+            "consignments": [c["ref"] for c in b.items],
+        })
+    for b in bins[len(drivers):]:
+        unassigned += [{**c, "reason": "No driver available."} for c in b.items]
+
+    assigned = sum(len(t["consignments"]) for t in trips)
+    return {
+        "trips": trips,
+        "unassigned": unassigned,
+        "summary": {
+            "consignments": len(consignments),
+            "assigned": assigned,
+            "trips": len(trips),
+            "vehicles_available": len(vehicles),
+            "drivers_available": len(drivers),
+            "assigned_weight_kg": round(sum(t["cargo_weight_kg"] for t in trips), 2),
+            "avg_utilization": round(sum(t["utilization"] for t in trips) / len(trips), 4) if trips else None,
+        },
+    }
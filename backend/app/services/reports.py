@@ -0,0 +1,190 @@
+"""
+Analytics report builders.
+Both reports read the vehicle_month_rollup table (app.services.rollup)
+rather than raw expenses and trips. Monthly P&L is cached per `months`
+value; write paths call invalidate_summaries(). Vehicle ROI is a single
+query over the rollup grouped by vehicle.
+"""
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import func, case, literal
+
+from app import db
+from app.models import Trip, Vehicle, VehicleMonthRollup
+from app.utils.cache import TwoTierCache
+from app.utils.helpers import month_starts, next_month
+from app.utils.sql import sum_if
+
+MAX_SUMMARY_MONTHS = 24
+
+summary_cache = TwoTierCache("analytics", fresh_ttl=300, stale_ttl=3600, l1_ttl=10)
+
+
+def compute_monthly_summary(months, today=None):
+    """Per-month cost and completed-trip totals — one query on the rollup."""
+    if months < 1:
+        return []
+    starts = month_starts(months, today or date.today())
+    first, end = starts[0], next_month(starts[-1])
+
+    R = VehicleMonthRollup
+    totals = {
+        month: (total, fuel, repair, trips)
+        for month, total, fuel, repair, trips in db.session.query(
+            R.month,
+            sum_if(R.amount, R.expense_type != R.TRIP),
+            sum_if(R.amount, R.expense_type == "fuel"),
+            sum_if(R.amount, R.expense_type == "repair"),
+            sum_if(R.trip_count, R.expense_type == R.TRIP),
+        ).filter(R.month >= first, R.month < end).group_by(R.month)
+    }
+
+    results = []
+    for month_start in starts:
+        total_cost, fuel_cost, repair_cost, trips = totals.get(month_start, (0, 0, 0, 0))
+        results.append({
+            "month": month_start.strftime("%b %Y"),
+            "month_short": month_start.strftime("%b"),
+            "total_cost": float(total_cost or 0),
+            "fuel_cost": float(fuel_cost or 0),
+            "repair_cost": float(repair_cost or 0),
+            "trips_completed": int(trips or 0),
+        })
+    return results
+
+
+def monthly_summary(months):
+    return summary_cache.get_or_compute(
+        f"summary:{months}", lambda: compute_monthly_summary(months)
+    )
+
+
+def invalidate_summaries():
+    """Drop every cached summary; called after expense and trip writes."""
+    summary_cache.invalidate(*(f"summary:{m}" for m in range(1, MAX_SUMMARY_MONTHS + 1)))
+
+
+# ── Vehicle ROI ───────────────────────────────────────────────────────────────
+
+ROI_SORT_FIELDS = ("net_roi", "total_cost", "estimated_revenue", "trips_completed",
+                   "total_distance_km", "cost_per_km", "registration")
+
+
+def _revenue_rate():
+    """Per-type revenue/km as a SQL CASE, from REVENUE_PER_KM in the config."""
+    rates   = current_app.config.get("REVENUE_PER_KM") or {}
+    default = current_app.config.get("REVENUE_PER_KM_DEFAULT", 45)
+    if not rates:
+        return literal(default)
+    return case(
+        *((Vehicle.type == vtype, literal(rate)) for vtype, rate in rates.items()),
+        else_=literal(default),
+    )
+
+
+def vehicle_roi_query(sort="net_roi", order="desc"):
+    """
+    One query for the whole fleet: the monthly rollup is grouped by vehicle
+    and outer-joined onto vehicles, so the cost grows with neither the
+    number of vehicles nor the length of the history.
+    """
+    R = VehicleMonthRollup
+    totals = (
+        db.session.query(
+            R.vehicle_id,
+            sum_if(R.amount, R.expense_type != R.TRIP).label("total_cost"),
+            sum_if(R.trip_count, R.expense_type == R.TRIP).label("trips_completed"),
+            sum_if(R.distance_km, R.expense_type == R.TRIP).label("total_distance_km"),
+        )
+        .group_by(R.vehicle_id)
+        .subquery()
+    )
+
+    total_cost = func.coalesce(totals.c.total_cost, 0)
+    trips_done = func.coalesce(totals.c.trips_completed, 0)
+    distance   = func.coalesce(totals.c.total_distance_km, 0)
+    rate       = _revenue_rate()
+    revenue    = distance * rate
+    sort_columns = {
+        "net_roi":           revenue - total_cost,
+        "total_cost":        total_cost,
+        "estimated_revenue": revenue,
+        "trips_completed":   trips_done,
+        "total_distance_km": distance,
+        "cost_per_km":       case((distance > 0, total_cost / distance)),
+        "registration":      Vehicle.registration_number,
+    }
+    column = sort_columns.get(sort, sort_columns["net_roi"])
+    column = column.asc() if order == "asc" else column.desc()
+
+    return (
+        db.session.query(
+            Vehicle.id, Vehicle.registration_number, Vehicle.make, Vehicle.model, Vehicle.type,
+            total_cost.label("total_cost"),
+            trips_done.label("trips_completed"),
+            distance.label("total_distance_km"),
+            rate.label("revenue_per_km"),
+        )
+        .outerjoin(totals, totals.c.vehicle_id == Vehicle.id)
+        .filter(Vehicle.status != "retired")
+        .order_by(column.nullslast(), Vehicle.id)
+    )
+
+
+def roi_row(row):
+    total_cost = float(row.total_cost or 0)
+    total_dist = float(row.total_distance_km or 0)
+    revenue    = total_dist * float(row.revenue_per_km)
+    return {
+        "vehicle_id":        row.id,
+        "registration":      row.registration_number,
+        "make_model":        f"{row.make} {row.model}",
+        "type":              row.type,
+        "total_cost":        total_cost,
+        "estimated_revenue": revenue,
+        "net_roi":           revenue - total_cost,
+        "trips_completed":   int(row.trips_completed or 0),
+        "total_distance_km": total_dist,
+        "revenue_per_km":    float(row.revenue_per_km),
+        "cost_per_km":       round(total_cost / total_dist, 2) if total_dist else None,
+    }
+
+
+# ── Dead assets ───────────────────────────────────────────────────────────────
+
+def dead_assets_query(idle_days, today=None):
+    """
+    Available vehicles whose latest trip (or, with no trips, creation) is
+    at least idle_days old, longest idle first. One query: the latest trip
+    per vehicle is a GROUP BY over idx_trips_vehicle_created.
+    """
+    today = today or date.today()
+    last_trip = (
+        db.session.query(Trip.vehicle_id, func.max(Trip.created_at).label("last_trip_at"))
+        .group_by(Trip.vehicle_id)
+        .subquery()
+    )
+    last_activity = func.coalesce(last_trip.c.last_trip_at, Vehicle.created_at)
+    cutoff = today - timedelta(days=idle_days - 1)  # last_activity.date() <= today - idle_days
+    return (
+        db.session.query(
+            Vehicle.id, Vehicle.registration_number, Vehicle.make, Vehicle.model,
+            last_activity.label("last_activity"),
+        )
+        .outerjoin(last_trip, last_trip.c.vehicle_id == Vehicle.id)
+        .filter(Vehicle.status == "available", last_activity < cutoff)
+        .order_by(last_activity.asc(), Vehicle.id)
+    )
+
+
+def dead_asset_row(row, today=None):
+    today = today or date.today()
+    last_activity = row.last_activity.date()
+    return {
+        "vehicle_id": row.id,
+        "registration": row.registration_number,
+        "make_model": f"{row.make} {row.model}",
+        "idle_days": (today - last_activity).days,
+        "last_activity": last_activity.isoformat(),
+        "recommendation": "Review utilization or reallocate",
+    }
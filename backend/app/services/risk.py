@@ -0,0 +1,270 @@
+"""
+Maintenance risk scoring.
+
+Features for a set of vehicles are loaded with two queries (the vehicle
+rows and one grouped count of maintenance logs in the last 90 days) into
+a pandas frame, and the heuristic is applied to every vehicle at once
+with NumPy. The single-vehicle and fleet endpoints both go through here.
+
+Scores are accumulated in the same order as the original per-vehicle
+heuristic (service distance, service age, repairs, mileage), so the
+floating-point results are identical to it. When a trained model is
+loaded (app.services.risk_model) its batched predict_proba() replaces
+the heuristic probability; the heuristic still supplies the reasons.
+
+The latest prediction per vehicle is stored in vehicle_risk_scores. Write
+paths that change a score input (odometer, service dates, maintenance
+logs) call refresh() for the affected vehicle before committing. The
+daily Celery sweep refreshes every vehicle so the day-based features
+advance. The prediction endpoints only read the table.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import Vehicle, MaintenanceLog, VehicleRiskScore
+from app.services import risk_model
+
+REPAIR_WINDOW_DAYS = 90
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def load_features(vehicle_query, today=None):
+    """
+    Feature frame indexed by vehicle id for the vehicles in vehicle_query:
+    odometer, distance to next service, days since service and the number
+    of maintenance logs in the last 90 days.
+    """
+    today = today or date.today()
+    rows = vehicle_query.with_entities(
+        Vehicle.id, Vehicle.registration_number, Vehicle.make, Vehicle.model, Vehicle.status,
+        Vehicle.odometer_km, Vehicle.next_service_km, Vehicle.last_service_date,
+    ).all()
+    frame = pd.DataFrame(rows, columns=[
+        "vehicle_id", "registration", "make", "model", "status",
+        "odometer_km", "next_service_km", "last_service_date",
+    ]).set_index("vehicle_id")
+    if frame.empty:
+        return frame
+
+    repairs = db.session.query(MaintenanceLog.vehicle_id, func.count()).filter(
+        MaintenanceLog.service_date >= today - timedelta(days=REPAIR_WINDOW_DAYS),
+        MaintenanceLog.vehicle_id.in_(vehicle_query.with_entities(Vehicle.id)),
+    ).group_by(MaintenanceLog.vehicle_id).all()
+
+    odometer = frame["odometer_km"].map(float)
+    next_km  = frame["next_service_km"].map(lambda v: float(v) if v else np.nan)
+    serviced = pd.to_datetime(frame["last_service_date"])
+    return frame.assign(
+        odometer_km=odometer,
+        km_remaining=next_km - odometer,
+        days_since_service=(pd.Timestamp(today) - serviced).dt.days,
+        recent_repairs=pd.Series(dict(repairs), dtype="float64").reindex(frame.index).fillna(0).astype(int),
+    )
+
+
+def score(features):
+    """Vectorized risk probability for every row of a feature frame."""
+    km   = features["km_remaining"].to_numpy(dtype=float)
+    days = features["days_since_service"].to_numpy(dtype=float)
+    reps = features["recent_repairs"].to_numpy()
+    odo  = features["odometer_km"].to_numpy(dtype=float)
+
+    # NaN comparisons are False, so vehicles without the input score 0 for it
+    with np.errstate(invalid="ignore"):
+        service_km = np.select([km <= 0, km <= 2000, km <= 5000], [0.40, 0.30, 0.15], 0.0)
+        service_age = np.select([days > 180, days > 90], [0.25, 0.10], 0.0)
+    repairs = np.select([reps >= 3, reps >= 2], [0.20, 0.10], 0.0)
+    mileage = np.where(odo > 200000, 0.10, 0.0)
+
+    total = np.zeros(len(features))
+    for part in (service_km, service_age, repairs, mileage):
+        total += part
+    return np.minimum(total, 1.0)
+
+
+def _reasons(row):
+    reasons = []
+    km = row.km_remaining
+    if not np.isnan(km):
+        if km <= 0:
+            reasons.append("Overdue for service")
+        elif km <= 2000:
+            reasons.append(f"Only {km:.0f}km until next service")
+        elif km <= 5000:
+            reasons.append(f"{km:.0f}km to next service")
+    days = row.days_since_service
+    if not np.isnan(days):
+        if days > 180:
+            reasons.append(f"No service in {int(days)} days")
+        elif days > 90:
+            reasons.append(f"Last serviced {int(days)} days ago")
+    if row.recent_repairs >= 3:
+        reasons.append(f"{row.recent_repairs} repairs in last 90 days")
+    if row.odometer_km > 200000:
+        reasons.append("High mileage vehicle (>200k km)")
+    return reasons
+
+
+def prediction(probability, reasons):
+    """Risk level, action and horizon for a probability in [0, 1]."""
+    if probability >= 0.7:
+        risk, action, days_est = "high", "Schedule immediate service", 3
+    elif probability >= 0.4:
+        risk, action, days_est = "medium", "Service recommended within 2 weeks", 14
+    else:
+        risk, action, days_est = "low", "Vehicle is healthy", None
+    return {
+        "risk_level": risk,
+        "probability": round(probability, 3),
+        "recommended_action": action,
+        "estimated_days": days_est,
+        "reasons": reasons,
+    }
+
+
+def predict(vehicle_query, today=None):
+    """
+    Score every vehicle in vehicle_query. Returns ({vehicle_id: (features
+    row, prediction)}, model) where model is the version used or "heuristic".
+    """
+    today    = today or date.today()
+    features = load_features(vehicle_query, today)
+    version  = risk_model.active_version()
+    if features.empty:
+        return {}, version or "heuristic"
+    if version:
+        model_features = risk_model.snapshot_features(today, vehicle_query).reindex(features.index)
+        probabilities  = risk_model.predict_proba(model_features)
+    else:
+        probabilities = score(features)
+    return {
+        row.Index: (row, prediction(float(p), _reasons(row)))
+        for row, p in zip(features.itertuples(), probabilities)
+    }, version or "heuristic"
+
+
+def refresh(vehicle_ids=None, today=None):
+    """
+    Recompute and store the scores of the given vehicles (all vehicles when
+    None). Runs inside the caller's transaction; the caller commits.
+    """
+    query = Vehicle.query
+    if vehicle_ids is not None:
+        vehicle_ids = list(vehicle_ids)
+        if not vehicle_ids:
+            return 0
+        query = query.filter(Vehicle.id.in_(vehicle_ids))
+    scored, model = predict(query, today)
+
+    # Scores of deleted vehicles; the rest are overwritten in place
+    gone = db.session.query(VehicleRiskScore).filter(
+        ~VehicleRiskScore.vehicle_id.in_(db.session.query(Vehicle.id)))
+    if vehicle_ids is not None:
+        gone = gone.filter(VehicleRiskScore.vehicle_id.in_(vehicle_ids))
+    gone.delete(synchronize_session=False)
+
+    now  = datetime.now(timezone.utc)
+    rows = [{
+        "vehicle_id": vehicle_id,
+        "probability": pred["probability"],
+        "risk_level": pred["risk_level"],
+        "recommended_action": pred["recommended_action"],
+        "estimated_days": pred["estimated_days"],
+        "reasons": pred["reasons"],
+        "model_version": model,
+        "computed_at": now,
+    } for vehicle_id, (_, pred) in scored.items()]
+    if rows:
+        _upsert(rows)
+    return len(scored)
+
+
+def _upsert(rows):
+    """
+    Insert or overwrite score rows keyed on vehicle_id (one executemany
+    upsert), so concurrent refreshes of the same vehicle do not collide.
+    """
+    table = VehicleRiskScore.__table__
+    make_insert = _INSERTS.get(db.session.get_bind().dialect.name)
+    if make_insert is None:
+        for row in rows:
+            db.session.merge(VehicleRiskScore(**row))
+        return
+    stmt = make_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["vehicle_id"],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "vehicle_id"},
+    )
+    db.session.execute(stmt, rows)
+
+
+def ensure_scored():
+    """Score vehicles that have no stored row yet (one anti-join query when none are missing)."""
+    missing = [vid for (vid,) in db.session.query(Vehicle.id).outerjoin(
+        VehicleRiskScore, VehicleRiskScore.vehicle_id == Vehicle.id,
+    ).filter(VehicleRiskScore.vehicle_id.is_(None))]
+    if missing:
+        refresh(missing)
+        db.session.commit()
+
+
+def stored_predictions(levels=None, order="desc"):
+    """Rows of stored scores for non-retired vehicles, filtered and sorted in SQL."""
+    S = VehicleRiskScore
+    q = db.session.query(
+        S.vehicle_id, Vehicle.registration_number, Vehicle.make, Vehicle.model, Vehicle.status,
+        S.probability, S.risk_level, S.recommended_action, S.estimated_days, S.reasons,
+        S.model_version, S.computed_at,
+    ).join(Vehicle, Vehicle.id == S.vehicle_id).filter(Vehicle.status != "retired")
+    if levels:
+        q = q.filter(S.risk_level.in_(levels))
+    return q.order_by(S.probability.asc() if order == "asc" else S.probability.desc(),
+                      Vehicle.registration_number)
+
+
+def stored_prediction(score):
+    """Prediction payload from a stored score (model instance or result row)."""
+    return {
+        "risk_level": score.risk_level,
+        "probability": float(score.probability),
+        "recommended_action": score.recommended_action,
+        "estimated_days": score.estimated_days,
+        "reasons": score.reasons,
+        "model": score.model_version,
+        "computed_at": score.computed_at.isoformat() if score.computed_at else None,
+    }
+
+
+def fleet_row(row):
+    return {
+        "vehicle_id": row.vehicle_id,
+        "registration": row.registration_number,
+        "make_model": f"{row.make} {row.model}",
+        "current_status": row.status,
+        "prediction": stored_prediction(row),
+    }
+
+
+def fleet_predictions(today=None):
+    """Freshly computed predictions for every non-retired vehicle, highest risk first."""
+    scored, _ = predict(Vehicle.query.filter(Vehicle.status != "retired"), today)
+    results = [{
+        "vehicle_id": vehicle_id,
+        "registration": row.registration,
+        "make_model": f"{row.make} {row.model}",
+        "current_status": row.status,
+        "prediction": pred,
+    } for vehicle_id, (row, pred) in scored.items()]
+    results.sort(key=lambda x: x["prediction"]["probability"], reverse=True)
+    return results
+
+
+def vehicle_prediction(vehicle_id, today=None):
+    """Freshly computed prediction for one vehicle, or None if it does not exist."""
+    scored, _ = predict(Vehicle.query.filter(Vehicle.id == vehicle_id), today)
+    return scored[vehicle_id][1] if vehicle_id in scored else None
@@ -0,0 +1,318 @@
+"""
+Trained maintenance-risk model.
+
+Training (train_risk_model.py) takes monthly snapshots of the fleet. Each
+snapshot holds the features every vehicle had on a cutoff date, and its
+label is whether the vehicle went in for maintenance within the following
+horizon. A RandomForest is fitted on the snapshots and written to a
+versioned directory in the model registry:
+
+    MODEL_REGISTRY_DIR/
+        LATEST                       name of the active version
+        risk-rf-20261017T120000Z/
+            model.joblib
+            meta.json                features, metrics, training parameters
+
+Serving uses the same snapshot_features() with today as the cutoff, so
+training and inference cannot drift apart. Each worker loads the latest
+version once in create_app(); app.services.risk scores with it through
+predict_proba() and falls back to the heuristic when no model is loaded.
+"""
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import precision_score, recall_score, roc_auc_score
+from sqlalchemy import func, or_
+
+from app import db
+from app.models import Vehicle, Trip, MaintenanceLog
+from app.utils.sql import count_if, sum_if
+
+FEATURES = [
+    "km_remaining", "days_since_service", "recent_repairs", "odometer_km",
+    "trips_90d", "km_90d", "vehicle_age_days", "capacity_kg",
+]
+WINDOW_DAYS = 90
+BATCH_SIZE  = 10_000
+
+_active = {"model": None, "meta": None}
+
+
+# ── Features ──────────────────────────────────────────────────────────────────
+
+def snapshot_features(as_of, vehicle_query=None):
+    """
+    FEATURES for every vehicle in vehicle_query (default: all) as they stood
+    on as_of — four queries. Odometers are wound back by the distance of
+    trips completed on or after as_of, and for a past as_of the service
+    target is the one in force then (see _service_targets).
+    """
+    vehicle_query = vehicle_query if vehicle_query is not None else Vehicle.query
+    window_start  = as_of - timedelta(days=WINDOW_DAYS)
+    ids = vehicle_query.with_entities(Vehicle.id)
+
+    vehicles = pd.DataFrame(vehicle_query.with_entities(
+        Vehicle.id, Vehicle.odometer_km, Vehicle.next_service_km,
+        Vehicle.last_service_date, Vehicle.capacity_kg, Vehicle.created_at,
+    ).all(), columns=["vehicle_id", "odometer_km", "next_service_km",
+                      "last_service_date", "capacity_kg", "created_at"]).set_index("vehicle_id")
+    if vehicles.empty:
+        return pd.DataFrame(columns=FEATURES)
+
+    logs = pd.DataFrame(db.session.query(
+        MaintenanceLog.vehicle_id,
+        func.max(MaintenanceLog.service_date),
+        count_if(MaintenanceLog.service_date >= window_start),
+    ).filter(
+        MaintenanceLog.service_date < as_of,
+        MaintenanceLog.vehicle_id.in_(ids),
+    ).group_by(MaintenanceLog.vehicle_id).all(),
+        columns=["vehicle_id", "last_log", "recent_repairs"]).set_index("vehicle_id")
+
+    in_window = Trip.actual_arrival < as_of
+    trips = pd.DataFrame(db.session.query(
+        Trip.vehicle_id,
+        count_if(in_window),
+        sum_if(Trip.distance_km, in_window),
+        sum_if(Trip.distance_km, Trip.actual_arrival >= as_of),
+    ).filter(
+        Trip.status == "completed",
+        Trip.actual_arrival >= window_start,
+        Trip.vehicle_id.in_(ids),
+    ).group_by(Trip.vehicle_id).all(),
+        columns=["vehicle_id", "trips_90d", "km_90d", "km_after"]).set_index("vehicle_id")
+
+    frame = vehicles.join(logs).join(trips)
+    if as_of < date.today():
+        frame["next_service_km"] = _service_targets(frame["next_service_km"], as_of, ids)
+    as_of_ts = pd.Timestamp(as_of)
+    odometer = frame["odometer_km"].astype(float) - frame["km_after"].astype(float).fillna(0)
+
+    # Last service before the cutoff: latest log, else the vehicle's own date if it is older
+    own_date = pd.to_datetime(frame["last_service_date"])
+    own_date = own_date.where(own_date < as_of_ts)
+    serviced = pd.to_datetime(frame["last_log"]).fillna(own_date)
+    created  = pd.to_datetime(frame["created_at"], utc=True).dt.tz_localize(None).dt.normalize()
+
+    features = pd.DataFrame({
+        "km_remaining": frame["next_service_km"].astype(float) - odometer,
+        "days_since_service": (as_of_ts - serviced).dt.days,
+        "recent_repairs": frame["recent_repairs"],
+        "odometer_km": odometer,
+        "trips_90d": frame["trips_90d"],
+        "km_90d": frame["km_90d"],
+        "vehicle_age_days": (as_of_ts - created).dt.days,
+        "capacity_kg": frame["capacity_kg"],
+    }, index=frame.index)
+    features[["recent_repairs", "trips_90d", "km_90d"]] = (
+        features[["recent_repairs", "trips_90d", "km_90d"]].astype(float).fillna(0)
+    )
+    # Unknown service distance/age stay NaN; the forest routes missing values itself
+    return features.astype(float)[FEATURES]
+
+
+def _service_targets(current, as_of, ids):
+    """
+    next_service_km as it stood on as_of. create_maintenance overwrites the
+    vehicle's target with the log's, so the current value would leak the
+    label: it is the target of the latest log before as_of, else the
+    vehicle's own value if no later log replaced it, else unknown (NaN).
+    """
+    logs = pd.DataFrame(db.session.query(
+        MaintenanceLog.vehicle_id, MaintenanceLog.service_date, MaintenanceLog.next_service_km,
+    ).filter(
+        MaintenanceLog.next_service_km.isnot(None),
+        MaintenanceLog.vehicle_id.in_(ids),
+    ).order_by(MaintenanceLog.service_date, MaintenanceLog.created_at).all(),
+        columns=["vehicle_id", "service_date", "next_service_km"])
+    before   = logs["service_date"] < as_of
+    in_force = logs[before].groupby("vehicle_id")["next_service_km"].last()
+    replaced = current.index.isin(logs.loc[~before, "vehicle_id"].unique())
+    targets  = current.astype(float).where(~replaced)
+    return in_force.astype(float).reindex(current.index).fillna(targets)
+
+
+def serviced_between(start, end):
+    """Vehicle ids with a maintenance log dated in [start, end)."""
+    return {vid for (vid,) in db.session.query(MaintenanceLog.vehicle_id).filter(
+        MaintenanceLog.service_date >= start,
+        MaintenanceLog.service_date < end,
+    ).distinct()}
+
+
+def in_service(as_of):
+    """Vehicles not yet retired on as_of (rows retired before retired_at existed use updated_at)."""
+    return or_(Vehicle.status != "retired",
+               func.coalesce(Vehicle.retired_at, Vehicle.updated_at) > as_of)
+
+
+def training_set(today=None, cutoffs=12, step_days=30, horizon_days=30):
+    """
+    Labelled snapshots, newest first: features on each cutoff date and
+    whether the vehicle was serviced within horizon_days after it.
+    """
+    today = today or date.today()
+    frames = []
+    for k in range(cutoffs):
+        as_of = today - timedelta(days=horizon_days + k * step_days)
+        features = snapshot_features(as_of, Vehicle.query.filter(
+            Vehicle.created_at < as_of, in_service(as_of),
+        ))
+        if features.empty:
+            continue
+        serviced = serviced_between(as_of, as_of + timedelta(days=horizon_days))
+        frames.append(features.assign(
+            as_of=as_of,
+            label=features.index.isin(list(serviced)).astype(int),
+        ))
+    if not frames:
+        return pd.DataFrame(columns=FEATURES + ["as_of", "label"])
+    return pd.concat(frames)
+
+
+# ── Training ──────────────────────────────────────────────────────────────────
+
+def _forest(n_estimators, max_depth):
+    return RandomForestClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, min_samples_leaf=5,
+        class_weight="balanced", n_jobs=-1, random_state=7,
+    )
+
+
+def train(registry, today=None, cutoffs=12, step_days=30, horizon_days=30,
+          n_estimators=200, max_depth=10):
+    """
+    Fit a model on the labelled snapshots and save it as a new registry
+    version. The newest snapshot is held out to report metrics, then the
+    model is refitted on every snapshot. Returns (version, meta).
+    """
+    data = training_set(today, cutoffs, step_days, horizon_days)
+    if data.empty or data["label"].nunique() < 2:
+        raise ValueError("Not enough labelled history to train the risk model.")
+
+    newest = data["as_of"].max()
+    train_part, holdout = data[data["as_of"] < newest], data[data["as_of"] == newest]
+    metrics = {}
+    if not train_part.empty and train_part["label"].nunique() == 2 and holdout["label"].nunique() == 2:
+        model = _forest(n_estimators, max_depth).fit(train_part[FEATURES].to_numpy(), train_part["label"])
+        proba = model.predict_proba(holdout[FEATURES].to_numpy())[:, 1]
+        predicted = proba >= 0.5
+        metrics = {
+            "holdout_as_of": newest.isoformat(),
+            "holdout_rows": int(len(holdout)),
+            "roc_auc": round(float(roc_auc_score(holdout["label"], proba)), 4),
+            "precision": round(float(precision_score(holdout["label"], predicted, zero_division=0)), 4),
+            "recall": round(float(recall_score(holdout["label"], predicted, zero_division=0)), 4),
+        }
+
+    model = _forest(n_estimators, max_depth).fit(data[FEATURES].to_numpy(), data["label"])
+    meta = {
+        "features": FEATURES,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "rows": int(len(data)),
+        "positive_rate": round(float(data["label"].mean()), 4),
+        "params": {"cutoffs": cutoffs, "step_days": step_days, "horizon_days": horizon_days,
+                   "n_estimators": n_estimators, "max_depth": max_depth},
+        "metrics": metrics,
+        "sklearn_version": sklearn.__version__,
+    }
+    version = registry.save(model, meta)
+    return version, {**meta, "version": version}
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+class ModelRegistry:
+    """Versioned model directories under one root, with a LATEST pointer."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, d, "model.joblib")))
+
+    def latest(self):
+        pointer = os.path.join(self.root, "LATEST")
+        if os.path.isfile(pointer):
+            with open(pointer) as f:
+                version = f.read().strip()
+            if version in self.versions():
+                return version
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def save(self, model, meta):
+        version = "risk-rf-" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        path = os.path.join(self.root, version)
+        os.makedirs(path)
+        joblib.dump(model, os.path.join(path, "model.joblib"))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({**meta, "version": version}, f, indent=2)
+        tmp = os.path.join(self.root, "LATEST.tmp")
+        with open(tmp, "w") as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self.root, "LATEST"))
+        return version
+
+    def load(self, version=None):
+        """(model, meta) for a version (default: latest), or None if the registry is empty."""
+        version = version or self.latest()
+        if version is None:
+            return None
+        path = os.path.join(self.root, version)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        return joblib.load(os.path.join(path, "model.joblib")), meta
+
+
+# ── Serving ───────────────────────────────────────────────────────────────────
+
+def init_app(app):
+    """Load the active model version once for this worker process."""
+    _active["model"] = _active["meta"] = None
+    if not app.config.get("RISK_MODEL_ENABLED", True):
+        return
+    try:
+        loaded = ModelRegistry(app.config["MODEL_REGISTRY_DIR"]).load(app.config.get("RISK_MODEL_VERSION"))
+    except Exception:
+        app.logger.exception("Could not load the risk model; using the heuristic")
+        return
+    if loaded is None:
+        return
+    model, meta = loaded
+    if meta.get("features") != FEATURES:
+        app.logger.warning("Risk model %s was trained on other features; using the heuristic",
+                           meta.get("version"))
+        return
+    # Requests are already served in parallel; a forest fanning out over every core per call would oversubscribe
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+    _active["model"], _active["meta"] = model, meta
+    app.logger.info("Loaded risk model %s", meta.get("version"))
+
+
+def active_version():
+    """Version string of the loaded model, or None when scoring falls back to the heuristic."""
+    return _active["meta"]["version"] if _active["model"] is not None else None
+
+
+def predict_proba(features):
+    """Probability of maintenance within the horizon for each row, in batches."""
+    model = _active["model"]
+    X = features[FEATURES].to_numpy(dtype=float)
+    positive = list(model.classes_).index(1) if 1 in model.classes_ else None
+    if positive is None:
+        return np.zeros(len(X))
+    return np.concatenate([
+        model.predict_proba(X[start:start + BATCH_SIZE])[:, positive]
+        for start in range(0, len(X), BATCH_SIZE)
+    ]) if len(X) else np.zeros(0)
@@ -0,0 +1,151 @@
+"""
+Monthly per-vehicle cost rollup.
+
+vehicle_month_rollup holds one row per (vehicle, calendar month, expense
+type) with the amount, fuel liters and entry count; completed trips are
+kept in the "trip" row as trip_count / distance_km. Analytics read these
+rows instead of scanning expenses and trips, so their cost follows the
+number of vehicles and months, not the length of the history.
+
+The write paths call record_expense() / record_trip() in the same
+transaction as the row they describe, so the rollup commits (or rolls
+back) together with it. rebuild() recomputes the table from scratch
+under an EXCLUSIVE table lock and is run by the Celery rollup task and
+the seed script.
+"""
+from datetime import date, datetime
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import Trip, Expense, VehicleMonthRollup
+from app.utils.sql import lock_table, year_month
+
+TRIP = VehicleMonthRollup.TRIP
+_KEY = ("vehicle_id", "month", "expense_type")
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _month(d):
+    """First day of the calendar month containing a date or datetime."""
+    if isinstance(d, datetime):
+        d = d.date()
+    return d.replace(day=1)
+
+
+def _first_of(year, month):
+    return date(int(year), int(month), 1)
+
+
+def _increment(vehicle_id, month, expense_type, **amounts):
+    """Add amounts onto a rollup row, creating it if needed (one upsert)."""
+    table   = VehicleMonthRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    make_insert = _INSERTS.get(dialect)
+
+    if make_insert is None:
+        row = db.session.get(VehicleMonthRollup, (vehicle_id, month, expense_type))
+        if row is None:
+            row = VehicleMonthRollup(vehicle_id=vehicle_id, month=month, expense_type=expense_type)
+            db.session.add(row)
+        for column, value in amounts.items():
+            setattr(row, column, (getattr(row, column) or 0) + value)
+        return
+
+    stmt = make_insert(table).values(vehicle_id=vehicle_id, month=month,
+                                     expense_type=expense_type, **amounts)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={column: table.c[column] + stmt.excluded[column] for column in amounts},
+    )
+    db.session.execute(stmt)
+
+
+def record_expense(expense):
+    """Fold a new expense into its month; call before the commit."""
+    _increment(
+        expense.vehicle_id, _month(expense.expense_date), expense.expense_type,
+        amount=expense.amount,
+        fuel_liters=expense.fuel_liters or 0,
+        expense_count=1,
+    )
+
+
+def record_trip(trip):
+    """Fold a trip that just completed into its arrival month; call before the commit."""
+    _increment(
+        trip.vehicle_id, _month(trip.actual_arrival), TRIP,
+        trip_count=1,
+        distance_km=trip.distance_km or 0,
+    )
+
+
+def record_trips(trips):
+    """record_trip() for many completed trips, summed per vehicle and month in one executemany upsert."""
+    totals = {}
+    for trip in trips:
+        key = (trip.vehicle_id, _month(trip.actual_arrival))
+        count, distance = totals.get(key, (0, 0))
+        totals[key] = (count + 1, distance + (trip.distance_km or 0))
+    if not totals:
+        return
+
+    make_insert = _INSERTS.get(db.session.get_bind().dialect.name)
+    if make_insert is None:
+        for (vehicle_id, month), (count, distance) in totals.items():
+            _increment(vehicle_id, month, TRIP, trip_count=count, distance_km=distance)
+        return
+    table = VehicleMonthRollup.__table__
+    stmt  = make_insert(table)
+    stmt  = stmt.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={column: table.c[column] + stmt.excluded[column] for column in ("trip_count", "distance_km")},
+    )
+    db.session.execute(stmt, [
+        {"vehicle_id": vehicle_id, "month": month, "expense_type": TRIP, "amount": 0, "fuel_liters": 0,
+         "expense_count": 0, "trip_count": count, "distance_km": distance}
+        for (vehicle_id, month), (count, distance) in totals.items()
+    ])
+
+
+def rebuild():
+    """
+    Recompute the whole table from expenses and completed trips (two grouped
+    reads). The table is locked first, so record_expense() / record_trip()
+    calls wait for the swap instead of adding onto rows it then replaces.
+    """
+    lock_table(db.session, VehicleMonthRollup.__table__)
+    exp_year, exp_month = year_month(Expense.expense_date)
+    expense_rows = [
+        {
+            "vehicle_id": vehicle_id, "month": _first_of(y, m), "expense_type": expense_type,
+            "amount": amount or 0, "fuel_liters": liters or 0, "expense_count": n,
+            "trip_count": 0, "distance_km": 0,
+        }
+        for vehicle_id, y, m, expense_type, amount, liters, n in db.session.query(
+            Expense.vehicle_id, exp_year, exp_month, Expense.expense_type,
+            func.sum(Expense.amount), func.sum(Expense.fuel_liters), func.count(),
+        ).group_by(Expense.vehicle_id, exp_year, exp_month, Expense.expense_type)
+    ]
+
+    trip_year, trip_month = year_month(Trip.actual_arrival)
+    trip_rows = [
+        {
+            "vehicle_id": vehicle_id, "month": _first_of(y, m), "expense_type": TRIP,
+            "amount": 0, "fuel_liters": 0, "expense_count": 0,
+            "trip_count": n, "distance_km": distance or 0,
+        }
+        for vehicle_id, y, m, n, distance in db.session.query(
+            Trip.vehicle_id, trip_year, trip_month, func.count(), func.sum(Trip.distance_km),
+        ).filter(
+            Trip.status == "completed",
+            Trip.actual_arrival.isnot(None),
+        ).group_by(Trip.vehicle_id, trip_year, trip_month)
+    ]
+
+    db.session.query(VehicleMonthRollup).delete()
+    rows = expense_rows + trip_rows
+    for start in range(0, len(rows), 5_000):
+        db.session.execute(insert(VehicleMonthRollup), rows[start:start + 5_000])
+    db.session.commit()
+    return {"rows": len(rows), "expense_rows": len(expense_rows), "trip_rows": len(trip_rows)}
@@ -0,0 +1,179 @@
+"""
+Multi-stop route optimization over locally stored locations.
+
+Stops are matched by name against the locations table (lower-cased text
+before the first comma, so "Surat, Gujarat" is "surat"). Distances come
+from one matrix built per request:
+
+    great circle   haversine between coordinates x ROAD_FACTOR, the usual
+                   ratio of road to straight-line distance
+    stored         location_distances rows replace the estimate for the
+                   pairs they cover
+
+The matrix is symmetric. No routing service is called.
+
+The origin is fixed first. The destination is fixed last when given, the
+route returns to the origin when return_to_origin is set, and otherwise
+the route ends at whichever stop is visited last. Ordering runs in two
+passes:
+
+    nearest neighbour   from the origin, always drive to the closest
+                        unvisited stop
+    2-opt               reverse the stretch of route between positions i
+                        and j when that shortens it. For each i every j is
+                        scored at once with numpy. Passes repeat until none
+                        improves or TIME_BUDGET runs out
+
+An open-ended route gets a dummy end node at distance 0 from every stop,
+so 2-opt can treat it like a fixed destination.
+"""
+import time
+
+import numpy as np
+
+from app import db
+from app.models import Location, LocationDistance
+from app.services import fuel
+
+ROAD_FACTOR  = 1.3      # road km per great-circle km
+EARTH_KM     = 6371.0
+MAX_STOPS    = 500
+TIME_BUDGET  = 2.0      # seconds of 2-opt per request
+MAX_PASSES   = 100
+
+
+class UnknownLocations(ValueError):
+    """Raised with the stop names that match no stored location."""
+
+    def __init__(self, names):
+        super().__init__(f"Unknown locations: {', '.join(names)}")
+        self.names = names
+
+
+def location_key(name):
+    return (name or "").split(",")[0].strip().lower()
+
+
+def resolve(names):
+    """{key: Location} for `names` (one query). Raises UnknownLocations for names with no match."""
+    keys = {location_key(n) for n in names} - {""}
+    found = {loc.key: loc for loc in Location.query.filter(Location.key.in_(keys)).all()} if keys else {}
+    unknown = list(dict.fromkeys(n for n in names if location_key(n) not in found))
+    if unknown:
+        raise UnknownLocations(unknown)
+    return found
+
+
+def distance_matrix(locations):
+    """Symmetric road-distance estimates (km) between `locations`, overridden by stored distances."""
+    lat = np.radians([float(loc.latitude) for loc in locations])
+    lon = np.radians([float(loc.longitude) for loc in locations])
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    d = 2 * EARTH_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) * ROAD_FACTOR
+
+    position = {loc.id: i for i, loc in enumerate(locations)}
+    if len(position) > 1:
+        stored = db.session.query(
+            LocationDistance.from_id, LocationDistance.to_id, LocationDistance.distance_km,
+        ).filter(LocationDistance.from_id.in_(position), LocationDistance.to_id.in_(position)).all()
+        for from_id, to_id, km in stored:
+            i, j = position[from_id], position[to_id]
+            d[i, j] = d[j, i] = float(km)
+    return d
+
+
+def path_length(d, tour):
+    tour = np.asarray(tour)
+    return float(d[tour[:-1], tour[1:]].sum())
+
+
+def nearest_neighbour(d, start, end):
+    """Greedy path start -> ... -> end over every node of `d`."""
+    visited = np.zeros(len(d), dtype=bool)
+    visited[[start, end]] = True
+    tour, current = [start], start
+    for _ in range(len(d) - int(visited.sum())):
+        current = int(np.where(visited, np.inf, d[current]).argmin())
+        visited[current] = True
+        tour.append(current)
+    tour.append(end)
+    return tour
+
+
+def two_opt(d, tour, deadline=None):
+    """Improve a path with fixed endpoints by segment reversals; returns the new tour."""
+    t = np.array(tour)
+    n = len(t)
+    for _ in range(MAX_PASSES):
+        improved = False
+        for i in range(1, n - 2):
+            # Reverse t[i..j]: edges (t[i-1], t[i]) and (t[j], t[j+1]) become (t[i-1], t[j]) and (t[i], t[j+1])
+            a, b = t[i - 1], t[i]
+            c, e = t[i + 1:n - 1], t[i + 2:n]
+            delta = d[a, c] + d[b, e] - d[a, b] - d[c, e]
+            k = int(delta.argmin())
+            if delta[k] < -1e-9:
+                j = i + 1 + k
+                t[i:j + 1] = t[i:j + 1][::-1]
+                improved = True
+        if not improved or (deadline is not None and time.monotonic() > deadline):
+            break
+    return t.tolist()
+
+
+def optimize(origin, stops, destination=None, return_to_origin=False, vehicle=None, improve=True):
+    """
+    Order `stops` between `origin` and the optional `destination`.
+    Duplicate stops, and stops naming the origin or destination, are
+    dropped. Returns the ordered route with leg and cumulative distances,
+    the total, the same total for the stops in input order, and a fuel
+    estimate when `vehicle` is given. Raises UnknownLocations.
+    """
+    if destination and return_to_origin:
+        raise ValueError("Give a destination or return_to_origin, not both.")
+    ends = [origin] + ([destination] if destination else [])
+    known = resolve(ends + list(stops))
+
+    end_keys = {location_key(n) for n in ends}
+    ordered_keys = list(dict.fromkeys(k for k in map(location_key, stops) if k not in end_keys))
+    nodes = [known[location_key(origin)]] + [known[k] for k in ordered_keys]
+    if destination:
+        nodes.append(known[location_key(destination)])
+    d = distance_matrix(nodes)
+
+    start = 0
+    if destination:
+        end = len(nodes) - 1
+    elif return_to_origin:
+        end = 0
+    else:
+        # Dummy end node, free to follow any stop
+        d = np.pad(d, ((0, 1), (0, 1)))
+        end = len(nodes)
+    given = [start] + list(range(1, len(ordered_keys) + 1)) + [end]
+
+    tour = nearest_neighbour(d, start, end)
+    greedy_km = path_length(d, tour)
+    if improve:
+        tour = two_opt(d, tour, time.monotonic() + TIME_BUDGET)
+    if end == len(nodes):
+        tour, given = tour[:-1], given[:-1]
+
+    route, total = [], 0.0
+    for seq, (prev, node) in enumerate(zip([None] + tour[:-1], tour)):
+        leg = float(d[prev, node]) if prev is not None else 0.0
+        total += leg
+        loc = nodes[node]
+        route.append({"sequence": seq, "name": loc.name, "location_id": loc.id,
+                      "leg_km": round(leg, 2), "cumulative_km": round(total, 2)})
+
+    return {
+        "route": route,
+        "stops": len(ordered_keys),
+        "distance_km": round(total, 2),
+        "input_order_km": round(path_length(d, given), 2),
+        "nearest_neighbour_km": round(greedy_km, 2),
+        "fuel_estimate": fuel.estimate(vehicle, total) if vehicle is not None and total else None,
+    }
@@ -0,0 +1,127 @@
+"""
+Ranked fuzzy search over trips, vehicles and drivers.
+
+Matching uses trigrams (pg_trgm). A term matches a column when the column
+contains it as a substring, or when its word similarity to the column
+reaches WORD_SIMILARITY: the share of the term's trigrams found in the
+closest stretch of the column. That tolerates typos ("Ahmdabad" finds
+Ahmedabad). Results rank by the best word similarity over the entity's
+columns.
+
+    PostgreSQL   the pg_trgm operators `<%` and ILIKE are both served by
+                 the GIN gin_trgm_ops indexes on the searched columns, so
+                 no sequential scan is needed
+    SQLite       init_app registers similarity() and word_similarity() as
+                 Python functions on every connection, so the same ranked
+                 queries run in the testing config (as full scans)
+"""
+import re
+from functools import lru_cache
+
+from sqlalchemy import event, func, literal, or_, text
+
+from app import db
+from app.models import Driver, Trip, Vehicle
+
+WORD_SIMILARITY = 0.5
+MAX_LIMIT       = 50
+MIN_TERM        = 2
+
+ENTITIES = {
+    "trips":    (Trip,    ("origin", "destination")),
+    "vehicles": (Vehicle, ("registration_number", "make", "model")),
+    "drivers":  (Driver,  ("full_name", "license_number")),
+}
+
+
+# ── Trigrams (SQLite fallback) ────────────────────────────────────────────────
+
+def words(value):
+    """The lower-cased alphanumeric words pg_trgm builds trigrams from."""
+    return re.findall(r"[0-9a-z]+", (value or "").lower())
+
+
+def searchable(term):
+    """True when the term has at least MIN_TERM letters or digits; punctuation alone matches nothing useful."""
+    return len("".join(words(term))) >= MIN_TERM
+
+
+@lru_cache(maxsize=65_536)
+def trigrams(value):
+    """pg_trgm's trigram set: lower-cased words padded with two leading and one trailing space."""
+    grams = set()
+    for word in words(value):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a, b):
+    ta, tb = trigrams(a), trigrams(b)
+    union = len(ta | tb)
+    return len(ta & tb) / union if union else 0.0
+
+
+def word_similarity(term, value):
+    """Share of the term's trigrams present in value (pg_trgm's word_similarity, without the extent search)."""
+    tt = trigrams(term)
+    return len(tt & trigrams(value)) / len(tt) if tt else 0.0
+
+
+def init_app(app):
+    """Give SQLite connections the pg_trgm functions the search queries call."""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, _record):
+        dbapi_connection.create_function("similarity", 2, similarity, deterministic=True)
+        dbapi_connection.create_function("word_similarity", 2, word_similarity, deterministic=True)
+
+
+# ── Queries ───────────────────────────────────────────────────────────────────
+
+def _postgres():
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def escape_like(term):
+    """term with the LIKE wildcards (and the escape character itself) escaped by a backslash."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def condition_and_rank(model, columns, term):
+    """(WHERE clause, rank expression) for `term` over the model's columns."""
+    cols = [getattr(model, c) for c in columns]
+    pattern = f"%{escape_like(term)}%"
+    if _postgres():
+        # `term <% col` is word_similarity(term, col) >= the session threshold, index-backed
+        fuzzy = [literal(term).op("<%")(c) for c in cols]
+    else:
+        fuzzy = [func.word_similarity(term, c) >= WORD_SIMILARITY for c in cols]
+    ranks = [func.word_similarity(term, c) for c in cols]
+    rank = ranks[0] if len(ranks) == 1 else (func.greatest(*ranks) if _postgres() else func.max(*ranks))
+    return or_(*[c.ilike(pattern, escape="\\") for c in cols], *fuzzy), rank
+
+
+def search(entity, term, limit=10, filters=()):
+    """[(row, score)] for one entity, best match first."""
+    model, columns = ENTITIES[entity]
+    if _postgres():
+        db.session.execute(text(f"SET LOCAL pg_trgm.word_similarity_threshold = {WORD_SIMILARITY}"))
+    condition, rank = condition_and_rank(model, columns, term)
+    q = db.session.query(model, rank.label("score")).filter(condition, *filters)
+    if hasattr(model, "eager_refs"):
+        q = q.options(*model.eager_refs())
+    rows = q.order_by(rank.desc(), model.created_at.desc(), model.id).limit(limit).all()
+    return [(row, round(float(score), 4)) for row, score in rows]
+
+
+def search_all(term, entities=None, limit=10):
+    """{entity: [row dict + score]} across the requested entities."""
+    return {
+        entity: [{**row.to_dict(), "score": score} for row, score in search(entity, term, limit)]
+        for entity in (entities or ENTITIES)
+    }
@@ -0,0 +1,93 @@
+"""
+Base for the per-process in-memory indexes of vehicles and drivers
+(app.services.dispatch, app.services.autocomplete).
+
+An index subscribes to the in-process EventHub as an internal consumer
+on first use and builds itself. Before each read, _sync() drains the
+queued events, collects the vehicle and driver ids they name (EVENTS
+says which fields hold them for each event type) and reloads just those
+rows. A full rebuild runs instead every max_age seconds, after
+invalidate(), and whenever the event queue overflowed, to pick up
+changes no event describes.
+
+Subclasses implement _clear(), _build() and _reload(vehicle_ids,
+driver_ids). The caller holds the index's _lock around _sync() and the
+read that follows.
+"""
+import queue
+import threading
+import time
+
+from app.services import events
+
+QUEUE_SIZE = 10_000
+
+
+class EventSyncedIndex:
+    """Per-process index kept fresh from vehicle/driver write events."""
+
+    MAX_AGE = 300   # seconds between full rebuilds
+    # event type -> (field holding a vehicle id, field holding a driver id); None where absent
+    EVENTS = {"vehicle": ("id", None), "driver": (None, "id")}
+
+    def __init__(self, max_age=None):
+        self.max_age   = max_age if max_age is not None else self.MAX_AGE
+        self._lock     = threading.Lock()
+        self._events   = None
+        self._built_at = None
+        self._clear()
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _build(self):
+        """Load every row into the freshly cleared index."""
+        raise NotImplementedError
+
+    def _reload(self, vehicle_ids, driver_ids):
+        """Replace the given rows with their current state (dropping those that no longer qualify)."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Reload everything."""
+        self._build()
+        self._built_at = time.monotonic()
+
+    # ── Freshness ────────────────────────────────────────────────────────────
+
+    def _sync(self):
+        """Apply queued write events; rebuild when stale or when events may have been dropped."""
+        if self._events is None:
+            self._events = events.subscribe(QUEUE_SIZE, internal=True)
+            self.rebuild()
+            return
+        overflowed = self._events.full()
+        vehicle_ids, driver_ids = set(), set()
+        while True:
+            try:
+                envelope = self._events.get_nowait()
+            except queue.Empty:
+                break
+            fields = self.EVENTS.get(envelope.get("type"))
+            if fields is None:
+                continue
+            data = envelope.get("data") or {}
+            vehicle_field, driver_field = fields
+            if vehicle_field:
+                vehicle_ids.add(data.get(vehicle_field))
+            if driver_field:
+                driver_ids.add(data.get(driver_field))
+        if overflowed or self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            self.rebuild()
+        else:
+            self._reload(vehicle_ids - {None}, driver_ids - {None})
+
+    def warm(self):
+        """Subscribe and build now instead of on the first read."""
+        with self._lock:
+            self._sync()
+
+    def invalidate(self):
+        """Force a full rebuild on the next read."""
+        with self._lock:
+            self._built_at = None
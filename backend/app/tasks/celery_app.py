@@ -2,7 +2,9 @@
 Celery background tasks:
 - License expiry alerts (daily)
 - Maintenance due alerts (daily)
-- KPI cache invalidation (every 30s)
+- KPI counter reconciliation (every 5 min)
+- Monthly cost rollup rebuild (nightly)
+- Maintenance risk score sweep (daily)
 """
 from celery import Celery
 from celery.schedules import crontab
@@ -30,9 +32,25 @@ def make_celery(app=None):
                 "task": "app.tasks.alerts.check_maintenance_due",
                 "schedule": crontab(hour=8, minute=30),
             },
-            "invalidate-kpi-cache": {
-                "task": "app.tasks.alerts.invalidate_kpi_cache",
-                "schedule": 30.0,  # Every 30 seconds
+            "reconcile-kpi-counters": {
+                "task": "app.tasks.alerts.reconcile_kpi_counters",
+                "schedule": 300.0,  # Every 5 minutes
+            },
+            "refresh-risk-scores-daily": {
+                "task": "app.tasks.alerts.refresh_risk_scores",
+                "schedule": crontab(hour=0, minute=15),
+            },
+            "rebuild-monthly-rollup-nightly": {
+                "task": "app.tasks.alerts.rebuild_monthly_rollup",
+                "schedule": crontab(hour=2, minute=0),
+            },
+            "refresh-fuel-stats-nightly": {
+                "task": "app.tasks.alerts.refresh_fuel_stats",
+                "schedule": crontab(hour=2, minute=15),
+            },
+            "refit-fuel-forecasts-nightly": {
+                "task": "app.tasks.alerts.refit_fuel_forecasts",
+                "schedule": crontab(hour=2, minute=30),
             },
         },
     )
@@ -40,6 +58,16 @@ def make_celery(app=None):
 
 
 celery_app = make_celery()
+_flask_app = None
+
+
+def flask_app():
+    """Flask app used by tasks that need the database (created once per worker)."""
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app(os.environ.get("FLASK_CONFIG", "default"))
+    return _flask_app
 
 
 @celery_app.task(name="app.tasks.alerts.check_license_expiry")
@@ -60,10 +88,51 @@ def check_maintenance_due():
     return {"status": "done"}
 
 
-@celery_app.task(name="app.tasks.alerts.invalidate_kpi_cache")
-def invalidate_kpi_cache():
-    """Clear dashboard KPI cache so next request recomputes."""
-    import redis
-    r = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
-    r.delete("dashboard:kpis")
-    return {"status": "cache_cleared"}
+@celery_app.task(name="app.tasks.alerts.reconcile_kpi_counters")
+def reconcile_kpi_counters():
+    """Rebuild the write-through KPI counters from the database to correct drift."""
+    from app.services import counters
+    with flask_app().app_context():
+        kpis = counters.reconcile()
+    return {"status": "reconciled", "fleet_total": kpis["fleet"]["total"]}
+
+
+@celery_app.task(name="app.tasks.alerts.rebuild_monthly_rollup")
+def rebuild_monthly_rollup():
+    """Recompute vehicle_month_rollup from expenses and trips."""
+    from app.services import reports, rollup
+    with flask_app().app_context():
+        counts = rollup.rebuild()
+        reports.invalidate_summaries()
+    return {"status": "rebuilt", **counts}
+
+
+@celery_app.task(name="app.tasks.alerts.refresh_risk_scores")
+def refresh_risk_scores():
+    """Rescore every vehicle so the days-since-service feature stays current."""
+    from app import db
+    from app.services import risk
+    with flask_app().app_context():
+        scored = risk.refresh()
+        db.session.commit()
+    return {"status": "refreshed", "vehicles": scored}
+
+
+@celery_app.task(name="app.tasks.alerts.refresh_fuel_stats")
+def refresh_fuel_stats():
+    """Recompute every vehicle's observed km/l and recent fuel price from the rebuilt rollup."""
+    from app import db
+    from app.services import fuel
+    with flask_app().app_context():
+        refreshed = fuel.refresh()
+        db.session.commit()
+    return {"status": "refreshed", "vehicles": refreshed}
+
+
+@celery_app.task(name="app.tasks.alerts.refit_fuel_forecasts")
+def refit_fuel_forecasts():
+    """Refit every fuel-cost series on the rebuilt rollup and replace the cached fit."""
+    from app.services import forecast
+    with flask_app().app_context():
+        payload = forecast.refit()
+    return {"status": "refitted", "model": payload["model"], "vehicles": len(payload["vehicles"])}
@@ -0,0 +1,260 @@
+"""
+Two-tier read-through cache.
+
+    L1  per-process LRU with a short TTL — absorbs hot polling without a
+        network round trip.
+    L2  Redis, storing {"v": value, "fresh_until": epoch} with a hard TTL of
+        fresh_ttl + stale_ttl.
+
+A miss is recomputed by a single worker holding a Redis lock (single
+flight). While an entry is stale but not yet expired, readers keep getting
+the stale value and the lock winner refreshes it in a background thread
+(stale-while-revalidate). If Redis is unreachable the cache skips it for a
+few seconds and falls back to L1 + compute, so callers never see a Redis
+error.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask import current_app
+from redis.exceptions import RedisError
+
+_registry = {}
+
+
+class LRUCache:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data   = OrderedDict()
+        self._lock   = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    cache = TwoTierCache("dashboard", fresh_ttl=30, stale_ttl=300)
+    data  = cache.get_or_compute("kpis", compute_fn)
+    """
+
+    def __init__(self, namespace, fresh_ttl=30, stale_ttl=300, l1_ttl=5, l1_size=256,
+                 lock_ttl=10, wait_timeout=2.0, retry_after=5.0):
+        self.namespace    = namespace
+        self.fresh_ttl    = fresh_ttl
+        self.stale_ttl    = stale_ttl
+        self.l1_ttl       = l1_ttl
+        self.lock_ttl     = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.retry_after  = retry_after
+        self.l1           = LRUCache(l1_size)
+        self._redis_down_until = 0.0
+        self._local_locks = {}
+        self._lock  = threading.Lock()
+        self._stats = dict.fromkeys(
+            ("l1_hits", "l2_hits", "misses", "stale", "refreshes", "lock_waits", "redis_errors"), 0
+        )
+        _registry[namespace] = self
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def get_or_compute(self, key, compute):
+        value = self.l1.get(key)
+        if value is not None:
+            self._count("l1_hits")
+            return value
+
+        r = self._redis()
+        if r is None:
+            return self._compute_local(key, compute)
+
+        full_key = self._key(key)
+        try:
+            envelope = self._read(r, full_key)
+            if envelope and envelope["fresh_until"] > time.time():
+                self._count("l2_hits")
+                self._remember(key, envelope)
+                return envelope["v"]
+
+            token = self._acquire(r, full_key)
+            if envelope:
+                self._count("stale")
+                if token:
+                    self._refresh_in_background(key, compute, token)
+                return envelope["v"]
+
+            if token:
+                return self._compute_and_store(r, key, compute, token)
+            envelope = self._wait_for(r, full_key)
+            if envelope:
+                self._remember(key, envelope)
+                return envelope["v"]
+        except (RedisError, ValueError):
+            self._redis_failed()
+        return self._compute_local(key, compute)
+
+    def invalidate(self, *keys):
+        """Drop keys from this process's L1 and from Redis."""
+        for key in keys:
+            self.l1.delete(key)
+        r = self._redis()
+        if r is None or not keys:
+            return
+        try:
+            r.delete(*(self._key(k) for k in keys))
+        except RedisError:
+            self._redis_failed()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        lookups = s["l1_hits"] + s["l2_hits"] + s["stale"] + s["misses"]
+        s["hit_ratio"] = round((s["l1_hits"] + s["l2_hits"] + s["stale"]) / lookups, 3) if lookups else None
+        s["l1_size"] = len(self.l1)
+        s["redis_available"] = self._redis_down_until <= time.monotonic()
+        s["ttl"] = {"fresh": self.fresh_ttl, "stale": self.stale_ttl, "l1": self.l1_ttl}
+        return s
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _key(self, key):
+        return f"cache:{self.namespace}:{key}"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _redis(self):
+        if self._redis_down_until > time.monotonic():
+            return None
+        try:
+            return _get_redis()
+        except RedisError:
+            self._redis_failed()
+            return None
+
+    def _redis_failed(self):
+        self._count("redis_errors")
+        self._redis_down_until = time.monotonic() + self.retry_after
+
+    def _read(self, r, full_key):
+        raw = r.get(full_key)
+        return json.loads(raw) if raw else None
+
+    def _remember(self, key, envelope):
+        self.l1.set(key, envelope["v"], min(self.l1_ttl, envelope["fresh_until"] - time.time()))
+
+    def _acquire(self, r, full_key):
+        token = uuid.uuid4().hex
+        return token if r.set(f"{full_key}:lock", token, nx=True, ex=self.lock_ttl) else None
+
+    def _release(self, r, full_key, token):
+        lock_key = f"{full_key}:lock"
+        try:
+            if r.get(lock_key) == token:
+                r.delete(lock_key)
+        except RedisError:
+            pass  # lock expires on its own after lock_ttl
+
+    def _compute_and_store(self, r, key, compute, token):
+        self._count("misses")
+        full_key = self._key(key)
+        try:
+            value = compute()
+            envelope = {"v": value, "fresh_until": time.time() + self.fresh_ttl}
+            self._remember(key, envelope)
+            try:
+                r.set(full_key, json.dumps(envelope, default=str), ex=self.fresh_ttl + self.stale_ttl)
+            except RedisError:
+                self._redis_failed()
+            return value
+        finally:
+            self._release(r, full_key, token)
+
+    def _refresh_in_background(self, key, compute, token):
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                self._count("refreshes")
+                try:
+                    r = _get_redis()
+                    value = compute()
+                    envelope = {"v": value, "fresh_until": time.time() + self.fresh_ttl}
+                    r.set(self._key(key), json.dumps(envelope, default=str),
+                          ex=self.fresh_ttl + self.stale_ttl)
+                    self._release(r, self._key(key), token)
+                except RedisError:
+                    self._redis_failed()  # lock expires on its own after lock_ttl
+                except Exception:
+                    app.logger.exception("Background refresh of %s failed", self._key(key))
+
+        threading.Thread(target=run, name=f"cache-refresh-{self.namespace}", daemon=True).start()
+
+    def _wait_for(self, r, full_key):
+        """Another worker holds the lock — poll briefly for its result."""
+        self._count("lock_waits")
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            envelope = self._read(r, full_key)
+            if envelope:
+                return envelope
+        return None
+
+    def _compute_local(self, key, compute):
+        """Compute without Redis; a per-key thread lock keeps it single-flight per process."""
+        with self._lock:
+            lock = self._local_locks.setdefault(key, threading.Lock())
+        with lock:
+            value = self.l1.get(key)
+            if value is not None:
+                self._count("l1_hits")
+                return value
+            self._count("misses")
+            value = compute()
+            self.l1.set(key, value, self.l1_ttl)
+            return value
+
+
+def _get_redis():
+    from app import redis_store
+    return redis_store.client
+
+
+def all_stats():
+    """Stats for every cache created in this process, keyed by namespace."""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,52 @@
+"""
+App-wide handlers for write conflicts.
+
+Vehicles and drivers carry an optimistic version column, and the dispatch
+paths lock the rows they change. A request that loses a race therefore
+fails in one of these ways:
+
+    StaleDataError       an UPDATE found the row's version already bumped
+    lock_not_available   a row lock was not granted within the lock timeout
+    deadlock_detected    PostgreSQL aborted one of two transactions
+    database is locked   SQLite's single writer lock timed out
+
+All of them roll back and return 409 WRITE_CONFLICT with Retry-After.
+Nothing was written, so the client can resend the same request. The retry
+re-reads and re-validates the rows. A lost race then shows up as an
+ordinary validation error such as VEHICLE_ON_TRIP.
+"""
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import db
+from app.utils.helpers import error
+
+RETRY_AFTER_SECONDS = 1
+RETRYABLE_PGCODES   = {"55P03", "40P01", "40001"}  # lock_not_available, deadlock_detected, serialization_failure
+
+
+def _is_retryable(exc):
+    orig = getattr(exc, "orig", None)
+    return getattr(orig, "pgcode", None) in RETRYABLE_PGCODES or "database is locked" in str(orig)
+
+
+def _conflict():
+    db.session.rollback()
+    response, code = error(
+        "The vehicle or driver was changed by another request; nothing was saved. Retry the request.",
+        409, "WRITE_CONFLICT", details={"retryable": True},
+    )
+    response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+    return response, code
+
+
+def register_error_handlers(app):
+    @app.errorhandler(StaleDataError)
+    def stale_data(exc):
+        return _conflict()
+
+    @app.errorhandler(OperationalError)
+    def operational_error(exc):
+        if not _is_retryable(exc):
+            raise exc
+        return _conflict()
@@ -0,0 +1,91 @@
+"""
+Sparse fieldsets for the list endpoints (?fields=id,registration_number,status).
+
+Each listed model's FIELDS spec, the one its to_dict() is compiled from,
+gives the column behind every field, how to convert it, and the outer
+join a referenced column needs (vehicle_reg, driver_name). A Projection
+selects only the requested columns, so the page comes back as plain row
+tuples with no ORM objects or identity map, and dumps each row with
+converters chosen once per request. The output matches to_dict() key for
+key.
+
+`id` is always returned. The page's sort column is selected too (keyset
+cursors are built from it), but it is only returned when asked for.
+"""
+from collections import namedtuple
+
+from flask import abort, request
+
+from app.models import Driver, Expense, MaintenanceLog, Trip, Vehicle
+from app.utils.helpers import error
+
+# A projected field: the column that holds it, its converter, and the (model, foreign key) to outer-join
+Column = namedtuple("Column", "column convert join")
+
+# Relationship names used in FIELDS paths, with the model and foreign key they join on
+REFERENCES = {"vehicle": (Vehicle, "vehicle_id"), "driver": (Driver, "driver_id")}
+
+
+def _columns(model):
+    """{name: Column} for the model's FIELDS spec (the one its to_dict() is compiled from)."""
+    columns = {}
+    for name, f in model.FIELDS.items():
+        ref, _, attr = (f.path or name).rpartition(".")
+        join = REFERENCES[ref] if ref else None
+        columns[name] = Column(getattr(join[0] if join else model, attr), f.convert, join)
+    return columns
+
+
+FIELDS = {model: _columns(model) for model in (Vehicle, Driver, Trip, MaintenanceLog, Expense)}
+
+
+class Projection:
+    """The requested fields of one model: selects their columns and dumps rows to dicts."""
+
+    def __init__(self, model, names, sort):
+        registry = FIELDS[model]
+        self.model = model
+        self.names = ["id"] + [n for n in dict.fromkeys(names) if n != "id"]
+        self.sort  = sort
+        # One select column per distinct column; a field is (name, row position, converter)
+        slots, self._fields = {}, []
+
+        def slot(column):
+            return slots.setdefault((column.class_, column.key), (len(slots), column))[0]
+
+        for name in self.names:
+            self._fields.append((name, slot(registry[name].column), registry[name].convert))
+        slot(sort)
+        self.columns = [c.label(c.key) if c.class_ is model else c.label(f"{c.class_.__tablename__}_{c.key}")
+                        for _, c in slots.values()]
+        self.joins = list(dict.fromkeys(registry[n].join for n in self.names if registry[n].join is not None))
+
+    def select(self, query):
+        """`query` (filtered Model.query, no loader options) narrowed to the projected columns."""
+        # The model's own id comes first, so the model's table stays the left side of the joins
+        query = query.with_entities(*self.columns)
+        for target, fk in self.joins:
+            query = query.outerjoin(target, target.id == getattr(self.model, fk))
+        return query
+
+    def dump(self, rows):
+        fields = self._fields
+        return [{name: (convert(row[i]) if convert else row[i]) for name, i, convert in fields} for row in rows]
+
+
+def requested(model, sort):
+    """
+    Projection for ?fields= on a list of `model` sorted by `sort`, or None
+    when the parameter is absent. Unknown field names abort with 422.
+    """
+    raw = request.args.get("fields")
+    if raw is None:
+        return None
+    names = [n.strip() for n in raw.split(",") if n.strip()]
+    unknown = [n for n in names if n not in FIELDS[model]]
+    if unknown:
+        response, code = error(f"Unknown fields: {', '.join(unknown)}", 422, "UNKNOWN_FIELDS",
+                               details={"allowed": list(FIELDS[model])})
+        response.status_code = code
+        abort(response)
+    return Projection(model, names, sort)
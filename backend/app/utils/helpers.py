@@ -1,6 +1,12 @@
+import base64
+import json
+from datetime import date, datetime
 from functools import wraps
-from flask import jsonify
+from flask import abort, jsonify, request
 from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from sqlalchemy import tuple_
+
+from app.utils.sql import estimated_count, keyset_bound
 
 
 def success(data, code=200, meta=None):
@@ -10,10 +16,12 @@ def success(data, code=200, meta=None):
     return jsonify(r), code
 
 
-def error(message, code=400, error_code=None):
+def error(message, code=400, error_code=None, details=None):
     r = {"status": "error", "message": message}
     if error_code:
         r["code"] = error_code
+    if details:
+        r["errors"] = details
     return jsonify(r), code
 
 
@@ -42,3 +50,92 @@ def paginate(query, page, per_page=20):
         "has_next": paginated.has_next,
         "has_prev": paginated.has_prev,
     }
+
+
+def paginate_list(items, page, per_page=20):
+    """paginate() for an in-memory list (e.g. rows sliced from a cached payload)."""
+    page, per_page = max(page, 1), max(per_page, 1)
+    total = len(items)
+    pages = -(-total // per_page)
+    return items[(page - 1) * per_page:page * per_page], {
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": pages,
+        "has_next": page < pages,
+        "has_prev": page > 1,
+    }
+
+
+def list_page(query, keys, page, per_page=20):
+    """
+    One page of a list endpoint, newest first by `keys`: the sort column,
+    then the primary key as a tiebreak, e.g. (Trip.created_at, Trip.id).
+
+    Offset mode (?page=) is the default and returns the usual meta with an
+    exact total. Passing ?cursor= switches to keyset mode: an empty cursor
+    starts at the first page, and meta.next_cursor fetches the following
+    one. Keyset pages cost the same at any depth and skip the COUNT unless
+    ?total=exact or ?total=estimate (the planner's row estimate on
+    PostgreSQL) asks for one.
+    """
+    sort, tiebreak = keys
+    query = query.order_by(sort.desc(), tiebreak.desc())
+    if "cursor" not in request.args:
+        return paginate(query, page, per_page)
+    return paginate_keyset(query, keys, request.args["cursor"], per_page, request.args.get("total"))
+
+
+def paginate_keyset(query, keys, cursor, per_page=20, total=None):
+    """Keyset page of `query` (already ordered by `keys` descending) after `cursor`."""
+    sort, tiebreak = keys
+    per_page = min(max(per_page, 1), 100)
+    counted = query
+    if cursor:
+        try:
+            value, last_id = _decode_cursor(cursor, sort)
+        except (ValueError, TypeError):
+            response, code = error("Invalid cursor.", 422, "INVALID_CURSOR")
+            response.status_code = code
+            abort(response)
+        # Rows strictly after (value, last_id) in (sort DESC, id DESC) order; a row
+        # comparison, so PostgreSQL seeks straight into the (sort, id) index
+        query = query.filter(tuple_(sort, tiebreak) < tuple_(keyset_bound(query.session, value), last_id))
+
+    rows = query.limit(per_page + 1).all()
+    items, has_next = rows[:per_page], len(rows) > per_page
+    last = items[-1] if items else None
+    meta = {
+        "per_page": per_page,
+        "has_next": has_next,
+        "next_cursor": _encode_cursor(getattr(last, sort.key), getattr(last, tiebreak.key)) if has_next else None,
+    }
+    if total == "exact":
+        meta["total"] = counted.order_by(None).count()
+    elif total == "estimate":
+        meta["total"], meta["total_estimated"] = estimated_count(counted), True
+    return items, meta
+
+
+def _encode_cursor(value, last_id):
+    raw = json.dumps([value.isoformat() if value is not None else None, last_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor, sort):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    value, last_id = json.loads(raw)
+    parse = datetime.fromisoformat if sort.type.python_type is datetime else date.fromisoformat
+    return parse(value), str(last_id)
+
+
+def month_starts(count, today=None):
+    """First day of each of the last `count` calendar months, oldest first."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1
+    return [date(i // 12, i % 12 + 1, 1) for i in range(index - count + 1, index + 1)]
+
+
+def next_month(d):
+    """First day of the month after d."""
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
@@ -0,0 +1,77 @@
+"""
+JSON encoding for API responses and request bodies (app.json).
+
+JSON_BACKEND picks the provider:
+
+    orjson   the default. Native encoder, several times faster than the
+             stdlib on large analytics payloads. Falls back to stdlib
+             when orjson is not installed
+    stdlib   Flask's json module provider
+
+Both produce the same documents. Keys are sorted, Decimal becomes a float,
+and date/datetime become ISO 8601 strings. Flask's stdlib provider would
+otherwise write dates in the RFC 822 HTTP format. Any other type goes to
+Flask's default handler (UUID, dataclasses).
+"""
+import json
+from datetime import date
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider, _default as flask_default
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib provider is used instead
+    orjson = None
+
+
+def default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, float):
+        return float(obj)   # float subclasses orjson does not take as-is
+    return flask_default(obj)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    default = staticmethod(default)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson doing the encoding and decoding."""
+
+    default = staticmethod(default)
+
+    def _options(self, indent=False):
+        options = (orjson.OPT_SORT_KEYS if self.sort_keys else 0) | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        return (options | orjson.OPT_INDENT_2) if indent else options
+
+    def dumps(self, obj, **kwargs):
+        # json.dumps options orjson has no equivalent for go to the stdlib
+        if set(kwargs) - {"indent", "separators"}:
+            kwargs.setdefault("default", self.default)
+            kwargs.setdefault("sort_keys", self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options(bool(kwargs.get("indent")))).decode()
+
+    def loads(self, s, **kwargs):
+        return json.loads(s, **kwargs) if kwargs else orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj    = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body   = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def provider_class(backend):
+    """The provider for a JSON_BACKEND value; orjson falls back to stdlib when it is not installed."""
+    if backend == "orjson" and orjson is not None:
+        return OrjsonProvider
+    return StdlibJSONProvider
+
+
+def configure_json(app):
+    app.json = provider_class(app.config.get("JSON_BACKEND", "orjson"))(app)
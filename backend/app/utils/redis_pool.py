@@ -0,0 +1,105 @@
+"""
+App-scoped Redis connection pool.
+
+One pool per worker process, created in create_app() and shared by the
+KPI counters, the two-tier cache, the event stream, Celery tasks (through
+their Flask app context) and Flask-Limiter's storage. The batch helpers
+send multi-key reads and writes as a single pipelined round trip.
+"""
+import threading
+import redis
+from redis.exceptions import RedisError
+
+
+class RedisPool:
+
+    def __init__(self, app=None):
+        self.pool    = None
+        self._client = None
+        self._lock   = threading.Lock()
+        self._stats  = {"client_calls": 0, "pipelines": 0, "pipelined_commands": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get("REDIS_URL")
+        if url:
+            self.pool = redis.ConnectionPool.from_url(
+                url,
+                decode_responses=True,
+                max_connections=app.config.get("REDIS_MAX_CONNECTIONS", 50),
+                socket_connect_timeout=app.config.get("REDIS_SOCKET_TIMEOUT", 0.5),
+                socket_timeout=app.config.get("REDIS_SOCKET_TIMEOUT", 0.5),
+                health_check_interval=30,
+            )
+            self._client = redis.Redis(connection_pool=self.pool)
+        app.extensions["redis_pool"] = self
+
+    # ── Access ───────────────────────────────────────────────────────────────
+
+    @property
+    def client(self):
+        """Shared client; raises RedisError when no REDIS_URL is configured."""
+        if self._client is None:
+            raise RedisError("Redis is not configured (REDIS_URL is empty).")
+        self._count("client_calls")
+        return self._client
+
+    def pipeline(self, transaction=False):
+        if self._client is None:
+            raise RedisError("Redis is not configured (REDIS_URL is empty).")
+        self._count("pipelines")
+        return self._client.pipeline(transaction=transaction)
+
+    # ── Batch helpers (one round trip each) ──────────────────────────────────
+
+    def get_many(self, keys):
+        """MGET — values in key order, None for missing keys."""
+        if not keys:
+            return []
+        self._count("pipelined_commands", len(keys))
+        return self.client.mget(keys)
+
+    def set_many(self, mapping, ex=None):
+        """SET every key (optionally with a TTL) in one pipeline."""
+        if not mapping:
+            return
+        pipe = self.pipeline()
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=ex)
+        self._count("pipelined_commands", len(mapping))
+        pipe.execute()
+
+    def hgetall_many(self, keys):
+        """HGETALL for several hashes in one pipeline."""
+        pipe = self.pipeline()
+        for key in keys:
+            pipe.hgetall(key)
+        self._count("pipelined_commands", len(keys))
+        return pipe.execute()
+
+    def delete_many(self, keys):
+        if keys:
+            self.client.delete(*keys)
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        if self.pool is None:
+            return {**s, "configured": False}
+        in_use    = len(self.pool._in_use_connections)
+        available = len(self.pool._available_connections)
+        return {
+            **s,
+            "configured": True,
+            "max_connections": self.pool.max_connections,
+            "created_connections": self.pool._created_connections,
+            "in_use": in_use,
+            "idle": available,
+        }
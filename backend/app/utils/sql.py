@@ -0,0 +1,64 @@
+"""Portable SQL expression helpers (PostgreSQL and the SQLite testing config)."""
+from datetime import datetime
+
+from sqlalchemy import func, case, and_, extract, literal, text
+
+
+def count_if(*conditions):
+    """COUNT of rows matching all conditions — for single-pass aggregates."""
+    return func.count(case((and_(*conditions), 1)))
+
+
+def sum_if(column, *conditions):
+    """SUM of column over rows matching all conditions, 0 when none match."""
+    return func.coalesce(func.sum(case((and_(*conditions), column))), 0)
+
+
+def year_month(column):
+    """(year, month) expressions for GROUP BY calendar month."""
+    return extract("year", column), extract("month", column)
+
+
+def set_lock_timeout(session, ms):
+    """Bound how long this transaction waits for row locks. PostgreSQL only; SQLite has no row locks."""
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text(f"SET LOCAL lock_timeout = {int(ms)}"))
+
+
+def lock_table(session, table, mode="EXCLUSIVE"):
+    """
+    LOCK TABLE for the rest of this transaction. PostgreSQL only; SQLite
+    serializes writers on the whole database already.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text(f"LOCK TABLE {table.name} IN {mode} MODE"))
+
+
+def estimated_count(query):
+    """
+    Row count of a query from the PostgreSQL planner's estimate (EXPLAIN, no
+    scan). Other databases get an exact COUNT.
+    """
+    query = query.order_by(None)
+    session = query.session
+    dialect = session.get_bind().dialect
+    if dialect.name != "postgresql":
+        return query.count()
+    compiled = query.statement.compile(dialect=dialect)
+    plan = session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params,
+    ).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def keyset_bound(session, value):
+    """
+    A cursor value to compare against a stored column. SQLite keeps
+    CURRENT_TIMESTAMP defaults as 'YYYY-MM-DD HH:MM:SS' text but binds
+    datetimes with a .ffffff suffix, which sorts after the stored text, so
+    there whole-second datetimes are bound in the stored form.
+    """
+    if (isinstance(value, datetime) and value.microsecond == 0
+            and session.get_bind().dialect.name == "sqlite"):
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"))
+    return value
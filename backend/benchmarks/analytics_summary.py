@@ -0,0 +1,63 @@
+"""
+Run: python benchmarks/analytics_summary.py
+Monthly P&L on a year of synthetic data: the original per-month loop vs
+the rollup query in app.services.reports, uncached and cached.
+"""
+from datetime import date, timedelta
+from sqlalchemy import func
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Trip, Expense
+from app.services import reports
+
+
+def legacy_summary(months):
+    """The original implementation (4 queries per month, 28-day month steps)."""
+    results = []
+    today = date.today()
+    for i in range(months - 1, -1, -1):
+        target = date(today.year, today.month, 1) - timedelta(days=i * 28)
+        month_start = date(target.year, target.month, 1)
+        month_end = date(target.year + 1, 1, 1) if target.month == 12 else date(target.year, target.month + 1, 1)
+        total_cost = db.session.query(func.sum(Expense.amount)).filter(
+            Expense.expense_date >= month_start, Expense.expense_date < month_end).scalar() or 0
+        fuel_cost = db.session.query(func.sum(Expense.amount)).filter(
+            Expense.expense_date >= month_start, Expense.expense_date < month_end,
+            Expense.expense_type == "fuel").scalar() or 0
+        repair_cost = db.session.query(func.sum(Expense.amount)).filter(
+            Expense.expense_date >= month_start, Expense.expense_date < month_end,
+            Expense.expense_type == "repair").scalar() or 0
+        trips_count = Trip.query.filter(
+            Trip.status == "completed", Trip.actual_arrival >= month_start,
+            Trip.actual_arrival < month_end).count()
+        results.append({
+            "month": month_start.strftime("%b %Y"), "month_short": month_start.strftime("%b"),
+            "total_cost": float(total_cost), "fuel_cost": float(fuel_cost),
+            "repair_cost": float(repair_cost), "trips_completed": trips_count,
+        })
+    return results
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding one year: 100k trips, 50k expenses ...")
+        seed_synthetic(trips=100_000, expenses=50_000, days=365)
+
+        for months in (6, 12, 24):
+            print(f"months={months}")
+            for label, fn in (("legacy per-month loop", lambda: legacy_summary(months)),
+                              ("rollup query", lambda: reports.compute_monthly_summary(months)),
+                              ("cached (L1)", lambda: reports.monthly_summary(months))):
+                with count_queries() as counter:
+                    data = fn()
+                _, median_ms, min_ms = timeit(fn)
+                report(label, counter["n"], median_ms, min_ms)
+            labels = [row["month"] for row in data]
+            print("  distinct calendar months:", len(set(labels)) == months)
+
+
+if __name__ == "__main__":
+    main()
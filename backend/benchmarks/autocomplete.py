@@ -0,0 +1,80 @@
+"""
+Run: python benchmarks/autocomplete.py
+Plate, name and licence prefixes over 50,000 vehicles and 50,000 drivers.
+For each prefix it compares:
+
+    ilike list     GET /vehicles/?search= or /drivers/?search=, the
+                   ILIKE '%term%' query the forms ran on every keystroke
+    autocomplete   GET /autocomplete/, answered from the in-memory index
+    lookup         AutocompleteIndex.lookup() alone, without HTTP and JSON
+
+It also reports the index build time and how long a create_vehicle event
+takes to show up in the next lookup.
+"""
+import time
+
+from flask_jwt_extended import create_access_token
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app.services import autocomplete
+
+N = 50_000
+PREFIXES = [
+    # (label, list endpoint, ?types=, prefix)
+    ("plate, 4 chars",   "vehicles", "vehicles", "GJ01"),
+    ("plate, 8 chars",   "vehicles", "vehicles", "GJ02BX07"),
+    ("driver name",      "drivers",  "drivers",  "Driver 4711"),
+    ("licence",          "drivers",  "drivers",  "GJ05000000123"),
+    ("no match",         "vehicles", "vehicles", "ZZ99"),
+]
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print(f"Seeding {N:,} vehicles and {N:,} drivers ...")
+        ids = seed_synthetic(vehicles=N, drivers=N, trips=1_000, expenses=1_000, maintenance=100)
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+        client = app.test_client()
+        index = autocomplete.index
+
+        start = time.perf_counter()
+        index.warm()
+        elapsed = (time.perf_counter() - start) * 1000
+        report("index build", 2, elapsed, elapsed)
+
+        def fetch(url):
+            resp = client.get(url, headers=headers)
+            assert resp.status_code == 200, resp.get_json()
+            return resp.get_json()["data"]
+
+        for label, listing, types, prefix in PREFIXES:
+            print(f"{label}: {prefix!r}")
+            for name, url in (("ilike list", f"/api/v1/{listing}/?search={prefix}&cursor=&per_page=10"),
+                              ("autocomplete", f"/api/v1/autocomplete/?q={prefix}&types={types}&limit=10")):
+                with count_queries() as counter:
+                    fetch(url)
+                _, median_ms, min_ms = timeit(lambda: fetch(url), repeat=20)
+                report(name, counter["n"], median_ms, min_ms)
+            with count_queries() as counter:
+                index.lookup(prefix, (types,), 10)
+            _, median_ms, min_ms = timeit(lambda: index.lookup(prefix, (types,), 10), repeat=200)
+            report(f"lookup ({median_ms * 1000:.0f}us)", counter["n"], median_ms, min_ms)
+
+        # A new vehicle is in the very next lookup: one event, one reload query
+        resp = client.post("/api/v1/vehicles/", headers=headers, json={
+            "registration_number": "KA01ZZ0001", "make": "Tata", "model": "Ace", "type": "mini", "capacity_kg": 1000,
+        })
+        assert resp.status_code == 201, resp.get_json()
+        with count_queries() as counter:
+            start = time.perf_counter()
+            found = index.lookup("KA01ZZ", ("vehicles",), 10)["vehicles"]
+            elapsed = (time.perf_counter() - start) * 1000
+        assert [v["registration_number"] for v in found] == ["KA01ZZ0001"], found
+        report("lookup after create_vehicle", counter["n"], elapsed, elapsed)
+
+
+if __name__ == "__main__":
+    main()
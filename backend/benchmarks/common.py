@@ -0,0 +1,185 @@
+"""
+Shared helpers for the benchmark scripts: app bootstrap, synthetic data
+and a query counter.
+
+Benchmarks run against the in-memory SQLite "testing" config by default.
+Set BENCH_CONFIG=development to run against the PostgreSQL database from
+DATABASE_URL instead (its tables are cleared first — never point this at
+real data).
+"""
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+
+from app import create_app, db
+from app.models import gen_uuid, User, Vehicle, Driver, Trip, MaintenanceLog, Expense
+from app.services import rollup
+
+CITIES = ["Surat", "Mumbai", "Ahmedabad", "Delhi", "Pune", "Vadodara", "Rajkot",
+          "Jaipur", "Indore", "Nagpur", "Nashik", "Udaipur", "Bhopal", "Hyderabad"]
+VEHICLE_TYPES = {"truck": 9000, "mini": 1200, "van": 2000, "tanker": 12000}
+
+
+def make_app():
+    app = create_app(os.environ.get("BENCH_CONFIG", "testing"))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def seed_synthetic(vehicles=500, drivers=400, trips=100_000, expenses=50_000,
+                   maintenance=5_000, days=365, seed=7):
+    """Bulk-insert a synthetic fleet. Must be called inside an app context."""
+    rnd = random.Random(seed)
+    today = date.today()
+    now = datetime.now(timezone.utc)
+
+    user_id = gen_uuid()
+    db.session.execute(insert(User), [{
+        "id": user_id, "username": "bench", "email": "bench@fleetflow.in",
+        "password_hash": "x", "role": "admin",
+    }])
+
+    vehicle_rows = []
+    for i in range(vehicles):
+        vtype = rnd.choice(list(VEHICLE_TYPES))
+        odometer = rnd.uniform(5_000, 250_000)
+        vehicle_rows.append({
+            "id": gen_uuid(),
+            "registration_number": f"GJ{i // 10000:02d}BX{i % 10000:04d}",
+            "make": rnd.choice(["Tata", "Ashok Leyland", "Eicher", "Mahindra", "Force"]),
+            "model": rnd.choice(["407", "Viking", "Pro 2095", "Ace", "Traveller"]),
+            "type": vtype,
+            "capacity_kg": VEHICLE_TYPES[vtype] * rnd.uniform(0.6, 1.2),
+            "odometer_km": odometer,
+            "status": rnd.choices(["available", "on_trip", "in_shop", "retired"], [60, 25, 10, 5])[0],
+            "fuel_efficiency_kmpl": rnd.uniform(4, 15),
+            "last_service_date": today - timedelta(days=rnd.randint(1, 300)),
+            "next_service_km": odometer + rnd.uniform(-3_000, 15_000),
+            "created_by": user_id,
+            "created_at": now - timedelta(days=rnd.randint(days, days + 400)),
+        })
+    db.session.execute(insert(Vehicle), vehicle_rows)
+
+    driver_rows = [{
+        "id": gen_uuid(),
+        "full_name": f"Driver {i}",
+        "license_number": f"GJ05{i:011d}",
+        "license_expiry": today + timedelta(days=rnd.randint(-60, 900)),
+        "phone": f"9{i:09d}",
+        "safety_score": rnd.uniform(50, 100),
+        "duty_status": rnd.choices(["available", "on_trip", "on_break", "suspended"], [60, 30, 5, 5])[0],
+        "created_by": user_id,
+    } for i in range(drivers)]
+    db.session.execute(insert(Driver), driver_rows)
+
+    vehicle_ids = [v["id"] for v in vehicle_rows]
+    driver_ids  = [d["id"] for d in driver_rows]
+
+    batch = []
+    for _ in range(trips):
+        created = now - timedelta(days=rnd.uniform(0, days))
+        status = rnd.choices(["pending", "dispatched", "in_transit", "completed", "cancelled"],
+                             [2, 2, 2, 90, 4])[0]
+        arrival = created + timedelta(hours=rnd.uniform(2, 48)) if status in ("completed", "cancelled") else None
+        batch.append({
+            "id": gen_uuid(),
+            "vehicle_id": rnd.choice(vehicle_ids),
+            "driver_id": rnd.choice(driver_ids),
+            "cargo_weight_kg": rnd.uniform(100, 8000),
+            "origin": rnd.choice(CITIES),
+            "destination": rnd.choice(CITIES),
+            "distance_km": round(rnd.uniform(50, 1500), 2),
+            "status": status,
+            "scheduled_departure": created,
+            "actual_departure": created,
+            "actual_arrival": min(arrival, now) if arrival else None,
+            "estimated_fuel_cost": rnd.uniform(500, 20_000),
+            "created_by": user_id,
+            "created_at": created,
+        })
+        if len(batch) >= 10_000:
+            db.session.execute(insert(Trip), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Trip), batch)
+
+    batch = []
+    for _ in range(expenses):
+        etype = rnd.choices(["fuel", "toll", "repair", "insurance", "other"], [60, 20, 10, 5, 5])[0]
+        # Two decimals, like the Numeric(…, 2) columns, so rollup sums match the raw rows exactly
+        liters = round(rnd.uniform(20, 200), 2) if etype == "fuel" else None
+        price = round(rnd.uniform(88, 102), 2) if etype == "fuel" else None
+        batch.append({
+            "id": gen_uuid(),
+            "vehicle_id": rnd.choice(vehicle_ids),
+            "driver_id": rnd.choice(driver_ids),
+            "expense_type": etype,
+            "amount": round(liters * price if liters else rnd.uniform(100, 30_000), 2),
+            "fuel_liters": liters,
+            "fuel_price_per_liter": price,
+            "expense_date": today - timedelta(days=rnd.randint(0, days)),
+            "logged_by": user_id,
+        })
+        if len(batch) >= 10_000:
+            db.session.execute(insert(Expense), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Expense), batch)
+
+    if maintenance:
+        db.session.execute(insert(MaintenanceLog), [{
+            "id": gen_uuid(),
+            "vehicle_id": rnd.choice(vehicle_ids),
+            "service_type": rnd.choice(["Oil Change", "Brake Pads", "Tyres", "Engine"]),
+            "cost": rnd.uniform(500, 30_000),
+            "service_date": today - timedelta(days=rnd.randint(0, days)),
+            "odometer_at_service": rnd.uniform(5_000, 250_000),
+            "status": rnd.choice(["open", "in_progress", "completed"]),
+            "logged_by": user_id,
+        } for _ in range(maintenance)])
+
+    db.session.commit()
+    rollup.rebuild()
+    return {"user_id": user_id, "vehicle_ids": vehicle_ids, "driver_ids": driver_ids}
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements issued on the default engine inside the block."""
+    counter = {"n": 0}
+
+    def _before(conn, cursor, statement, params, context, executemany):
+        counter["n"] += 1
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+def timeit(fn, repeat=20):
+    """Run fn repeat times; return (result, median_ms, min_ms)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        db.session.expire_all()
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, samples[len(samples) // 2], samples[0]
+
+
+def report(label, queries, median_ms, min_ms):
+    print(f"  {label:<28} queries={queries:<5} median={median_ms:8.2f}ms  min={min_ms:8.2f}ms")
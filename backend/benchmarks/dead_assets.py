@@ -0,0 +1,54 @@
+"""
+Run: python benchmarks/dead_assets.py
+Dead-asset detection on 5,000 vehicles: the original latest-trip query per
+available vehicle vs the single grouped query in app.services.reports.
+"""
+from datetime import date, timedelta
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app.models import Vehicle, Trip
+from app.services import reports
+
+
+def legacy_dead_assets(idle_days=14):
+    """The original implementation (one Trip query per available vehicle)."""
+    dead = []
+    threshold = date.today() - timedelta(days=idle_days)
+    for v in Vehicle.query.filter_by(status="available").all():
+        last_trip = Trip.query.filter_by(vehicle_id=v.id).order_by(Trip.created_at.desc()).first()
+        last_activity = (
+            last_trip.created_at.date() if last_trip and last_trip.created_at else
+            v.created_at.date() if v.created_at else date.today()
+        )
+        if last_activity <= threshold:
+            dead.append({"vehicle_id": v.id, "idle_days": (date.today() - last_activity).days,
+                         "last_activity": last_activity.isoformat()})
+    dead.sort(key=lambda x: x["idle_days"], reverse=True)
+    return dead
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding 5,000 vehicles, 100k trips over 2 years ...")
+        seed_synthetic(vehicles=5_000, drivers=1_000, trips=100_000, expenses=1_000, days=730)
+
+        full = lambda: [reports.dead_asset_row(r) for r in reports.dead_assets_query(14)]
+        page = lambda: [reports.dead_asset_row(r) for r in reports.dead_assets_query(14).limit(20)]
+        for label, fn, repeat in (("legacy per-vehicle query", legacy_dead_assets, 3),
+                                  ("grouped query, all", full, 10),
+                                  ("grouped query, page of 20", page, 10)):
+            with count_queries() as counter:
+                fn()
+            _, median_ms, min_ms = timeit(fn, repeat=repeat)
+            report(label, counter["n"], median_ms, min_ms)
+
+        keys = ("vehicle_id", "idle_days", "last_activity")
+        old = {tuple(r[k] for k in keys) for r in legacy_dead_assets()}
+        new = {tuple(r[k] for k in keys) for r in full()}
+        print(f"  same vehicles flagged ({len(new)}):", old == new)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Run: python benchmarks/dispatch_recommend.py
+Dispatch recommendations on 5,000 vehicles and 3,000 drivers: the full
+index rebuild, a warm recommendation (no queries), a recommendation after
+a burst of trip events (reloads only the rows they name), and the
+equivalent database query per request for comparison.
+"""
+import random
+from datetime import date
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Vehicle, Driver, VehicleRiskScore
+from app.services import dispatch, events, risk
+
+
+def query_per_request(cargo_kg, limit=5):
+    """Feasible vehicles and drivers straight from the database, ranked in Python."""
+    vehicles = db.session.query(Vehicle, VehicleRiskScore.probability).outerjoin(
+        VehicleRiskScore, VehicleRiskScore.vehicle_id == Vehicle.id,
+    ).filter(
+        Vehicle.status.notin_(dispatch.BLOCKED_VEHICLE_STATUSES), Vehicle.capacity_kg >= cargo_kg,
+    ).all()
+    drivers = Driver.query.filter(
+        Driver.duty_status.notin_(dispatch.BLOCKED_DUTY_STATUSES), Driver.license_expiry >= date.today(),
+    ).order_by(Driver.safety_score.desc()).limit(limit).all()
+    ranked = sorted(vehicles, key=lambda r: cargo_kg / float(r[0].capacity_kg) - float(r[1] or 0.5),
+                    reverse=True)[:limit]
+    return list(zip(ranked, drivers))
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding 5,000 vehicles, 3,000 drivers, 50k trips ...")
+        ids = seed_synthetic(vehicles=5_000, drivers=3_000, trips=50_000, expenses=2_000, maintenance=2_000)
+        risk.refresh()
+        db.session.commit()
+        rnd = random.Random(5)
+
+        index = dispatch.index
+        index.recommend(3_000)  # subscribe to the hub and build
+        with count_queries() as counter:
+            index.rebuild()
+        _, median_ms, min_ms = timeit(index.rebuild, repeat=5)
+        report("full index rebuild", counter["n"], median_ms, min_ms)
+
+        warm = lambda: index.recommend(rnd.uniform(200, 10_000), "Surat", date.today(), 5)
+        with count_queries() as counter:
+            result = warm()
+        _, median_ms, min_ms = timeit(warm, repeat=200)
+        report("warm recommendation", counter["n"], median_ms, min_ms)
+        print(f"  e.g. {result['feasible_vehicles']} feasible vehicles, {result['feasible_drivers']} drivers")
+
+        def after_events():
+            for _ in range(10):
+                events.publish("trip", {"vehicle_id": rnd.choice(ids["vehicle_ids"]),
+                                        "driver_id": rnd.choice(ids["driver_ids"]), "status": "completed"})
+            return warm()
+
+        with count_queries() as counter:
+            after_events()
+        _, median_ms, min_ms = timeit(after_events, repeat=50)
+        report("after 10 trip events", counter["n"], median_ms, min_ms)
+
+        per_request = lambda: query_per_request(rnd.uniform(200, 10_000))
+        with count_queries() as counter:
+            per_request()
+        _, median_ms, min_ms = timeit(per_request, repeat=20)
+        report("query per request", counter["n"], median_ms, min_ms)
+
+
+if __name__ == "__main__":
+    main()
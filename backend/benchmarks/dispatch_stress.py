@@ -0,0 +1,165 @@
+"""
+Run: python benchmarks/dispatch_stress.py
+Concurrent dispatch through POST /trips/ and PATCH /trips/:id/status from
+16 threads, each with its own test client and database session.
+
+    contention   every thread books random pairs from the same 20 vehicles
+                 and 20 drivers, and completes some of its own trips so
+                 they can be booked again. Afterwards no vehicle or driver
+                 may have more than one active trip, and every vehicle and
+                 driver status must agree with its active trips
+    throughput   every thread books its own vehicles and drivers:
+                 dispatches per second with no contention
+
+409 WRITE_CONFLICT answers are retried as the API asks. 422 VEHICLE_ON_TRIP
+and DRIVER_ON_TRIP are races that were lost correctly.
+
+The in-memory SQLite testing database is a single shared connection, so
+this benchmark uses a temporary SQLite file, where SQLite's one writer at
+a time and the version columns settle races. Set BENCH_CONFIG=development
+to run it against PostgreSQL. There the SELECT ... FOR UPDATE row locks
+do the work.
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func
+
+from common import make_app, seed_synthetic
+
+from app import create_app, db
+from app.config import config, TestingConfig
+from app.models import Driver, Trip, Vehicle
+
+THREADS     = 16
+ATTEMPTS    = 60     # contended dispatch attempts per thread
+OWN         = 40     # uncontended dispatches per thread
+MAX_RETRIES = 5
+
+
+def stress_app():
+    if os.environ.get("BENCH_CONFIG"):
+        return make_app()
+
+    class StressConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tempfile.mkdtemp()}/dispatch_stress.db"
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}, "pool_size": THREADS + 4}
+
+    config["stress"] = StressConfig
+    app = create_app("stress")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def run_threads(fn, args):
+    threads = [threading.Thread(target=fn, args=a) for a in args]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def dispatch(client, headers, vehicle_id, driver_id, tally):
+    body = {"vehicle_id": vehicle_id, "driver_id": driver_id, "cargo_weight_kg": 100,
+            "origin": "Surat", "destination": "Mumbai", "scheduled_departure": "2026-10-20T06:00:00"}
+    for _ in range(MAX_RETRIES):
+        resp = client.post("/api/v1/trips/", headers=headers, json=body)
+        data = resp.get_json()
+        if resp.status_code == 409:
+            tally["retried"] += 1
+            time.sleep(random.uniform(0, 0.01))
+            continue
+        tally[str(resp.status_code) if resp.status_code == 201 else data.get("code") or data["message"]] += 1
+        return data["data"]["trip"]["id"] if resp.status_code == 201 else None
+    tally["gave_up"] += 1
+    return None
+
+
+def complete(client, headers, trip_id, tally):
+    for _ in range(MAX_RETRIES):
+        resp = client.patch(f"/api/v1/trips/{trip_id}/status", headers=headers, json={"status": "completed"})
+        if resp.status_code != 409:
+            tally[f"complete {resp.status_code}"] += 1
+            return
+        tally["retried"] += 1
+    tally["gave_up"] += 1
+
+
+def check_consistency():
+    """Active trips per vehicle/driver, and statuses that disagree with them."""
+    active = Trip.status.in_(("dispatched", "in_transit"))
+    doubled_vehicles = db.session.query(Trip.vehicle_id).filter(active).group_by(Trip.vehicle_id).having(
+        func.count() > 1).count()
+    doubled_drivers = db.session.query(Trip.driver_id).filter(active).group_by(Trip.driver_id).having(
+        func.count() > 1).count()
+    busy_vehicles = {v for (v,) in db.session.query(Trip.vehicle_id).filter(active)}
+    busy_drivers  = {d for (d,) in db.session.query(Trip.driver_id).filter(active)}
+    on_trip_vehicles = {v for (v,) in db.session.query(Vehicle.id).filter(Vehicle.status == "on_trip")}
+    on_trip_drivers  = {d for (d,) in db.session.query(Driver.id).filter(Driver.duty_status == "on_trip")}
+    return doubled_vehicles, doubled_drivers, len(busy_vehicles ^ on_trip_vehicles) + len(busy_drivers ^ on_trip_drivers)
+
+
+def main():
+    app = stress_app()
+    with app.app_context():
+        print(f"Seeding 700 vehicles and drivers ({app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}) ...")
+        ids = seed_synthetic(vehicles=700, drivers=700, trips=0, expenses=0, maintenance=0)
+        Vehicle.query.update({"status": "available", "capacity_kg": 5_000})
+        Driver.query.update({"duty_status": "available", "license_expiry": date.today() + timedelta(days=1825)})
+        db.session.commit()
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    vehicles, drivers = ids["vehicle_ids"], ids["driver_ids"]
+
+    # ── Contention ──────────────────────────────────────────────────────────
+    hot_vehicles, hot_drivers = vehicles[:20], drivers[:20]
+    tally, lock = Counter(), threading.Lock()
+
+    def contend(seed):
+        rnd, local, client = random.Random(seed), Counter(), app.test_client()
+        mine = []
+        for _ in range(ATTEMPTS):
+            trip_id = dispatch(client, headers, rnd.choice(hot_vehicles), rnd.choice(hot_drivers), local)
+            if trip_id:
+                mine.append(trip_id)
+            if mine and rnd.random() < 0.5:
+                complete(client, headers, mine.pop(rnd.randrange(len(mine))), local)
+        with lock:
+            tally.update(local)
+
+    elapsed = run_threads(contend, [(i,) for i in range(THREADS)])
+    with app.app_context():
+        doubled_vehicles, doubled_drivers, mismatched = check_consistency()
+    print(f"  contention: {THREADS * ATTEMPTS} attempts on 20 vehicles / 20 drivers in {elapsed:.2f}s")
+    print("   ", ", ".join(f"{k}={v}" for k, v in sorted(tally.items())))
+    print(f"    vehicles with >1 active trip: {doubled_vehicles}, drivers with >1 active trip: {doubled_drivers}, "
+          f"status mismatches: {mismatched}")
+    assert doubled_vehicles == doubled_drivers == mismatched == 0, "double booking"
+
+    # ── Throughput ──────────────────────────────────────────────────────────
+    tally = Counter()
+
+    def own(offset):
+        local, client = Counter(), app.test_client()
+        for i in range(offset, offset + OWN):
+            dispatch(client, headers, vehicles[i], drivers[i], local)
+        with lock:
+            tally.update(local)
+
+    elapsed = run_threads(own, [(20 + t * OWN,) for t in range(THREADS)])
+    print(f"  throughput: {tally['201']} dispatches in {elapsed:.2f}s = {tally['201'] / elapsed:,.0f} dispatches/s "
+          f"({THREADS} threads, retries={tally['retried']})")
+    assert tally["201"] == THREADS * OWN, tally
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Run: python benchmarks/fuel_estimates.py
+Trip fuel-cost estimates on 2,000 vehicles: the vehicle_fuel_stats
+refresh (full sweep and the single-vehicle write-path refresh), the
+dispatch lookup (vehicle + stats in one query, as create_trip does) vs
+deriving km/l and price from expenses and trips on every dispatch, and
+POST /trips/fuel-estimates with 1,000 candidate trips.
+"""
+import random
+from datetime import date, timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Vehicle, VehicleFuelStats, Trip, Expense
+from app.services import fuel
+
+
+def on_the_fly_estimate(vehicle_id, distance_km):
+    """Derive the same inputs from the raw tables on every call."""
+    vehicle = Vehicle.query.get(vehicle_id)
+    since = date.today() - timedelta(days=180)
+    liters = db.session.query(func.sum(Expense.fuel_liters)).filter(
+        Expense.vehicle_id == vehicle_id, Expense.expense_type == "fuel", Expense.expense_date >= since,
+    ).scalar() or 0
+    distance = db.session.query(func.sum(Trip.distance_km)).filter(
+        Trip.vehicle_id == vehicle_id, Trip.status == "completed", Trip.actual_arrival >= since,
+    ).scalar() or 0
+    price = db.session.query(func.avg(Expense.fuel_price_per_liter)).filter(
+        Expense.vehicle_id == vehicle_id, Expense.expense_type == "fuel",
+        Expense.expense_date >= date.today() - timedelta(days=30),
+    ).scalar() or 95
+    kmpl = float(distance) / float(liters) if liters else float(vehicle.fuel_efficiency_kmpl or 6)
+    return distance_km / kmpl * float(price)
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding 2,000 vehicles, 100k trips, 50k expenses ...")
+        ids = seed_synthetic(vehicles=2_000, drivers=1_000, trips=100_000, expenses=50_000, maintenance=500)
+        vehicle_ids = ids["vehicle_ids"]
+
+        def full_refresh():
+            fuel.refresh()
+            db.session.commit()
+
+        one = vehicle_ids[0]
+        for label, fn, repeat in (("full stats refresh", full_refresh, 3),
+                                  ("single-vehicle refresh", lambda: fuel.refresh([one]), 20)):
+            with count_queries() as counter:
+                fn()
+            _, median_ms, min_ms = timeit(fn, repeat=repeat)
+            report(label, counter["n"], median_ms, min_ms)
+        db.session.commit()
+
+        def dispatch_lookup():
+            db.session.expunge_all()
+            vehicle = Vehicle.query.options(db.joinedload(Vehicle.fuel_stats)).get(one)
+            return fuel.estimate(vehicle, 350)["estimated_fuel_cost"]
+
+        def on_the_fly():
+            db.session.expunge_all()
+            return on_the_fly_estimate(one, 350)
+
+        for label, fn in (("dispatch: vehicle + stats row", dispatch_lookup),
+                          ("dispatch: derived per call", on_the_fly)):
+            with count_queries() as counter:
+                fn()
+            _, median_ms, min_ms = timeit(fn, repeat=50)
+            report(label, counter["n"], median_ms, min_ms)
+
+        observed = VehicleFuelStats.query.filter(VehicleFuelStats.km_per_liter.isnot(None)).count()
+        print(f"  vehicles with observed km/l: {observed} / {len(vehicle_ids)}")
+
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+        rnd = random.Random(3)
+        batch = {"trips": [{"vehicle_id": rnd.choice(vehicle_ids), "distance_km": rnd.uniform(50, 1500)}
+                           for _ in range(1_000)]}
+        client = app.test_client()
+
+        def batch_call():
+            resp = client.post("/api/v1/trips/fuel-estimates", json=batch, headers=headers)
+            assert resp.status_code == 200, resp.get_json()
+            return resp
+
+        with count_queries() as counter:
+            batch_call()
+        _, median_ms, min_ms = timeit(batch_call, repeat=10)
+        report("POST /trips/fuel-estimates, 1,000 trips", counter["n"], median_ms, min_ms)
+
+
+if __name__ == "__main__":
+    main()
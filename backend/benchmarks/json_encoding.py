@@ -0,0 +1,124 @@
+"""
+Run: python benchmarks/json_encoding.py
+Microbenchmark of the response path, no HTTP:
+
+    to_dict      1,000 trips through the compiled Trip.to_dict() and through
+                 the hand-written dict it replaced (kept below as a reference)
+    encode       app.json.response() with the stdlib provider and the
+                 orjson provider for three payloads: the 1,000 trip dicts,
+                 5,000 raw analytics rows holding Decimal and date values,
+                 and a nested fleet-prediction style document
+
+Throughput is reported in rows per second.
+"""
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from common import make_app, seed_synthetic
+
+from app import db
+from app.models import Trip
+from app.utils.json_provider import OrjsonProvider, StdlibJSONProvider, orjson
+
+ROWS   = 1_000
+REPEAT = 50
+
+
+def hand_written(t):
+    """Trip.to_dict() as it was written before FIELDS."""
+    return {
+        "id": t.id,
+        "vehicle_id": t.vehicle_id,
+        "driver_id":  t.driver_id,
+        "vehicle_reg": t.vehicle.registration_number if t.vehicle else None,
+        "driver_name": t.driver.full_name if t.driver else None,
+        "cargo_weight_kg": float(t.cargo_weight_kg),
+        "origin": t.origin, "destination": t.destination,
+        "distance_km": float(t.distance_km) if t.distance_km else None,
+        "status": t.status,
+        "scheduled_departure": t.scheduled_departure.isoformat() if t.scheduled_departure else None,
+        "actual_departure": t.actual_departure.isoformat() if t.actual_departure else None,
+        "actual_arrival": t.actual_arrival.isoformat() if t.actual_arrival else None,
+        "estimated_fuel_cost": float(t.estimated_fuel_cost) if t.estimated_fuel_cost else None,
+        "actual_fuel_cost": float(t.actual_fuel_cost) if t.actual_fuel_cost else None,
+        "notes": t.notes,
+        "created_at": t.created_at.isoformat() if t.created_at else None,
+    }
+
+
+def bench(fn, rows):
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    median = samples[len(samples) // 2]
+    return median * 1000, rows / median
+
+
+def show(label, median_ms, per_second, size=None):
+    extra = f"  {size / 1024:8,.0f} KiB" if size is not None else ""
+    print(f"  {label:<32} median={median_ms:8.2f}ms  {per_second:12,.0f} rows/s{extra}")
+
+
+def analytics_rows(n, seed=7):
+    rnd, today = random.Random(seed), date.today()
+    return [{
+        "vehicle_id": f"v{rnd.randrange(500)}", "month": today - timedelta(days=30 * rnd.randrange(24)),
+        "expense_type": rnd.choice(["fuel", "toll", "repair"]),
+        "total": Decimal(f"{rnd.uniform(100, 90_000):.2f}"), "liters": Decimal(f"{rnd.uniform(10, 900):.2f}"),
+        "trips": rnd.randrange(200),
+    } for _ in range(n)]
+
+
+def prediction_document(n, seed=7):
+    rnd = random.Random(seed)
+    return {"fleet": [{
+        "vehicle_id": f"v{i}", "registration": f"GJ05BX{i:04d}", "probability": rnd.random(),
+        "risk_level": rnd.choice(["low", "medium", "high"]), "predicted_on": date.today(),
+        "features": {k: rnd.uniform(0, 1) for k in ("age", "km", "incidents", "overdue", "cost_trend")},
+        "history": [{"month": date.today() - timedelta(days=30 * m), "cost": round(rnd.uniform(0, 5e4), 2)}
+                    for m in range(12)],
+    } for i in range(n)], "model_version": "bench"}
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding ...")
+        seed_synthetic(vehicles=500, drivers=400, trips=5_000, expenses=1_000, maintenance=100)
+        trips = Trip.query.options(*Trip.eager_refs()).limit(ROWS).all()
+        db.session.expunge_all()
+        assert [hand_written(t) for t in trips] == [t.to_dict() for t in trips]
+
+        print(f"to_dict, {ROWS:,} trips")
+        show("hand-written", *bench(lambda: [hand_written(t) for t in trips], ROWS))
+        show("compiled from FIELDS", *bench(lambda: [t.to_dict() for t in trips], ROWS))
+
+        payloads = (
+            (f"trip dicts ({ROWS:,})", [t.to_dict() for t in trips], ROWS),
+            ("analytics rows (5,000)", analytics_rows(5_000), 5_000),
+            ("fleet predictions (1,000)", prediction_document(1_000), 1_000),
+        )
+        providers = [("stdlib", StdlibJSONProvider(app))]
+        if orjson is not None:
+            providers.append(("orjson", OrjsonProvider(app)))
+        else:
+            print("orjson is not installed; only the stdlib provider is measured")
+
+        for label, payload, rows in payloads:
+            print(f"encode {label}")
+            bodies = {}
+            for name, provider in providers:
+                data = {"status": "success", "data": payload}
+                bodies[name] = provider.response(data).get_data()
+                show(name, *bench(lambda: provider.response(data), rows), size=len(bodies[name]))
+            if "orjson" in bodies:
+                assert orjson.loads(bodies["orjson"]) == orjson.loads(bodies["stdlib"]), label
+
+
+if __name__ == "__main__":
+    main()
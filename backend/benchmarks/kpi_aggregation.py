@@ -0,0 +1,86 @@
+"""
+Run: python benchmarks/kpi_aggregation.py
+Compares the original per-figure KPI queries with the single-pass
+aggregation in app.services.kpis on a seeded 100k-trip dataset.
+"""
+from datetime import date, timedelta
+from sqlalchemy import func
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Vehicle, Driver, Trip, Expense
+from app.services.kpis import compute_kpis
+
+
+def legacy_compute_kpis():
+    """The pre-aggregation implementation, kept here as the baseline."""
+    today = date.today()
+    expiry_threshold = today + timedelta(days=30)
+
+    total_vehicles  = Vehicle.query.filter(Vehicle.status != "retired").count()
+    active_vehicles = Vehicle.query.filter_by(status="on_trip").count()
+    in_shop         = Vehicle.query.filter_by(status="in_shop").count()
+    available       = Vehicle.query.filter_by(status="available").count()
+
+    license_expiring = Driver.query.filter(
+        Driver.license_expiry <= expiry_threshold,
+        Driver.license_expiry >= today
+    ).count()
+    license_expired = Driver.query.filter(Driver.license_expiry < today).count()
+
+    pending_trips   = Trip.query.filter_by(status="pending").count()
+    in_transit      = Trip.query.filter(Trip.status.in_(["dispatched", "in_transit"])).count()
+    completed_today = Trip.query.filter(
+        Trip.status == "completed",
+        func.date(Trip.actual_arrival) == today
+    ).count()
+
+    month_start = today.replace(day=1)
+    monthly_expenses = db.session.query(func.sum(Expense.amount)).filter(
+        Expense.expense_date >= month_start
+    ).scalar() or 0
+    fuel_expenses = db.session.query(func.sum(Expense.amount)).filter(
+        Expense.expense_date >= month_start,
+        Expense.expense_type == "fuel"
+    ).scalar() or 0
+
+    utilization = round((active_vehicles / total_vehicles * 100), 1) if total_vehicles else 0
+    maintenance_alerts = in_shop + license_expiring + license_expired
+    service_due = Vehicle.query.filter(
+        Vehicle.next_service_km.isnot(None),
+        Vehicle.odometer_km >= Vehicle.next_service_km - 5000
+    ).count()
+
+    return {
+        "fleet": {"total": total_vehicles, "active": active_vehicles, "available": available,
+                  "in_shop": in_shop, "utilization_pct": utilization},
+        "alerts": {"total": maintenance_alerts + service_due, "in_shop": in_shop,
+                   "license_expiring": license_expiring, "license_expired": license_expired,
+                   "service_due": service_due},
+        "trips": {"pending": pending_trips, "in_transit": in_transit, "completed_today": completed_today},
+        "financials": {"monthly_expenses": float(monthly_expenses), "monthly_fuel": float(fuel_expenses)},
+    }
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        print("Seeding 100k trips ...")
+        seed_synthetic(trips=100_000)
+
+        results = {}
+        for label, fn in (("legacy (per-figure)", legacy_compute_kpis),
+                          ("single-pass aggregates", compute_kpis)):
+            with count_queries() as counter:
+                fn()
+            data, median_ms, min_ms = timeit(fn)
+            results[label] = data
+            report(label, counter["n"], median_ms, min_ms)
+
+        legacy, current = results.values()
+        print("  payloads identical:", legacy == current)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Run: python benchmarks/load_plan.py
+Load planning of 1,000 consignments over 40 lanes against 500 available
+vehicles: planning time and queries, plan quality (trips used vs a
+per-lane lower bound, utilisation, what was left unassigned), the same
+plan without the local-improvement passes, and committing the plan as
+trips in one transaction.
+"""
+import math
+import random
+import time
+
+from flask_jwt_extended import create_access_token
+
+from common import CITIES, make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Driver, Trip, Vehicle
+from app.services import dispatch, loadplan
+
+
+def consignments(n, lanes, rnd):
+    routes = [tuple(rnd.sample(CITIES, 2)) for _ in range(lanes)]
+    return [{"ref": f"C{i}", "weight_kg": round(rnd.uniform(50, 2_500), 1),
+             "origin": o, "destination": d} for i, (o, d) in ((i, rnd.choice(routes)) for i in range(n))]
+
+
+def lower_bound(items, vehicles):
+    """Per lane: trips needed if every vehicle were as large as the largest in the fleet."""
+    largest = max(v["capacity_kg"] for v in vehicles)
+    lanes = {}
+    for c in items:
+        key = (c["origin"], c["destination"])
+        lanes[key] = lanes.get(key, 0) + c["weight_kg"]
+    return sum(math.ceil(total / largest) for total in lanes.values())
+
+
+def summarize(label, result, bound):
+    s = result["summary"]
+    print(f"  {label}: {s['trips']} trips (lower bound {bound}), {s['assigned']}/{s['consignments']} "
+          f"assigned, avg utilisation {s['avg_utilization']:.1%}, {len(result['unassigned'])} unassigned")
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding 500 vehicles, 800 drivers ...")
+        ids = seed_synthetic(vehicles=500, drivers=800, trips=2_000, expenses=500, maintenance=200)
+        # Every vehicle and driver free for the plan
+        Vehicle.query.update({"status": "available"})
+        Driver.query.update({"duty_status": "available"})
+        db.session.commit()
+        dispatch.index.invalidate()
+        rnd = random.Random(11)
+        items = consignments(1_000, 40, rnd)
+        vehicles, _ = dispatch.index.snapshot()
+        bound = lower_bound(items, vehicles)
+        print(f"  {len(vehicles)} dispatchable vehicles, "
+              f"{sum(c['weight_kg'] for c in items) / 1000:,.0f} t of cargo")
+
+        with count_queries() as counter:
+            result = loadplan.plan(items)
+        _, median_ms, min_ms = timeit(lambda: loadplan.plan(items), repeat=10)
+        report("plan 1,000 consignments", counter["n"], median_ms, min_ms)
+        summarize("with local improvement", result, bound)
+
+        consolidate, downsize = loadplan._consolidate, loadplan._downsize
+        loadplan._consolidate, loadplan._downsize = (lambda bins, pool: bins), (lambda bins, pool: None)
+        try:
+            summarize("first-fit-decreasing only", loadplan.plan(items), bound)
+        finally:
+            loadplan._consolidate, loadplan._downsize = consolidate, downsize
+
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        client = app.test_client()
+        with count_queries() as counter:
+            start = time.perf_counter()
+            resp = client.post("/api/v1/trips/load-plan/commit", headers={"Authorization": f"Bearer {token}"},
+                               json={"trips": result["trips"], "scheduled_departure": "2026-10-20T06:00:00"})
+            elapsed = (time.perf_counter() - start) * 1000
+        assert resp.status_code == 201, resp.get_json()
+        report(f"commit {resp.get_json()['data']['count']} trips", counter["n"], elapsed, elapsed)
+        print("  load-plan trips in the database:", Trip.query.filter(Trip.notes.like("Load plan%")).count())
+
+
+if __name__ == "__main__":
+    main()
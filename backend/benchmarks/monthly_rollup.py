@@ -0,0 +1,55 @@
+"""
+Run: python benchmarks/monthly_rollup.py
+12-month P&L as the expense history grows: grouping raw expenses and trips
+vs reading vehicle_month_rollup, plus the cost of a full rollup rebuild.
+"""
+from datetime import date
+from sqlalchemy import func
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Trip, Expense
+from app.services import reports, rollup
+from app.utils.helpers import month_starts, next_month
+from app.utils.sql import sum_if, year_month
+
+
+def raw_summary(months):
+    """The same report grouped straight from expenses and trips (two scans)."""
+    starts = month_starts(months, date.today())
+    first, end = starts[0], next_month(starts[-1])
+    y, m = year_month(Expense.expense_date)
+    costs = db.session.query(
+        y, m, func.sum(Expense.amount),
+        sum_if(Expense.amount, Expense.expense_type == "fuel"),
+        sum_if(Expense.amount, Expense.expense_type == "repair"),
+    ).filter(Expense.expense_date >= first, Expense.expense_date < end).group_by(y, m).all()
+    ty, tm = year_month(Trip.actual_arrival)
+    trips = db.session.query(ty, tm, func.count()).filter(
+        Trip.status == "completed", Trip.actual_arrival >= first, Trip.actual_arrival < end,
+    ).group_by(ty, tm).all()
+    return costs, trips
+
+
+def main():
+    for years in (1, 3):
+        app = make_app()
+        with app.app_context(), app.test_request_context():
+            trips, expenses = 100_000 * years, 50_000 * years
+            print(f"{years} year(s) of history: {trips:,} trips, {expenses:,} expenses")
+            seed_synthetic(vehicles=500, trips=trips, expenses=expenses, days=365 * years)
+
+            with count_queries() as counter:
+                _, median_ms, min_ms = timeit(rollup.rebuild, repeat=1)
+            report("full rollup rebuild", counter["n"], median_ms, min_ms)
+            for label, fn in (("grouped raw tables", lambda: raw_summary(12)),
+                              ("rollup query", lambda: reports.compute_monthly_summary(12))):
+                with count_queries() as counter:
+                    fn()
+                _, median_ms, min_ms = timeit(fn, repeat=5)
+                report(label, counter["n"], median_ms, min_ms)
+
+
+if __name__ == "__main__":
+    main()
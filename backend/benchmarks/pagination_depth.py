@@ -0,0 +1,56 @@
+"""
+Run: python benchmarks/pagination_depth.py
+GET /trips/ over 200,000 trips at increasing depth: offset pages
+(?page=N, OFFSET plus a COUNT(*) each time) against keyset pages
+(?cursor=, a seek on the (created_at, id) index and no COUNT). It also
+shows keyset pages that ask for ?total=exact.
+"""
+from flask_jwt_extended import create_access_token
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app.models import Trip
+from app.utils.helpers import _encode_cursor
+
+PER_PAGE = 20
+DEPTHS   = (1, 100, 1_000, 5_000, 9_999)
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding 200,000 trips ...")
+        ids = seed_synthetic(vehicles=500, drivers=400, trips=200_000, expenses=1_000, maintenance=100)
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+        client = app.test_client()
+
+        def fetch(url):
+            resp = client.get(url, headers=headers)
+            assert resp.status_code == 200, resp.get_json()
+            return resp.get_json()
+
+        for page in DEPTHS:
+            # The cursor a client would hold after walking to this page: the last row of the page before
+            offset = (page - 1) * PER_PAGE
+            cursor = ""
+            if offset:
+                last = Trip.query.order_by(Trip.created_at.desc(), Trip.id.desc()).offset(offset - 1).first()
+                cursor = _encode_cursor(last.created_at, last.id)
+
+            offset_url = f"/api/v1/trips/?page={page}&per_page={PER_PAGE}"
+            keyset_url = f"/api/v1/trips/?cursor={cursor}&per_page={PER_PAGE}"
+            assert ([t["id"] for t in fetch(offset_url)["data"]]
+                    == [t["id"] for t in fetch(keyset_url)["data"]]), f"page {page} differs"
+
+            print(f"page {page:,} (row {offset:,})")
+            for label, url in (("offset + count", offset_url), ("keyset", keyset_url),
+                               ("keyset + total=exact", keyset_url + "&total=exact")):
+                with count_queries() as counter:
+                    fetch(url)
+                _, median_ms, min_ms = timeit(lambda: fetch(url), repeat=10)
+                report(label, counter["n"], median_ms, min_ms)
+
+
+if __name__ == "__main__":
+    main()
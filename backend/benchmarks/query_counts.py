@@ -0,0 +1,74 @@
+"""
+Run: python benchmarks/query_counts.py
+Asserts that list and detail endpoints issue a constant number of SQL
+queries regardless of page size (no per-row lazy loads), and that a
+single-trip dispatch (POST /trips/ with a distance, so the fuel estimate
+runs) stays at DISPATCH_QUERIES: the vehicle is locked and its fuel stats
+loaded in one SELECT.
+"""
+import sys
+from datetime import date, datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from common import make_app, seed_synthetic, count_queries
+
+from app.models import Vehicle, Driver
+
+ENDPOINTS = [
+    "/api/v1/trips/?per_page={n}",
+    "/api/v1/expenses/",
+    "/api/v1/maintenance/",
+    "/api/v1/dashboard/live-trips",
+    "/api/v1/dashboard/recent-activity",
+    "/api/v1/vehicles/{vehicle_id}",
+    "/api/v1/drivers/{driver_id}",
+]
+DISPATCH_QUERIES = 8
+
+
+def main():
+    app = make_app()
+    failures = 0
+    with app.app_context():
+        ids = seed_synthetic(vehicles=200, drivers=150, trips=5_000, expenses=2_000, maintenance=500)
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+        vehicle_id = Vehicle.query.first().id
+        driver_id  = Driver.query.first().id
+
+    client = app.test_client()
+    with app.app_context():
+        for template in ENDPOINTS:
+            counts = []
+            for n in (10, 100):
+                url = template.format(n=n, vehicle_id=vehicle_id, driver_id=driver_id)
+                with count_queries() as counter:
+                    resp = client.get(url, headers=headers)
+                assert resp.status_code == 200, (url, resp.status_code)
+                counts.append(counter["n"])
+            constant = "trips/?" not in template or counts[0] == counts[1]
+            ok = constant and max(counts) <= 4
+            failures += not ok
+            print(f"  {'ok  ' if ok else 'FAIL'} {template:<40} queries={counts}")
+
+        vehicle = Vehicle.query.filter_by(status="available").order_by(Vehicle.capacity_kg.desc()).first()
+        driver  = Driver.query.filter(Driver.duty_status == "available",
+                                      Driver.license_expiry > date.today() + timedelta(days=7)).first()
+        body = {
+            "vehicle_id": vehicle.id, "driver_id": driver.id, "cargo_weight_kg": 100,
+            "origin": "Ahmedabad", "destination": "Surat", "distance_km": 265,
+            "scheduled_departure": (datetime.now() + timedelta(days=1)).isoformat(),
+        }
+        with count_queries() as counter:
+            resp = client.post("/api/v1/trips/", json=body, headers=headers)
+        assert resp.status_code == 201, (resp.status_code, resp.get_json())
+        ok = counter["n"] <= DISPATCH_QUERIES
+        failures += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} {'POST /api/v1/trips/ (dispatch)':<40} queries={counter['n']}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Run: python benchmarks/risk_model.py
+Trains the maintenance-risk RandomForest on a synthetic fleet into a
+temporary registry, then reports model load time and memory, predict_proba
+latency per 1,000 vehicles, and the end-to-end fleet scoring path with the
+model vs the heuristic.
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app.services import risk, risk_model
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context(), tempfile.TemporaryDirectory() as root:
+        print("Seeding 2,000 vehicles, 100k trips, 20k maintenance logs ...")
+        seed_synthetic(vehicles=2_000, drivers=1_500, trips=100_000, expenses=5_000, maintenance=20_000)
+        registry = risk_model.ModelRegistry(root)
+
+        start = time.perf_counter()
+        version, meta = risk_model.train(registry)
+        print(f"  trained {version}: {meta['rows']} rows in {time.perf_counter() - start:.1f}s, "
+              f"holdout {meta['metrics']}")
+        size_mb = os.path.getsize(os.path.join(root, version, "model.joblib")) / 1e6
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        registry.load()
+        load_ms = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  model load: {load_ms:.1f}ms, {size_mb:.1f} MB on disk, {peak / 1e6:.1f} MB peak allocation")
+
+        app.config.update(RISK_MODEL_ENABLED=True, MODEL_REGISTRY_DIR=root)
+        risk_model.init_app(app)
+        features = risk_model.snapshot_features(date.today())
+        per_1k = features.iloc[:1000]
+        _, median_ms, min_ms = timeit(lambda: risk_model.predict_proba(per_1k), repeat=20)
+        report("predict_proba, 1k vehicles", 0, median_ms, min_ms)
+        _, median_ms, min_ms = timeit(lambda: risk_model.predict_proba(features), repeat=10)
+        report(f"predict_proba, {len(features)} vehicles", 0, median_ms, min_ms)
+
+        for label, enabled in (("fleet scoring, model", True), ("fleet scoring, heuristic", False)):
+            app.config["RISK_MODEL_ENABLED"] = enabled
+            risk_model.init_app(app)
+            with count_queries() as counter:
+                risk.fleet_predictions()
+            _, median_ms, min_ms = timeit(risk.fleet_predictions, repeat=5)
+            report(label, counter["n"], median_ms, min_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Run: python benchmarks/risk_scoring.py
+Fleet maintenance predictions: the original per-vehicle heuristic (one
+MaintenanceLog count per vehicle) vs the vectorized batch in
+app.services.risk vs reading the stored vehicle_risk_scores rows, and a
+check that all of them produce identical predictions.
+"""
+from datetime import date, timedelta
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Vehicle, MaintenanceLog
+from app.services import risk
+
+
+def legacy_score(vehicle):
+    """The original _maintenance_risk_score() from app/api/ai.py."""
+    score = 0.0
+    reasons = []
+    if vehicle.next_service_km:
+        km_remaining = float(vehicle.next_service_km) - float(vehicle.odometer_km)
+        if km_remaining <= 0:
+            score += 0.40
+            reasons.append("Overdue for service")
+        elif km_remaining <= 2000:
+            score += 0.30
+            reasons.append(f"Only {km_remaining:.0f}km until next service")
+        elif km_remaining <= 5000:
+            score += 0.15
+            reasons.append(f"{km_remaining:.0f}km to next service")
+    if vehicle.last_service_date:
+        days_since = (date.today() - vehicle.last_service_date).days
+        if days_since > 180:
+            score += 0.25
+            reasons.append(f"No service in {days_since} days")
+        elif days_since > 90:
+            score += 0.10
+            reasons.append(f"Last serviced {days_since} days ago")
+    recent_repairs = MaintenanceLog.query.filter(
+        MaintenanceLog.vehicle_id == vehicle.id,
+        MaintenanceLog.service_date >= date.today() - timedelta(days=90),
+    ).count()
+    if recent_repairs >= 3:
+        score += 0.20
+        reasons.append(f"{recent_repairs} repairs in last 90 days")
+    elif recent_repairs >= 2:
+        score += 0.10
+    if float(vehicle.odometer_km) > 200000:
+        score += 0.10
+        reasons.append("High mileage vehicle (>200k km)")
+    score = min(score, 1.0)
+    if score >= 0.7:
+        risk_level, action, days_est = "high", "Schedule immediate service", 3
+    elif score >= 0.4:
+        risk_level, action, days_est = "medium", "Service recommended within 2 weeks", 14
+    else:
+        risk_level, action, days_est = "low", "Vehicle is healthy", None
+    return {"risk_level": risk_level, "probability": round(score, 3),
+            "recommended_action": action, "estimated_days": days_est, "reasons": reasons}
+
+
+def legacy_fleet():
+    results = [{
+        "vehicle_id": v.id, "registration": v.registration_number,
+        "make_model": f"{v.make} {v.model}", "current_status": v.status,
+        "prediction": legacy_score(v),
+    } for v in Vehicle.query.filter(Vehicle.status != "retired").all()]
+    results.sort(key=lambda x: x["prediction"]["probability"], reverse=True)
+    return results
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding 2,000 vehicles, 20k maintenance logs ...")
+        seed_synthetic(vehicles=2_000, trips=10_000, expenses=5_000, maintenance=20_000)
+
+        def full_sweep():
+            risk.refresh()
+            db.session.commit()
+
+        stored     = lambda: [risk.fleet_row(s) for s in risk.stored_predictions()]
+        high_risk  = lambda: [risk.fleet_row(s) for s in risk.stored_predictions(["high"])]
+        for label, fn, repeat in (("legacy per-vehicle heuristic", legacy_fleet, 3),
+                                  ("vectorized batch", risk.fleet_predictions, 10),
+                                  ("daily sweep (refresh all)", full_sweep, 3),
+                                  ("stored scores, whole fleet", stored, 10),
+                                  ("stored scores, high risk only", high_risk, 10)):
+            with count_queries() as counter:
+                fn()
+            _, median_ms, min_ms = timeit(fn, repeat=repeat)
+            report(label, counter["n"], median_ms, min_ms)
+
+        old = {r["vehicle_id"]: r for r in legacy_fleet()}
+        new = {r["vehicle_id"]: r for r in risk.fleet_predictions()}
+        print("  identical predictions:", old == new)
+        kept = {r["vehicle_id"]: {k: v for k, v in r["prediction"].items() if k not in ("model", "computed_at")}
+                for r in stored()}
+        print("  stored scores match:", kept == {vid: r["prediction"] for vid, r in old.items()})
+        single = all(risk.vehicle_prediction(vid) == old[vid]["prediction"] for vid in list(old)[:200])
+        print("  single-vehicle path matches:", single)
+
+
+if __name__ == "__main__":
+    main()
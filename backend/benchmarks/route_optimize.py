@@ -0,0 +1,52 @@
+"""
+Run: python benchmarks/route_optimize.py
+Multi-stop route optimization on 100, 300 and 500 random stops spread over
+western and central India, with 2,000 stored road distances. For each
+size it reports queries and time for the full optimize call, and the
+route length for the input order, nearest neighbour alone and nearest
+neighbour + 2-opt.
+"""
+import random
+
+from sqlalchemy import insert
+
+from common import make_app, count_queries, timeit, report
+
+from app import db
+from app.models import gen_uuid, Location, LocationDistance
+from app.services import routing
+
+
+def seed_locations(n, rnd):
+    rows = [{"id": gen_uuid(), "name": f"Depot {i}", "key": f"depot {i}",
+             "latitude": round(rnd.uniform(17.0, 28.5), 6), "longitude": round(rnd.uniform(69.5, 80.0), 6)}
+            for i in range(n)]
+    db.session.execute(insert(Location), rows)
+    pairs = {tuple(sorted(rnd.sample([r["id"] for r in rows], 2))) for _ in range(2_000)}
+    db.session.execute(insert(LocationDistance), [
+        {"from_id": a, "to_id": b, "distance_km": round(rnd.uniform(50, 1_500), 1)} for a, b in pairs
+    ])
+    db.session.commit()
+    return [r["name"] for r in rows]
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        rnd = random.Random(3)
+        names = seed_locations(600, rnd)
+        for size in (100, 300, 500):
+            origin, *stops = rnd.sample(names, size + 1)
+            run = lambda: routing.optimize(origin, stops)
+            with count_queries() as counter:
+                result = run()
+            _, median_ms, min_ms = timeit(run, repeat=5)
+            report(f"optimize {size} stops", counter["n"], median_ms, min_ms)
+            greedy = routing.optimize(origin, stops, improve=False)
+            print(f"    input order {result['input_order_km']:>10,.0f} km   nearest neighbour "
+                  f"{greedy['distance_km']:>9,.0f} km   + 2-opt {result['distance_km']:>9,.0f} km "
+                  f"({1 - result['distance_km'] / greedy['distance_km']:.1%} shorter)")
+
+
+if __name__ == "__main__":
+    main()
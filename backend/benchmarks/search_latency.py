@@ -0,0 +1,64 @@
+"""
+Run: python benchmarks/search_latency.py [trips]
+Latency of GET /search/ over 1,000,000 trips (pass a smaller count for a
+quick run). Each term is also sent to the list endpoint's ?search= filter,
+a plain ILIKE '%term%', to show what it finds and how long it takes:
+
+    exact      a city or plate fragment spelled right
+    typo       the same term misspelled. ILIKE finds nothing here, while
+               /search/ still ranks the intended rows first
+    no match   a term that matches no row, the worst case for a scan
+
+On the SQLite testing config the trigram functions run in Python over every
+row. Set BENCH_CONFIG=development to measure the PostgreSQL path, where the
+GIN gin_trgm_ops indexes serve both ILIKE and the <% operator.
+"""
+import sys
+
+from flask_jwt_extended import create_access_token
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+TRIPS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+TERMS = [
+    # (label, list endpoint, ?types=, term)
+    ("city, exact",     "trips",    "trips",    "Ahmedabad"),
+    ("city, typo",      "trips",    "trips",    "Ahmdabad"),
+    ("plate, exact",    "vehicles", "vehicles", "BX0042"),
+    ("plate, typo",     "vehicles", "vehicles", "BX00042"),
+    ("driver, typo",    None,       "drivers",  "Drivr 123"),
+    ("no match",        "trips",    "trips",    "Zzyzx"),
+    ("all types, typo", None,       "",         "Vadodra"),
+]
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print(f"Seeding {TRIPS:,} trips ...")
+        ids = seed_synthetic(vehicles=2_000, drivers=1_500, trips=TRIPS, expenses=1_000, maintenance=100)
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+        client = app.test_client()
+
+        def fetch(url):
+            resp = client.get(url, headers=headers)
+            assert resp.status_code == 200, resp.get_json()
+            return resp.get_json()
+
+        for label, listing, types, term in TERMS:
+            print(f"{label}: {term!r}")
+            urls = [("search", f"/api/v1/search/?q={term}&types={types}&limit=10")]
+            if listing:
+                urls.insert(0, ("ilike list", f"/api/v1/{listing}/?search={term}&cursor=&per_page=10"))
+            for name, url in urls:
+                data = fetch(url)["data"]
+                found = sum(map(len, data.values())) if isinstance(data, dict) else len(data)
+                with count_queries() as counter:
+                    fetch(url)
+                _, median_ms, min_ms = timeit(lambda: fetch(url), repeat=3)
+                report(f"{name} ({found} rows)", counter["n"], median_ms, min_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Run: python benchmarks/sparse_fields.py
+1,000-row pages of each list endpoint's model, loaded and serialized three
+ways:
+
+    to_dict        ORM objects (with the eager-loaded vehicle/driver rows)
+                   and to_dict(), what the endpoints return by default
+    all fields     ?fields= naming every field: the same output, built from
+                   row tuples by app.utils.fields
+    table view     ?fields= naming the five columns a table view shows
+
+It reports the time to load and serialize, and the JSON payload size.
+GET /trips/?per_page=1000 is also timed end to end with and without
+?fields=.
+"""
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app.models import Driver, Expense, MaintenanceLog, Trip, Vehicle
+from app.utils.fields import FIELDS, Projection
+
+ROWS = 1_000
+VIEWS = {
+    Vehicle:        ("registration_number", "make", "model", "status", "odometer_km"),
+    Driver:         ("full_name", "license_number", "duty_status", "safety_score", "license_days_remaining"),
+    Trip:           ("vehicle_reg", "driver_name", "origin", "destination", "status"),
+    MaintenanceLog: ("vehicle_reg", "service_type", "cost", "service_date", "status"),
+    Expense:        ("vehicle_reg", "expense_type", "amount", "expense_date", "driver_name"),
+}
+SORT = {Vehicle: Vehicle.created_at, Driver: Driver.created_at, Trip: Trip.created_at,
+        MaintenanceLog: MaintenanceLog.service_date, Expense: Expense.expense_date}
+
+
+def payload_kb(data):
+    return len(jsonify({"status": "success", "data": data}).get_data()) / 1024
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding ...")
+        ids = seed_synthetic(vehicles=2_000, drivers=2_000, trips=20_000, expenses=20_000, maintenance=5_000)
+
+        for model, view in VIEWS.items():
+            sort = SORT[model]
+            print(f"{model.__tablename__}: {ROWS:,} rows")
+
+            def as_objects():
+                q = model.query
+                if hasattr(model, "eager_refs"):
+                    q = q.options(*model.eager_refs())
+                return [row.to_dict() for row in q.order_by(sort.desc(), model.id.desc()).limit(ROWS).all()]
+
+            def projected(names):
+                projection = Projection(model, names, sort)
+                return lambda: projection.dump(
+                    projection.select(model.query).order_by(sort.desc(), model.id.desc()).limit(ROWS).all())
+
+            full = as_objects()
+            for label, fn in (("to_dict", as_objects), ("all fields", projected(list(FIELDS[model]))),
+                              ("table view", projected(view))):
+                data = fn()
+                if label == "all fields":
+                    assert data == full, f"{model.__tablename__}: projection differs from to_dict()"
+                with count_queries() as counter:
+                    fn()
+                _, median_ms, min_ms = timeit(fn, repeat=10)
+                report(f"{label} ({payload_kb(data):,.0f} KiB)", counter["n"], median_ms, min_ms)
+
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+        client = app.test_client()
+        print(f"GET /trips/?per_page={ROWS}")
+        for label, url in (("default", f"/api/v1/trips/?per_page={ROWS}"),
+                           ("?fields= table view", f"/api/v1/trips/?per_page={ROWS}&fields={','.join(VIEWS[Trip])}")):
+            with count_queries() as counter:
+                size = len(client.get(url, headers=headers).get_data()) / 1024
+            _, median_ms, min_ms = timeit(lambda: client.get(url, headers=headers), repeat=10)
+            report(f"{label} ({size:,.0f} KiB)", counter["n"], median_ms, min_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Run: python benchmarks/trip_batch.py
+Dispatching and then completing 300 trips: one POST /trips/ and one PATCH
+/trips/:id/status per trip against POST /trips/batch and PATCH
+/trips/batch/status. Reports queries and wall time for each.
+"""
+import time
+from datetime import date, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from common import make_app, seed_synthetic, count_queries, report
+
+from app import db
+from app.models import Driver, Vehicle
+from app.services import dispatch
+
+N = 300
+
+
+def trip_body(vehicle_id, driver_id):
+    return {"vehicle_id": vehicle_id, "driver_id": driver_id, "cargo_weight_kg": 500, "origin": "Surat",
+            "destination": "Mumbai", "scheduled_departure": "2026-10-20T06:00:00", "distance_km": 284}
+
+
+def measure(label, fn):
+    with count_queries() as counter:
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+    report(label, counter["n"], elapsed, elapsed)
+    return result
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print(f"Seeding {2 * N} vehicles and drivers ...")
+        ids = seed_synthetic(vehicles=2 * N, drivers=2 * N, trips=5_000, expenses=1_000, maintenance=100)
+        Vehicle.query.update({"status": "available", "capacity_kg": 5_000})
+        Driver.query.update({"duty_status": "available", "license_expiry": date.today() + timedelta(days=1825)})
+        db.session.commit()
+        dispatch.index.invalidate()
+        token = create_access_token(identity=ids["user_id"], additional_claims={"role": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+        client = app.test_client()
+        pairs = list(zip(ids["vehicle_ids"], ids["driver_ids"]))
+        single, batch = pairs[:N], pairs[N:]
+
+        def one_by_one():
+            return [client.post("/api/v1/trips/", headers=headers, json=trip_body(v, d)).get_json()["data"]["trip"]["id"]
+                    for v, d in single]
+
+        def in_one_batch():
+            resp = client.post("/api/v1/trips/batch", headers=headers,
+                               json={"trips": [trip_body(v, d) for v, d in batch]})
+            assert resp.status_code == 201 and not resp.get_json()["data"]["failed"], resp.get_json()
+            return [t["id"] for t in resp.get_json()["data"]["trips"]]
+
+        single_ids = measure(f"dispatch {N}, one by one", one_by_one)
+        batch_ids  = measure(f"dispatch {N}, batch", in_one_batch)
+
+        def close_one_by_one():
+            for trip_id in single_ids:
+                resp = client.patch(f"/api/v1/trips/{trip_id}/status", headers=headers,
+                                    json={"status": "completed", "actual_fuel_cost": 4_000})
+                assert resp.status_code == 200, resp.get_json()
+
+        def close_in_one_batch():
+            resp = client.patch("/api/v1/trips/batch/status", headers=headers, json={"transitions": [
+                {"trip_id": trip_id, "status": "completed", "actual_fuel_cost": 4_000} for trip_id in batch_ids
+            ]})
+            assert resp.status_code == 200 and not resp.get_json()["data"]["failed"], resp.get_json()
+
+        measure(f"complete {N}, one by one", close_one_by_one)
+        measure(f"complete {N}, batch", close_in_one_batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Run: python benchmarks/vehicle_roi.py
+Vehicle ROI for a 2,000-vehicle fleet: the original three-queries-per-vehicle
+loop vs the single rollup query in app.services.reports.
+"""
+from sqlalchemy import func
+
+from common import make_app, seed_synthetic, count_queries, timeit, report
+
+from app import db
+from app.models import Trip, Vehicle, Expense
+from app.services import reports
+
+
+def legacy_roi():
+    """The original implementation (3 queries per non-retired vehicle)."""
+    result = []
+    for v in Vehicle.query.filter(Vehicle.status != "retired").all():
+        total_cost = db.session.query(func.sum(Expense.amount)).filter_by(vehicle_id=v.id).scalar() or 0
+        trips_done = Trip.query.filter_by(vehicle_id=v.id, status="completed").count()
+        total_dist = db.session.query(func.sum(Trip.distance_km)).filter_by(
+            vehicle_id=v.id, status="completed"
+        ).scalar() or 0
+        estimated_revenue = float(total_dist or 0) * 45
+        result.append({
+            "vehicle_id": v.id, "total_cost": float(total_cost),
+            "estimated_revenue": estimated_revenue,
+            "net_roi": estimated_revenue - float(total_cost),
+            "trips_completed": trips_done, "total_distance_km": float(total_dist or 0),
+        })
+    result.sort(key=lambda x: x["net_roi"], reverse=True)
+    return result
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        print("Seeding 2,000 vehicles, 100k trips, 50k expenses ...")
+        seed_synthetic(vehicles=2_000, drivers=1_500, trips=100_000, expenses=50_000)
+
+        full = lambda: [reports.roi_row(r) for r in reports.vehicle_roi_query()]
+        page = lambda: [reports.roi_row(r) for r in reports.vehicle_roi_query().limit(20)]
+        for label, fn, repeat in (("legacy per-vehicle loop", legacy_roi, 1),
+                                  ("rollup query, full fleet", full, 5),
+                                  ("rollup query, one page of 20", page, 5)):
+            with count_queries() as counter:
+                fn()
+            _, median_ms, min_ms = timeit(fn, repeat=repeat)
+            report(label, counter["n"], median_ms, min_ms)
+
+        keys = ("vehicle_id", "total_cost", "trips_completed", "total_distance_km")
+        old = {r["vehicle_id"]: tuple(round(r[k], 2) if isinstance(r[k], float) else r[k] for k in keys)
+               for r in legacy_roi()}
+        new = {r["vehicle_id"]: tuple(round(r[k], 2) if isinstance(r[k], float) else r[k] for k in keys)
+               for r in full()}
+        print("  identical figures:", old == new)
+
+
+if __name__ == "__main__":
+    main()
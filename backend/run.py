@@ -1,6 +1,9 @@
 from app import create_app
+from app.services import autocomplete
 
 app = create_app()
+# Web workers only: Celery, seed.py and train_risk_model.py create the app without this
+autocomplete.warm(app)
 
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
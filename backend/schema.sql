@@ -2,6 +2,7 @@
 -- PostgreSQL 15 | 3NF Normalized | UUID Primary Keys
 
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";    -- fuzzy search (GET /search)
 
 -- ─── ENUMS ────────────────────────────────────────────────────────────────────
 
@@ -44,6 +45,8 @@ CREATE TABLE vehicles (
     fuel_efficiency_kmpl  NUMERIC(5,2),
     last_service_date     DATE,
     next_service_km       NUMERIC(12,2),
+    retired_at            TIMESTAMPTZ,                          -- set when status becomes retired
+    version               INTEGER         NOT NULL DEFAULT 1,   -- optimistic lock, bumped on every update
     created_by            UUID REFERENCES users(id) ON DELETE SET NULL,
     created_at            TIMESTAMPTZ     NOT NULL DEFAULT NOW(),
     updated_at            TIMESTAMPTZ     NOT NULL DEFAULT NOW()
@@ -51,6 +54,12 @@ CREATE TABLE vehicles (
 
 CREATE INDEX idx_vehicles_status ON vehicles(status);
 CREATE INDEX idx_vehicles_reg    ON vehicles(registration_number);
+-- List endpoints page newest first by (sort column, id); see list_page()
+CREATE INDEX idx_vehicles_created_id ON vehicles(created_at DESC, id DESC);
+-- Trigram indexes serve ILIKE '%term%' and the word-similarity operator <% used by /search
+CREATE INDEX idx_vehicles_reg_trgm   ON vehicles USING gin (registration_number gin_trgm_ops);
+CREATE INDEX idx_vehicles_make_trgm  ON vehicles USING gin (make gin_trgm_ops);
+CREATE INDEX idx_vehicles_model_trgm ON vehicles USING gin (model gin_trgm_ops);
 
 -- ─── DRIVERS ─────────────────────────────────────────────────────────────────
 
@@ -66,6 +75,7 @@ CREATE TABLE drivers (
     total_trips     INTEGER         NOT NULL DEFAULT 0,
     total_km_driven NUMERIC(12,2)   NOT NULL DEFAULT 0,
     incidents_count INTEGER         NOT NULL DEFAULT 0,
+    version         INTEGER         NOT NULL DEFAULT 1,   -- optimistic lock, bumped on every update
     created_by      UUID REFERENCES users(id) ON DELETE SET NULL,
     created_at      TIMESTAMPTZ     NOT NULL DEFAULT NOW(),
     updated_at      TIMESTAMPTZ     NOT NULL DEFAULT NOW()
@@ -73,6 +83,9 @@ CREATE TABLE drivers (
 
 CREATE INDEX idx_drivers_status          ON drivers(duty_status);
 CREATE INDEX idx_drivers_license_expiry  ON drivers(license_expiry);
+CREATE INDEX idx_drivers_created_id      ON drivers(created_at DESC, id DESC);
+CREATE INDEX idx_drivers_name_trgm       ON drivers USING gin (full_name gin_trgm_ops);
+CREATE INDEX idx_drivers_license_trgm    ON drivers USING gin (license_number gin_trgm_ops);
 
 -- ─── TRIPS ───────────────────────────────────────────────────────────────────
 
@@ -99,8 +112,46 @@ CREATE TABLE trips (
 CREATE INDEX idx_trips_status       ON trips(status);
 CREATE INDEX idx_trips_vehicle_id   ON trips(vehicle_id);
 CREATE INDEX idx_trips_driver_id    ON trips(driver_id);
-CREATE INDEX idx_trips_created_at   ON trips(created_at DESC);
+CREATE INDEX idx_trips_created_id   ON trips(created_at DESC, id DESC);
 CREATE INDEX idx_trips_departure    ON trips(scheduled_departure);
+CREATE INDEX idx_trips_vehicle_created ON trips(vehicle_id, created_at DESC);
+CREATE INDEX idx_trips_origin_trgm      ON trips USING gin (origin gin_trgm_ops);
+CREATE INDEX idx_trips_destination_trgm ON trips USING gin (destination gin_trgm_ops);
+
+-- ─── LOCATIONS ───────────────────────────────────────────────────────────────
+-- Named places with coordinates for the route optimizer. `key` is the
+-- lower-cased name before the first comma. location_distances holds known
+-- road distances (one row per pair, from_id < to_id) that override the
+-- great-circle estimate.
+
+CREATE TABLE locations (
+    id          UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name        VARCHAR(255)    NOT NULL,
+    key         VARCHAR(255)    UNIQUE NOT NULL,
+    latitude    NUMERIC(9,6)    NOT NULL CHECK (latitude BETWEEN -90 AND 90),
+    longitude   NUMERIC(9,6)    NOT NULL CHECK (longitude BETWEEN -180 AND 180),
+    created_at  TIMESTAMPTZ     NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE location_distances (
+    from_id      UUID NOT NULL REFERENCES locations(id) ON DELETE CASCADE,
+    to_id        UUID NOT NULL REFERENCES locations(id) ON DELETE CASCADE,
+    distance_km  NUMERIC(10,2)  NOT NULL CHECK (distance_km >= 0),
+    PRIMARY KEY (from_id, to_id),
+    CHECK (from_id < to_id)
+);
+
+-- Ordered route of a multi-stop trip: sequence 0 is the origin, the last
+-- row the destination; leg_km is the distance from the previous stop.
+CREATE TABLE trip_stops (
+    id           UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    trip_id      UUID NOT NULL REFERENCES trips(id) ON DELETE CASCADE,
+    sequence     INTEGER         NOT NULL CHECK (sequence >= 0),
+    location_id  UUID REFERENCES locations(id) ON DELETE SET NULL,
+    name         VARCHAR(255)    NOT NULL,
+    leg_km       NUMERIC(10,2)   NOT NULL DEFAULT 0,
+    CONSTRAINT uq_trip_stops_trip_sequence UNIQUE (trip_id, sequence)
+);
 
 -- ─── MAINTENANCE LOGS ────────────────────────────────────────────────────────
 
@@ -121,6 +172,7 @@ CREATE TABLE maintenance_logs (
 
 CREATE INDEX idx_maintenance_vehicle_id ON maintenance_logs(vehicle_id);
 CREATE INDEX idx_maintenance_status     ON maintenance_logs(status);
+CREATE INDEX idx_maintenance_date_id    ON maintenance_logs(service_date DESC, id DESC);
 
 -- ─── EXPENSES ────────────────────────────────────────────────────────────────
 
@@ -141,9 +193,58 @@ CREATE TABLE expenses (
 );
 
 CREATE INDEX idx_expenses_vehicle_id   ON expenses(vehicle_id);
-CREATE INDEX idx_expenses_date         ON expenses(expense_date DESC);
+CREATE INDEX idx_expenses_date_id      ON expenses(expense_date DESC, id DESC);
 CREATE INDEX idx_expenses_type         ON expenses(expense_type);
 
+-- ─── VEHICLE MONTH ROLLUP ────────────────────────────────────────────────────
+-- Per-vehicle monthly totals kept in step by the API write paths; completed
+-- trips are stored under expense_type 'trip'. Rebuilt by the rollup task.
+
+CREATE TABLE vehicle_month_rollup (
+    vehicle_id          UUID NOT NULL REFERENCES vehicles(id) ON DELETE CASCADE,
+    month               DATE            NOT NULL,
+    expense_type        VARCHAR(20)     NOT NULL,
+    amount              NUMERIC(14,2)   NOT NULL DEFAULT 0,
+    fuel_liters         NUMERIC(12,2)   NOT NULL DEFAULT 0,
+    expense_count       INTEGER         NOT NULL DEFAULT 0,
+    trip_count          INTEGER         NOT NULL DEFAULT 0,
+    distance_km         NUMERIC(14,2)   NOT NULL DEFAULT 0,
+    PRIMARY KEY (vehicle_id, month, expense_type)
+);
+
+CREATE INDEX idx_rollup_month_type ON vehicle_month_rollup(month, expense_type);
+
+-- ─── VEHICLE RISK SCORES ─────────────────────────────────────────────────────
+-- Latest maintenance-risk prediction per vehicle. Recomputed by the API for
+-- the vehicles a write touches and swept daily by the risk task.
+
+CREATE TABLE vehicle_risk_scores (
+    vehicle_id          UUID PRIMARY KEY REFERENCES vehicles(id) ON DELETE CASCADE,
+    probability         NUMERIC(4,3)    NOT NULL,
+    risk_level          VARCHAR(10)     NOT NULL,
+    recommended_action  VARCHAR(100)    NOT NULL,
+    estimated_days      INTEGER,
+    reasons             JSONB           NOT NULL DEFAULT '[]',
+    model_version       VARCHAR(50)     NOT NULL DEFAULT 'heuristic',
+    computed_at         TIMESTAMPTZ     NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_risk_scores_level_probability ON vehicle_risk_scores(risk_level, probability DESC);
+
+-- ─── VEHICLE FUEL STATS ──────────────────────────────────────────────────────
+-- Observed km/l (rollup liters vs completed-trip distance) and recent price
+-- per litre, read with the vehicle when a trip's fuel cost is estimated.
+
+CREATE TABLE vehicle_fuel_stats (
+    vehicle_id          UUID PRIMARY KEY REFERENCES vehicles(id) ON DELETE CASCADE,
+    km_per_liter        NUMERIC(6,2),
+    price_per_liter     NUMERIC(6,2),
+    price_source        VARCHAR(10),
+    fuel_liters         NUMERIC(12,2)   NOT NULL DEFAULT 0,
+    distance_km         NUMERIC(14,2)   NOT NULL DEFAULT 0,
+    computed_at         TIMESTAMPTZ     NOT NULL DEFAULT NOW()
+);
+
 -- ─── REFRESH TOKENS ──────────────────────────────────────────────────────────
 
 CREATE TABLE refresh_tokens (
@@ -12,10 +12,25 @@ from datetime import date, datetime, timezone, timedelta
 ph = PasswordHasher()
 DEFAULT_PASSWORD = "FleetFlow@123"
 
+# Route optimizer locations: (name, latitude, longitude)
+LOCATIONS = [
+    ("Surat", 21.170240, 72.831062),     ("Mumbai", 19.075984, 72.877656),
+    ("Ahmedabad", 23.022505, 72.571362), ("Delhi", 28.704060, 77.102493),
+    ("Pune", 18.520430, 73.856744),      ("Vadodara", 22.307159, 73.181219),
+    ("Rajkot", 22.303894, 70.802160),    ("Jaipur", 26.912434, 75.787270),
+    ("Indore", 22.719568, 75.857727),    ("Nagpur", 21.145800, 79.088155),
+    ("Nashik", 19.997453, 73.789802),    ("Udaipur", 24.585445, 73.712479),
+    ("Bhopal", 23.259933, 77.412615),    ("Hyderabad", 17.385044, 78.486671),
+    ("Bharuch", 21.705136, 72.998756),   ("Navsari", 20.951666, 72.923241),
+    ("Valsad", 20.599226, 72.934319),    ("Vapi", 20.371153, 72.904863),
+    ("Anand", 22.556507, 72.951085),     ("Bhavnagar", 21.764473, 72.151930),
+    ("Jamnagar", 22.470701, 70.057730),  ("Gandhinagar", 23.215635, 72.636941),
+]
+
 
 def seed_db():
     from app import create_app, db
-    from app.models import User, Vehicle, Driver, Trip, MaintenanceLog, Expense
+    from app.models import User, Vehicle, Driver, Trip, MaintenanceLog, Expense, Location
 
     app = create_app("development")
     with app.app_context():
@@ -26,6 +41,7 @@ def seed_db():
         Driver.query.delete()
         Vehicle.query.delete()
         User.query.delete()
+        Location.query.delete()
         db.session.commit()
 
         # ── Users ─────────────────────────────────────────────────────────────
@@ -81,7 +97,17 @@ def seed_db():
             Expense(vehicle_id=v5.id, trip_id=None,  driver_id=None,   expense_type="toll",   amount=1240,  fuel_liters=None, expense_date=date(2026,2,20), logged_by=disp.id),
         ]
         db.session.add_all(expenses)
+        db.session.add_all(Location(name=name, key=name.lower(), latitude=lat, longitude=lon)
+                           for name, lat, lon in LOCATIONS)
+        db.session.commit()
+
+        # Rebuild the monthly rollup, risk scores, fuel stats and dashboard KPI counters for the fresh data
+        from app.services import counters, fuel, risk, rollup
+        rollup.rebuild()
+        risk.refresh()
+        fuel.refresh()
         db.session.commit()
+        counters.reconcile()
 
         print("✅ Database seeded successfully!")
         print(f"   Users:       {User.query.count()}")
@@ -90,6 +116,7 @@ def seed_db():
         print(f"   Trips:       {Trip.query.count()}")
         print(f"   Maintenance: {MaintenanceLog.query.count()}")
         print(f"   Expenses:    {Expense.query.count()}")
+        print(f"   Locations:   {Location.query.count()}")
         print(f"\n   Login credentials: admin / FleetFlow@123")
 
 
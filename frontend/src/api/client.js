@@ -50,6 +50,8 @@ export const dashboardAPI = {
   kpis:           () => client.get('/dashboard/kpis'),
   liveTrips:      () => client.get('/dashboard/live-trips'),
   recentActivity: () => client.get('/dashboard/recent-activity'),
+  // EventSource cannot send headers, so the stream takes the token as a query param
+  streamUrl:      () => `${API_URL}/stream/events?token=${localStorage.getItem('access_token')}`,
 };
 
 export const vehiclesAPI = {
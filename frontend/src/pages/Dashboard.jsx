@@ -28,10 +28,42 @@ export default function Dashboard({ showToast }) {
     }
   };
 
+  const reloadTrips = async () => {
+    try {
+      const tRes = await dashboardAPI.liveTrips();
+      setTrips(tRes.data.data);
+    } catch (e) { /* next event or poll will retry */ }
+  };
+
   useEffect(() => {
     load();
-    const interval = setInterval(load, 30000); // Live polling
-    return () => clearInterval(interval);
+    // Live updates are pushed over SSE. While the stream is down (dropped, or
+    // refused with 503 when the server is at its stream limit) poll, and
+    // reconnect with exponential backoff.
+    let source = null, interval = null, retry = null, delay = 1000, stopped = false;
+    const poll = () => { if (!interval) interval = setInterval(load, 30000); };
+    const stopPolling = () => { clearInterval(interval); interval = null; };
+    const connect = () => {
+      source = new EventSource(dashboardAPI.streamUrl());
+      source.onopen = () => {
+        if (interval) { stopPolling(); load(); }
+        delay = 1000;
+      };
+      source.addEventListener('kpis', (e) => {
+        const delta = JSON.parse(e.data);
+        setKpis(k => ({ ...k, ...delta }));
+      });
+      source.addEventListener('trip', reloadTrips);
+      source.onerror = () => {
+        source.close();
+        poll();
+        if (stopped) return;
+        retry = setTimeout(connect, delay + Math.random() * delay / 2);
+        delay = Math.min(delay * 2, 60000);
+      };
+    };
+    connect();
+    return () => { stopped = true; source.close(); clearTimeout(retry); stopPolling(); };
   }, []);
 
   if (loading) return <Loading text="Loading fleet data..." />;